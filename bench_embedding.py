@@ -0,0 +1,101 @@
+# bench_embedding.py
+# 법령 적재 임베딩 처리량 비교: 글자 수 chunk + 파일 순서 배치(기존) vs 토큰 기준 chunk + 토큰 길이 버킷 배치
+#
+#   python bench_embedding.py                                   # 합성 법령 코퍼스 앞 2000행, e5-base
+#   python bench_embedding.py --parquet /tmp/law_manual.parquet --rows 5000
+#   python bench_embedding.py --model /path/to/sentence-transformers-dir
+#
+# 같은 원문 행들을 각 방식으로 chunk/배치해서 인코딩하고 embeddings/sec, 유효 토큰/sec, 512 토큰 초과(잘림) chunk 수를 출력한다.
+import argparse
+import os
+import tempfile
+import time
+
+import pyarrow.parquet as pq
+
+from bench_law_ingest import synthetic_corpus
+from utils.chunking import E5_MAX_TOKENS, tokenizer_counter
+from utils.embedding import BulkEncoder, get_embed_model
+from utils.law_ingest_parquet import detect_column, iter_law_chunks
+
+TEXT_COLUMNS = ["chunk_text", "content", "text", "document", "body", "raw_text"]
+
+
+def load_docs(parquet_path, rows, count_tokens=None):
+    """앞 rows행을 law_ingest_parquet와 같은 방식으로 chunk로 나눈 doc 목록 (count_tokens=None이면 글자 수 분할)."""
+    columns = pq.read_schema(parquet_path).names
+    colmap = {
+        "text": detect_column(columns, TEXT_COLUMNS),
+        "law_name": detect_column(columns, ["law_name", "law", "law_title"]),
+        "law_type": detect_column(columns, ["law_type", "doc_type", "type"]),
+        "source_file": detect_column(columns, ["source_file", "file_name", "filename", "pdf_name"]),
+    }
+    docs = []
+    for frame in iter_law_chunks(parquet_path, colmap, count_tokens=count_tokens):
+        docs.extend(frame["doc"][frame.index < rows].tolist())
+        if frame.index.max() >= rows - 1:
+            break
+    return docs
+
+
+def legacy_encode(model, docs, batch_size=64):
+    # 기존 law_ingest_parquet: 파일 순서 그대로 64개씩 model.encode
+    for i in range(0, len(docs), batch_size):
+        model.encode(docs[i:i + batch_size], normalize_embeddings=True)
+
+
+def bulk_encode(encoder, docs, batch_size=512):
+    # 현재 law_ingest_parquet: 512개 적재 배치마다 BulkEncoder.encode
+    for i in range(0, len(docs), batch_size):
+        encoder.encode(docs[i:i + batch_size])
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--parquet", default=None)
+    ap.add_argument("--rows", type=int, default=2000)
+    ap.add_argument("--model", default="intfloat/multilingual-e5-base")
+    args = ap.parse_args()
+
+    tmp_dir = None
+    path = args.parquet
+    if path is None:
+        tmp_dir = tempfile.TemporaryDirectory()
+        path = os.path.join(tmp_dir.name, "law_corpus.parquet")
+        synthetic_corpus(path, args.rows)
+
+    model = get_embed_model(args.model)
+    count_tokens = tokenizer_counter(model.tokenizer)
+    text_column = detect_column(pq.read_schema(path).names, TEXT_COLUMNS)
+    texts = pq.read_table(path, columns=[text_column]).slice(0, args.rows).column(0).to_pylist()
+    source_chars = sum(len(t or "") for t in texts)
+    char_docs = load_docs(path, args.rows)
+    token_docs = load_docs(path, args.rows, count_tokens=count_tokens)
+
+    fixed = BulkEncoder(args.model, workers=1, batch_tokens=0)
+    bucketed = BulkEncoder(args.model, workers=1)
+    cases = [
+        ("char chunks / file-order batches", char_docs, lambda: legacy_encode(model, char_docs)),
+        ("char chunks / sorted, fixed batches", char_docs, lambda: bulk_encode(fixed, char_docs)),
+        ("token chunks / token buckets", token_docs, lambda: bulk_encode(bucketed, token_docs)),
+    ]
+
+    model.encode(["passage: warmup"] * 4)
+    print(f"rows={len(texts)}, source_chars={source_chars}, model={args.model}")
+    print(f"{'case':<36} {'chunks':>7} {'>512tok':>8} {'sec':>8} {'emb/s':>8} {'tok/s':>9} {'src chars/s':>12}")
+    for name, docs, run in cases:
+        lengths = [n + 2 for n in count_tokens(docs)]
+        truncated = sum(1 for n in lengths if n > E5_MAX_TOKENS)
+        # 잘린 부분은 임베딩에 반영되지 않으므로 512까지만 유효 토큰으로 센다
+        useful_tokens = sum(min(n, E5_MAX_TOKENS) for n in lengths)
+        t0 = time.perf_counter()
+        run()
+        sec = time.perf_counter() - t0
+        print(f"{name:<36} {len(docs):>7} {truncated:>8} {sec:>8.1f} {len(docs) / sec:>8.1f} "
+              f"{useful_tokens / sec:>9.0f} {source_chars / sec:>12.0f}")
+    if tmp_dir is not None:
+        tmp_dir.cleanup()
+
+
+if __name__ == "__main__":
+    main()
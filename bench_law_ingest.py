@@ -0,0 +1,166 @@
+# bench_law_ingest.py
+# 법령 parquet 적재 전처리(메타데이터 정규화 / 조문 번호·제목 추출 / chunk 분할 / id 생성) 기존 iterrows vs 벡터화 구현 비교
+#
+#   python bench_law_ingest.py                  # 합성 법령 코퍼스 100k행
+#   python bench_law_ingest.py --rows 300000
+#   python bench_law_ingest.py --parquet /tmp/law_manual.parquet
+#
+# 임베딩/upsert는 제외하고, 두 구현이 만드는 (id, doc, meta)가 같은지 먼저 확인한 뒤 시간을 출력한다.
+import argparse
+import os
+import random
+import tempfile
+import time
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from utils.law_ingest_parquet import (
+    LAW_READ_BATCH_ROWS,
+    build_full_reference,
+    chunk_ids,
+    detect_column,
+    frame_metas,
+    iter_law_chunks,
+    parse_article_number,
+    parse_article_title,
+    s,
+    split_chunks,
+)
+
+
+# =========================
+# 기존 구현 (비교 기준)
+# =========================
+def legacy_normalize_meta(row, colmap, text):
+    def pick(key, default=""):
+        c = colmap.get(key)
+        if c is None:
+            return default
+        return s(row[c]) or default
+
+    law_name = pick("law_name")
+    law_type = pick("law_type", "unknown")
+    article_number = pick("article_number") or parse_article_number(text)
+    article_title = pick("article_title") or parse_article_title(text)
+    full_reference = pick("full_reference") or build_full_reference(law_name, article_number, article_title)
+    return {
+        "law_name": law_name,
+        "law_type": law_type,
+        "source_file": pick("source_file"),
+        "regulation_type": pick("regulation_type"),
+        "regulation_number": pick("regulation_number"),
+        "article_number": article_number,
+        "article_title": article_title,
+        "full_reference": full_reference,
+    }
+
+
+def legacy_chunks(parquet_path, colmap):
+    df = pd.read_parquet(parquet_path)
+    ids, docs, metas = [], [], []
+    seen = {}
+    for i, row in df.iterrows():
+        text = s(row[colmap["text"]])
+        if not text:
+            continue
+        meta = legacy_normalize_meta(row, colmap, text)
+        # id는 양쪽 모두 chunk_ids (행 번호 무관 id 체계)로 만들어 전처리 시간만 비교
+        key = f"{meta['law_name']}|{meta['source_file']}|{meta['regulation_number']}|{meta['article_number']}"
+        for chunk in split_chunks(text):
+            ids.extend(chunk_ids([key], [chunk], seen))
+            docs.append(f"passage: {meta['law_name']} {meta['law_type']}: {chunk}".strip())
+            metas.append(meta)
+    return ids, docs, metas
+
+
+def vectorized_chunks(parquet_path, colmap, read_rows):
+    ids, docs, metas = [], [], []
+    for frame in iter_law_chunks(parquet_path, colmap, read_rows):
+        ids.extend(frame["id"].tolist())
+        docs.extend(frame["doc"].tolist())
+        metas.extend(frame_metas(frame))
+    return ids, docs, metas
+
+
+# =========================
+# 입력 fixture
+# =========================
+def synthetic_corpus(path, num_rows, seed=0, row_group_size=20000):
+    """법령/규정 조문 흉내: 조문 번호·제목이 컬럼에 있거나 본문에만 있는 행, 빈 본문, 결측 메타데이터 섞음."""
+    rnd = random.Random(seed)
+    laws = [f"국가연구개발사업 관리 규정 {k}" for k in range(40)] + ["연구개발성과 평가법", "과학기술기본법 시행령"]
+    words = ["연구개발", "과제", "협약", "기관", "평가", "사업비", "집행", "정산", "보고서", "제출", "승인", "변경", "책임자"]
+    cols = {k: [] for k in ("chunk_text", "law_name", "law_type", "source_file", "article_number", "article_title")}
+    for _ in range(num_rows):
+        no = rnd.randint(1, 120)
+        sub = f"의{rnd.randint(2, 5)}" if rnd.random() < 0.1 else ""
+        title = rnd.choice(["목적", "정의", "협약의 체결", "사업비의 관리", "성과평가"])
+        body = " ".join(rnd.choice(words) for _ in range(rnd.randint(20, 260)))
+        text = f"제{no}{sub}조({title}) {body}" if rnd.random() < 0.9 else body
+        cols["chunk_text"].append("" if rnd.random() < 0.01 else text)
+        cols["law_name"].append(rnd.choice(laws))
+        cols["law_type"].append(None if rnd.random() < 0.2 else rnd.choice(["법률", "시행령", "훈령"]))
+        cols["source_file"].append(f"law_{rnd.randint(1, 300)}.pdf")
+        cols["article_number"].append(f"{no}{sub}" if rnd.random() < 0.5 else None)
+        cols["article_title"].append(title if rnd.random() < 0.3 else "")
+    pq.write_table(pa.table(cols), path, row_group_size=row_group_size)
+
+
+# =========================
+# 실행
+# =========================
+def timed(fn, repeat):
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - t0)
+    return best, result
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--parquet", default=None)
+    ap.add_argument("--rows", type=int, default=100000)
+    ap.add_argument("--read-rows", type=int, default=LAW_READ_BATCH_ROWS)
+    ap.add_argument("--repeat", type=int, default=1)
+    args = ap.parse_args()
+
+    tmp_dir = None
+    path = args.parquet
+    if path is None:
+        tmp_dir = tempfile.TemporaryDirectory()
+        path = os.path.join(tmp_dir.name, "law_corpus.parquet")
+        t0 = time.perf_counter()
+        synthetic_corpus(path, args.rows)
+        print(f"fixture: {args.rows} rows -> {path} ({time.perf_counter() - t0:.2f}s)")
+
+    columns = pq.read_schema(path).names
+    colmap = {
+        "text": detect_column(columns, ["chunk_text", "content", "text", "document", "body", "raw_text"]),
+        "law_name": detect_column(columns, ["law_name", "law", "law_title"]),
+        "law_type": detect_column(columns, ["law_type", "doc_type", "type"]),
+        "source_file": detect_column(columns, ["source_file", "file_name", "filename", "pdf_name"]),
+        "regulation_type": detect_column(columns, ["regulation_type", "reg_type"]),
+        "regulation_number": detect_column(columns, ["regulation_number", "reg_number", "law_number"]),
+        "article_number": detect_column(columns, ["article_number", "article_no", "article"]),
+        "article_title": detect_column(columns, ["article_title", "article_name", "article_subject"]),
+        "full_reference": detect_column(columns, ["full_reference", "reference"]),
+    }
+
+    old, expected = timed(lambda: legacy_chunks(path, colmap), args.repeat)
+    new, actual = timed(lambda: vectorized_chunks(path, colmap, args.read_rows), args.repeat)
+    assert actual == expected, "결과 불일치"
+
+    n = len(expected[0])
+    print(f"chunks: {n}")
+    print(f"{'iterrows + normalize_meta':<34} {old:8.2f} s   {n / old:10.0f} chunks/s")
+    print(f"{'pyarrow.dataset + vectorized':<34} {new:8.2f} s   {n / new:10.0f} chunks/s   x{old / new:5.2f}")
+    if tmp_dir is not None:
+        tmp_dir.cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+# bench_parsing.py
+# PDF 파싱 후처리 단계(표 안 단어 제외 / 겹친 표 제거 / 줄 묶기) 기존 루프 vs NumPy 구현 비교
+#
+#   python bench_parsing.py                 # 합성 fixture 120페이지
+#   python bench_parsing.py --pages 300
+#   python bench_parsing.py --pdf data/input/sample.pdf
+#
+# 두 구현의 결과가 같은지 먼저 확인한 뒤 단계별 시간을 출력한다.
+import argparse
+import random
+import time
+from types import SimpleNamespace
+
+from utils.document_parsing import (
+    filter_overlapping_tables,
+    group_words_into_lines,
+    words_outside_bboxes,
+)
+
+
+# =========================
+# 기존 구현 (비교 기준)
+# =========================
+def legacy_filter_overlapping_tables(tables):
+    if not tables: return []
+    indices_to_remove = set()
+    for i, outer in enumerate(tables):
+        for j, inner in enumerate(tables):
+            if i == j: continue
+            if (outer.bbox[0] <= inner.bbox[0] + 1 and outer.bbox[1] <= inner.bbox[1] + 1 and
+                outer.bbox[2] >= inner.bbox[2] - 1 and outer.bbox[3] >= inner.bbox[3] - 1):
+                indices_to_remove.add(i); break
+    return [t for i, t in enumerate(tables) if i not in indices_to_remove]
+
+
+def legacy_is_inside_bbox(word, bboxes):
+    w_cx, w_cy = (word['x0'] + word['x1']) / 2, (word['top'] + word['bottom']) / 2
+    for b in bboxes:
+        if (b[0] <= w_cx <= b[2]) and (b[1] <= w_cy <= b[3]): return True
+    return False
+
+
+def legacy_group_lines(words, sort=False):
+    if not words: return []
+    if sort: words = sorted(words, key=lambda w: (w["top"], w["x0"]))
+    lines = []; current_line = [words[0]]
+    for i in range(1, len(words)):
+        if abs(words[i]["top"] - words[i - 1]["top"]) < 5: current_line.append(words[i])
+        else: lines.append(current_line); current_line = [words[i]]
+    lines.append(current_line)
+    return lines
+
+
+# =========================
+# 입력 fixture
+# =========================
+def synthetic_pages(num_pages, seed=0):
+    """정부 서식류 페이지 흉내: 1단/2단 본문 + 표 여러 개(일부 중첩) + 표 안 단어."""
+    rnd = random.Random(seed)
+    pages = []
+    for _ in range(num_pages):
+        two_col = rnd.random() < 0.3
+        tables = []
+        for _ in range(rnd.randint(5, 40)):
+            x0, top = rnd.uniform(40, 400), rnd.uniform(40, 700)
+            tables.append(SimpleNamespace(bbox=(x0, top, x0 + rnd.uniform(60, 180), top + rnd.uniform(20, 80))))
+            if rnd.random() < 0.2:
+                b = tables[-1].bbox
+                tables.append(SimpleNamespace(bbox=(b[0] + 2, b[1] + 2, b[2] - 2, b[3] - 2)))
+        words = []
+        for row in range(rnd.randint(40, 70)):
+            top = 40 + row * 11 + rnd.uniform(-1.5, 1.5)
+            cols = [(40, 280), (310, 560)] if two_col else [(40, 560)]
+            for left, right in cols:
+                x = left
+                while x < right - 30:
+                    w = rnd.uniform(15, 45)
+                    words.append({"x0": x, "x1": x + w, "top": top + rnd.uniform(-0.5, 0.5),
+                                  "bottom": top + 9, "text": "단어"})
+                    x += w + rnd.uniform(3, 6)
+        pages.append((words, tables))
+    return pages
+
+
+def pdf_pages(pdf_path):
+    import pdfplumber
+    pages = []
+    with pdfplumber.open(pdf_path) as pdf:
+        for page in pdf.pages:
+            tables = [SimpleNamespace(bbox=t.bbox) for t in page.find_tables()]
+            pages.append((page.extract_words(), tables))
+            page.close()
+    return pages
+
+
+# =========================
+# 실행
+# =========================
+def run_stage(pages, legacy_fn, new_fn, repeat):
+    for words, tables in pages:
+        assert legacy_fn(words, tables) == new_fn(words, tables), "결과 불일치"
+    timings = []
+    for fn in (legacy_fn, new_fn):
+        best = float("inf")
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            for words, tables in pages: fn(words, tables)
+            best = min(best, time.perf_counter() - t0)
+        timings.append(best)
+    return timings
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--pdf", default=None)
+    ap.add_argument("--pages", type=int, default=120)
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+
+    t0 = time.perf_counter()
+    pages = pdf_pages(args.pdf) if args.pdf else synthetic_pages(args.pages)
+    n_words = sum(len(w) for w, _ in pages); n_tables = sum(len(t) for _, t in pages)
+    print(f"fixture: {len(pages)} pages, {n_words} words, {n_tables} tables (load {time.perf_counter() - t0:.2f}s)")
+
+    # 표 안 단어 제외 단계는 겹친 표 제거가 끝난 bbox 목록을 입력으로 받는다 (시간 측정에서 제외)
+    with_bboxes = [(w, [t.bbox for t in filter_overlapping_tables(t)]) for w, t in pages]
+
+    stages = [
+        ("filter_overlapping_tables", pages,
+         lambda w, t: legacy_filter_overlapping_tables(t),
+         lambda w, t: filter_overlapping_tables(t)),
+        ("words outside tables", with_bboxes,
+         lambda w, bb: [x for x in w if not legacy_is_inside_bbox(x, bb)],
+         lambda w, bb: words_outside_bboxes(w, bb)),
+        ("line grouping (extract order)", pages,
+         lambda w, t: legacy_group_lines(w),
+         lambda w, t: group_words_into_lines(w)),
+        ("line grouping (sorted top, x0)", pages,
+         lambda w, t: legacy_group_lines(w, sort=True),
+         lambda w, t: group_words_into_lines(w, sort=True)),
+    ]
+    total_old = total_new = 0.0
+    for name, stage_pages, legacy_fn, new_fn in stages:
+        old, new = run_stage(stage_pages, legacy_fn, new_fn, args.repeat)
+        total_old += old; total_new += new
+        print(f"{name:<34} legacy {old * 1000:9.1f} ms   numpy {new * 1000:9.1f} ms   x{old / new:5.2f}")
+    print(f"{'total':<34} legacy {total_old * 1000:9.1f} ms   numpy {total_new * 1000:9.1f} ms   x{total_old / total_new:5.2f}")
+
+
+if __name__ == "__main__":
+    main()
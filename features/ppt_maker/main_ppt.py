@@ -5,7 +5,7 @@ import json
 import os
 import re
 from datetime import datetime
-from typing import Any, Dict, List
+from typing import Any, Callable, Dict, List, Optional
 
 from dotenv import load_dotenv
 from langgraph.graph import END, START, StateGraph
@@ -189,11 +189,38 @@ def _save_deck_checkpoint(deck: Dict[str, Any], output_dir: str) -> str:
     return path
 
 
-def build_graph(*, skip_to_gamma: bool = False, prepare_only: bool = False, render_mode: str = "gamma"):
+ProgressCallback = Callable[[str, str], None]
+
+
+def _with_progress(name: str, node_fn, on_progress: Optional[ProgressCallback]):
+    """노드 실행 전후로 on_progress(name, "start"/"done")를 호출하도록 감싼다."""
+    if on_progress is None:
+        return node_fn
+
+    def wrapped(state):
+        on_progress(name, "start")
+        out = node_fn(state)
+        on_progress(name, "done")
+        return out
+
+    return wrapped
+
+
+def build_graph(
+    *,
+    skip_to_gamma: bool = False,
+    prepare_only: bool = False,
+    render_mode: str = "gamma",
+    on_progress: Optional[ProgressCallback] = None,
+):
     workflow = StateGraph(GraphState)
-    workflow.add_node("make_pptx", gamma_generation_node)
-    workflow.add_node("make_template_pptx", template_render_node)
-    workflow.add_node("postprocess", postprocess_diagrams_node)
+
+    def add_node(name: str, node_fn) -> None:
+        workflow.add_node(name, _with_progress(name, node_fn, on_progress))
+
+    add_node("make_pptx", gamma_generation_node)
+    add_node("make_template_pptx", template_render_node)
+    add_node("postprocess", postprocess_diagrams_node)
 
     if skip_to_gamma:
         start_node = "make_template_pptx" if render_mode == "template" else "make_pptx"
@@ -202,10 +229,10 @@ def build_graph(*, skip_to_gamma: bool = False, prepare_only: bool = False, rend
         workflow.add_edge("postprocess", END)
         return workflow.compile()
 
-    workflow.add_node("extract_text", extract_text_node)
-    workflow.add_node("split_sections", section_split_node)
-    workflow.add_node("make_sections", section_deck_generation_node)
-    workflow.add_node("merge_deck", merge_deck_node)
+    add_node("extract_text", extract_text_node)
+    add_node("split_sections", section_split_node)
+    add_node("make_sections", section_deck_generation_node)
+    add_node("merge_deck", merge_deck_node)
 
     workflow.add_edge(START, "extract_text")
     workflow.add_edge("extract_text", "split_sections")
@@ -236,6 +263,7 @@ def run_ppt_generation(
     checkpoint_path: str = "",
     prepare_only: bool = False,
     render_mode: str = "gamma",
+    on_progress: Optional[ProgressCallback] = None,
 ):
     print("=" * 80)
     print("PPT 자동 생성 시작 (Extract -> Split -> Gemini -> Merge -> Render)")
@@ -266,7 +294,12 @@ def run_ppt_generation(
     elif BACKGROUND_PROFILE == "basic":
         effective_gamma_theme = os.environ.get("BASIC_GAMMA_THEME_ID") or effective_gamma_theme
 
-    app = build_graph(skip_to_gamma=skip_to_gamma, prepare_only=prepare_only, render_mode=render_mode)
+    app = build_graph(
+        skip_to_gamma=skip_to_gamma,
+        prepare_only=prepare_only,
+        render_mode=render_mode,
+        on_progress=on_progress,
+    )
 
     initial_state: Dict[str, Any] = {
         "source_path": source_path,
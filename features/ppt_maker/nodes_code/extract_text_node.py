@@ -1,7 +1,7 @@
 """입력 문서에서 텍스트를 추출해 state['extracted_text']에 저장.
 
 지원:
-- PDF: document_parsing.extract_text_from_pdf
+- PDF: parser_engine.iter_pages (페이지 단위 generator, 파싱 캐시 사용)
 - DOCX: document_parsing.parse_docx_to_blocks
 - 이미 파싱된 JSON: *_parsing.json
 
@@ -13,13 +13,14 @@ from __future__ import annotations
 
 import json
 import os
-from typing import Any, Dict, List
+from typing import Any, Dict, Iterable, List
 
-from utils.document_parsing import extract_text_from_pdf, parse_docx_to_blocks
+from utils.document_parsing import parse_docx_to_blocks
+from utils.parser_engine import iter_pages
 
 
-def _flatten_pdf_pages(pages: List[Dict[str, Any]]) -> str:
-    # extract_text_from_pdf는 페이지별 texts 리스트를 반환
+def _flatten_pdf_pages(pages: Iterable[Dict[str, Any]]) -> str:
+    # 페이지별 texts 리스트 (list 또는 iter_pdf_pages generator)
     out: List[str] = []
     for p in pages:
         texts = p.get("texts") or []
@@ -66,11 +67,12 @@ def extract_text(state: Dict[str, Any]) -> Dict[str, Any]:
         else:
             extracted_text = str(data)
     elif ext == ".pdf":
-        pages = extract_text_from_pdf(src)
-        extracted_text = _flatten_pdf_pages(pages)
+        # 1장씩 바로 텍스트로 합침 (/parse 에서 같은 파일을 이미 파싱했으면 파싱 캐시에서 읽음)
+        extracted_text = _flatten_pdf_pages(iter_pages(src))
     elif ext == ".docx":
+        # 텍스트만 필요하므로 이미지는 디스크에 저장하지 않고 참조만 남김 ([IMAGE] 표시용)
         out_dir = state.get("parsing_out_dir") or os.path.join(os.getcwd(), "parsing")
-        parsed = parse_docx_to_blocks(src, out_dir)
+        parsed = parse_docx_to_blocks(src, out_dir, images="lazy")
         extracted_text = _flatten_docx_blocks(parsed)
     else:
         raise RuntimeError(f"지원하지 않는 입력 형식입니다: {ext} (pdf/docx/json 지원)")
@@ -4,12 +4,14 @@ Gemini LLM 호출 공통 유틸.
 - GOOGLE_API_KEY만 사용 (Gemini 호출)
 - 429/5xx 계열에 대해 retry + backoff
 - 429 응답에 "retry in XXs"가 있으면 그 시간만큼 대기 후 재시도
+- 여러 스레드가 동시에 호출하는 경우 429 대기 시간을 프로세스 전체가 공유 (한 호출이 막히면 나머지도 같이 쉼)
 """
 
 from __future__ import annotations
 
 import os
 import re
+import threading
 import time
 from typing import Any, Optional
 
@@ -28,6 +30,23 @@ def get_gemini_client() -> genai.Client:
     return genai.Client(api_key=get_api_key())
 
 
+# 429로 받은 "retry in" 시점까지는 새 호출을 보내지 않는다 (time.monotonic 기준)
+_cooldown_lock = threading.Lock()
+_cooldown_until = 0.0
+
+
+def _wait_for_cooldown() -> None:
+    wait = _cooldown_until - time.monotonic()
+    if wait > 0:
+        time.sleep(wait)
+
+
+def _set_cooldown(wait_sec: float) -> None:
+    global _cooldown_until
+    with _cooldown_lock:
+        _cooldown_until = max(_cooldown_until, time.monotonic() + wait_sec)
+
+
 def _extract_retry_seconds(msg: str) -> Optional[int]:
     """
     에러 메시지에 'Please retry in 46.7s' / 'retry in 46s' 같은 문구가 있으면 초 단위로 추출
@@ -59,6 +78,7 @@ def generate_content_with_retry(
     last_exc: Optional[Exception] = None
 
     for attempt in range(max_retries):
+        _wait_for_cooldown()
         try:
             return client.models.generate_content(model=model, contents=contents, config=config)
         except Exception as e:
@@ -77,7 +97,7 @@ def generate_content_with_retry(
             if retry_sec is not None:
                 wait = min(retry_sec + 1, 120)
                 print(f"[WARN] Gemini rate limit. wait {wait}s then retry...")
-                time.sleep(wait)
+                _set_cooldown(wait)
                 continue
 
             # 그 외는 exponential backoff
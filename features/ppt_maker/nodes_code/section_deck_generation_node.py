@@ -1,15 +1,24 @@
 from __future__ import annotations
 
 import json
+import os
 import re
+from concurrent.futures import Future, ThreadPoolExecutor
 from typing import Any, Dict, List
 
 from google import genai
 from google.genai import types
 
+from utils.llm_cache import cache_setting, generate_text, is_json_response
+
 from .llm_utils import generate_content_with_retry, get_gemini_client
 
 
+# 덱 생성/보정은 temperature 0.4 생성형 호출이라 응답 캐시 기본값 off
+# (LLM_CACHE_PPT_DECK로 변경, 요청별로는 state["gemini_use_cache"]가 우선)
+PPT_DECK_USE_CACHE = cache_setting("PPT_DECK", False)
+
+
 # -----------------------------
 # Prompt
 # -----------------------------
@@ -283,43 +292,28 @@ def _slide_has_formal_lines(slide: Dict[str, Any]) -> bool:
     return False
 
 
-def _rewrite_formal_lines_with_gemini(
-    client: genai.Client,
-    model: str,
-    slide: Dict[str, Any],
-) -> Dict[str, Any]:
-    prompt = (
-        "Rewrite slide text to presentation keywords only.\n"
-        "Rules:\n"
-        "- No sentence endings.\n"
-        "- No formal endings like 합니다/입니다/됩니다/있습니다.\n"
-        "- KEY_MESSAGE must be exactly 3 keyword phrases.\n"
-        "- BULLETS must be short noun phrases.\n"
-        "- EVIDENCE text must be short noun phrases.\n"
-        "Return JSON only with keys: title, key_message_keywords, bullets, evidence.\n"
-    )
-    payload = {
+_FORMAL_REWRITE_RULES = (
+    "Rules:\n"
+    "- No sentence endings.\n"
+    "- No formal endings like 합니다/입니다/됩니다/있습니다.\n"
+    "- KEY_MESSAGE must be exactly 3 keyword phrases.\n"
+    "- BULLETS must be short noun phrases.\n"
+    "- EVIDENCE text must be short noun phrases.\n"
+)
+# 한 번의 배치 호출에 넣을 최대 슬라이드 수 (출력 토큰 한도 고려)
+FORMAL_REWRITE_BATCH_SIZE = int(os.environ.get("FORMAL_REWRITE_BATCH_SIZE") or 8)
+
+
+def _formal_rewrite_payload(slide: Dict[str, Any]) -> Dict[str, Any]:
+    return {
         "title": str(slide.get("slide_title") or ""),
         "key_message": str(slide.get("key_message") or ""),
         "bullets": slide.get("bullets") or [],
         "evidence": slide.get("evidence") or [],
     }
-    resp = generate_content_with_retry(
-        client,
-        model=model or "gemini-2.5-flash",
-        contents=[prompt, json.dumps(payload, ensure_ascii=False)],
-        config=types.GenerateContentConfig(
-            temperature=0.2,
-            max_output_tokens=1024,
-            response_mime_type="application/json",
-        ),
-        max_retries=1,
-    )
-    raw = (getattr(resp, "text", None) or "").strip()
-    obj = json.loads(raw) if raw else {}
-    if not isinstance(obj, dict):
-        return slide
 
+
+def _apply_formal_rewrite(slide: Dict[str, Any], obj: Dict[str, Any]) -> Dict[str, Any]:
     out = dict(slide)
     out["slide_title"] = _to_phrase(obj.get("title") or out.get("slide_title") or "")
     km_list = obj.get("key_message_keywords") or []
@@ -344,6 +338,138 @@ def _rewrite_formal_lines_with_gemini(
     return out
 
 
+def _rewrite_formal_lines_with_gemini(
+    client: genai.Client,
+    model: str,
+    slide: Dict[str, Any],
+    use_cache: bool = False,
+) -> Dict[str, Any]:
+    prompt = (
+        "Rewrite slide text to presentation keywords only.\n"
+        + _FORMAL_REWRITE_RULES
+        + "Return JSON only with keys: title, key_message_keywords, bullets, evidence.\n"
+    )
+    raw = generate_text(
+        client,
+        model=model or "gemini-2.5-flash",
+        contents=[prompt, json.dumps(_formal_rewrite_payload(slide), ensure_ascii=False)],
+        config=types.GenerateContentConfig(
+            temperature=0.2,
+            max_output_tokens=1024,
+            response_mime_type="application/json",
+        ),
+        use_cache=use_cache,
+        generate=lambda **kw: generate_content_with_retry(client, max_retries=1, **kw),
+        validate=is_json_response,
+    ).strip()
+    obj = json.loads(raw) if raw else {}
+    if not isinstance(obj, dict):
+        return slide
+    return _apply_formal_rewrite(slide, obj)
+
+
+def _is_valid_formal_rewrite(obj: Any) -> bool:
+    if not isinstance(obj, dict):
+        return False
+    if not isinstance(obj.get("title"), str):
+        return False
+    if not isinstance(obj.get("key_message_keywords"), (list, str)):
+        return False
+    bullets = obj.get("bullets")
+    if not (isinstance(bullets, list) and bullets and all(isinstance(b, str) for b in bullets)):
+        return False
+    return isinstance(obj.get("evidence") or [], list)
+
+
+def _rewrite_formal_lines_batch_with_gemini(
+    client: genai.Client,
+    model: str,
+    slides: Dict[int, Dict[str, Any]],
+    use_cache: bool = False,
+) -> Dict[int, Dict[str, Any]]:
+    """
+    여러 슬라이드를 id가 붙은 JSON 배열 한 번으로 재작성한다.
+    검증을 통과한 항목만 {id: 재작성 슬라이드}로 돌려주고, 빠진 id는 호출부에서 개별 재시도.
+    """
+    if not slides:
+        return {}
+    prompt = (
+        "Rewrite each slide's text to presentation keywords only.\n"
+        + _FORMAL_REWRITE_RULES
+        + "- Keep every id exactly as given and return one item per input slide.\n"
+        "Return a JSON array only. Each item has keys: id, title, key_message_keywords, bullets, evidence.\n"
+    )
+    payload = [{"id": sid, **_formal_rewrite_payload(sl)} for sid, sl in slides.items()]
+    raw = generate_text(
+        client,
+        model=model or "gemini-2.5-flash",
+        contents=[prompt, json.dumps(payload, ensure_ascii=False)],
+        config=types.GenerateContentConfig(
+            temperature=0.2,
+            max_output_tokens=min(1024 * len(slides), 8192),
+            response_mime_type="application/json",
+        ),
+        use_cache=use_cache,
+        generate=lambda **kw: generate_content_with_retry(client, max_retries=1, **kw),
+        validate=is_json_response,
+    ).strip()
+    try:
+        items = json.loads(raw) if raw else []
+    except Exception:
+        print("[WARN] formal rewrite batch: invalid JSON, fallback to per-slide")
+        return {}
+    if isinstance(items, dict):
+        items = items.get("slides") or items.get("items") or []
+    if not isinstance(items, list):
+        return {}
+
+    out: Dict[int, Dict[str, Any]] = {}
+    for obj in items:
+        if not _is_valid_formal_rewrite(obj):
+            continue
+        try:
+            sid = int(obj.get("id"))
+        except (TypeError, ValueError):
+            continue
+        if sid not in slides or sid in out:
+            continue
+        out[sid] = _apply_formal_rewrite(slides[sid], obj)
+    return out
+
+
+def _rewrite_formal_slides(
+    client: genai.Client,
+    model: str,
+    slides: List[Dict[str, Any]],
+    use_cache: bool = False,
+) -> None:
+    """평서문/종결어미가 남은 슬라이드를 배치로 재작성해 slides 리스트에 제자리 반영."""
+    targets = {i: sl for i, sl in enumerate(slides) if _slide_has_formal_lines(sl)}
+    if not targets:
+        return
+
+    rewritten: Dict[int, Dict[str, Any]] = {}
+    ids = list(targets)
+    for i in range(0, len(ids), max(1, FORMAL_REWRITE_BATCH_SIZE)):
+        batch = {sid: targets[sid] for sid in ids[i:i + max(1, FORMAL_REWRITE_BATCH_SIZE)]}
+        try:
+            rewritten.update(_rewrite_formal_lines_batch_with_gemini(client, model, batch, use_cache=use_cache))
+        except Exception as e:
+            print(f"[WARN] formal rewrite batch failed: {e}")
+
+    missing = [sid for sid in ids if sid not in rewritten]
+    if missing:
+        print(f"[DEBUG][gemini] formal rewrite: batch={len(rewritten)}, per-slide fallback={len(missing)}")
+    for sid in missing:
+        try:
+            rewritten[sid] = _rewrite_formal_lines_with_gemini(client, model, targets[sid], use_cache=use_cache)
+        except Exception:
+            pass
+
+    for sid, sl in rewritten.items():
+        slides[sid] = sl
+
+
 def _parse_slides_from_text(raw: str, *, default_section: str, start_order: int) -> List[Dict[str, Any]]:
     slides: List[Dict[str, Any]] = []
     order = start_order
@@ -504,19 +630,17 @@ def _repair_slides(
     *,
     client: genai.Client | None = None,
     model: str = "",
+    use_cache: bool = False,
 ) -> List[Dict[str, Any]]:
     banned = ["본 슬라이드", "추후 보완", "제공되지 않아", "원문 근거 부족"]
+    if client is not None:
+        _rewrite_formal_slides(client, model, slides, use_cache=use_cache)
+
     for s in slides:
         s["image_needed"] = False
         s["image_type"] = "none"
         s["image_brief_ko"] = ""
 
-        if _slide_has_formal_lines(s) and client is not None:
-            try:
-                s = _rewrite_formal_lines_with_gemini(client, model, s)
-            except Exception:
-                pass
-
         km = str(s.get("key_message") or "")
         if any(b in km for b in banned):
             s["key_message"] = ""
@@ -584,6 +708,10 @@ def section_deck_generation_node(state: Dict[str, Any]) -> Dict[str, Any]:
     deck_title = (state.get("deck_title") or "").strip()
     order_cursor = 1
 
+    # 1) 섹션별 프롬프트/분할 계획 (LLM 호출 없음)
+    # plan item: {"title", "prompt", "chunks"} 또는 고정 슬라이드 {"title", "fixed_slides"}
+    plan: List[Dict[str, Any]] = []
+
     for s in sections:
         sec_title = re.sub(r"\s+", " ", (s.get("title") or "")).strip()  # ✅ 핵심: strip
         sec_text = (s.get("text") or "").strip()
@@ -609,7 +737,7 @@ def section_deck_generation_node(state: Dict[str, Any]) -> Dict[str, Any]:
         # 기관 소개는 DB 미연동 상태에서도 1장 고정 유지
         if sec_title == "기관 소개":
             one_slide = {
-                "order": order_cursor,
+                "order": 0,
                 "section": "기관 소개",
                 "slide_title": "기관 소개 및 수행역량",
                 "key_message": "기관 정보 연동 대기",
@@ -627,12 +755,7 @@ def section_deck_generation_node(state: Dict[str, Any]) -> Dict[str, Any]:
                 "DIAGRAM_SPEC_KO": "",
                 "CHART_SPEC_KO": "",
             }
-            section_decks[sec_title] = {
-                "section": sec_title,
-                "deck_title": deck_title or "발표자료",
-                "slides": [one_slide],
-            }
-            order_cursor += 1
+            plan.append({"title": sec_title, "fixed_slides": [one_slide]})
             continue
 
         # Q&A는 여기서 만들지 않음(merge에서 강제 추가)
@@ -719,42 +842,76 @@ def section_deck_generation_node(state: Dict[str, Any]) -> Dict[str, Any]:
         prompt_for_section = f"{prompt}\n\n{common_rules}\n\n{section_rules}".strip()
         print("[DEBUG][gemini] section:", repr(sec_title), "chunks:", len(sec_chunks), "src_len:", len(sec_text))
 
-        section_slides: List[Dict[str, Any]] = []
-        for idx, chunk_text in enumerate(sec_chunks, 1):
-            chunk_header = f"[섹션: {sec_title}] [분할 {idx}/{len(sec_chunks)}]\n"
-            input_text = chunk_header + chunk_text
-            resp = generate_content_with_retry(
-                client,
-                model=state.get("gemini_model") or "gemini-2.5-flash",
-                contents=[prompt_for_section, input_text],
-                config=types.GenerateContentConfig(
-                    max_output_tokens=int(state.get("gemini_max_output_tokens") or 8192),
-                    temperature=float(state.get("gemini_temperature") or 0.4),
-                ),
-                max_retries=int(state.get("gemini_max_retries") or 5),
-            )
+        plan.append({"title": sec_title, "prompt": prompt_for_section, "chunks": sec_chunks})
+
+    # 섹션/분할별 Gemini 호출은 서로 독립 → bounded pool로 동시에 실행하고, 결과는 원래 순서대로 조립
+    model = state.get("gemini_model") or "gemini-2.5-flash"
+    max_workers = max(1, int(state.get("gemini_max_concurrency") or os.environ.get("GEMINI_MAX_CONCURRENCY") or 4))
+    max_retries = int(state.get("gemini_max_retries") or 5)
+    # LLM 응답 캐시: state["gemini_use_cache"]가 있으면 그 값, 없으면 PPT_DECK_USE_CACHE
+    use_cache = PPT_DECK_USE_CACHE if state.get("gemini_use_cache") is None else bool(state["gemini_use_cache"])
+
+    def _generate_chunk(sec_title: str, prompt_for_section: str, idx: int, total: int, chunk_text: str):
+        chunk_header = f"[섹션: {sec_title}] [분할 {idx}/{total}]\n"
+        input_text = chunk_header + chunk_text
+        raw = generate_text(
+            client,
+            model=model,
+            contents=[prompt_for_section, input_text],
+            config=types.GenerateContentConfig(
+                max_output_tokens=int(state.get("gemini_max_output_tokens") or 8192),
+                temperature=float(state.get("gemini_temperature") or 0.4),
+            ),
+            use_cache=use_cache,
+            generate=lambda **kw: generate_content_with_retry(client, max_retries=max_retries, **kw),
+            validate=lambda t: bool(_iter_slide_blocks(t)),
+        ).strip()
+        print("[DEBUG][gemini] raw_len:", len(raw), "section:", repr(sec_title), "chunk:", idx)
+        if not raw:
+            return raw, []
+
+        # order는 조립 단계에서 다시 매긴다
+        slides = _parse_slides_from_text(raw, default_section=sec_title, start_order=0)
+        slides = _repair_slides(slides, client=client, model=model, use_cache=use_cache)
+        if not slides:
+            slides = _fallback_slide_from_raw(raw, default_section=sec_title, order=0)
+            slides = _repair_slides(slides, client=client, model=model, use_cache=use_cache)
+        return raw, slides
+
+    chunk_results: Dict[tuple, Future] = {}
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="section-deck") as executor:
+        for plan_idx, item in enumerate(plan):
+            chunks = item.get("chunks") or []
+            for idx, chunk_text in enumerate(chunks, 1):
+                chunk_results[(plan_idx, idx)] = executor.submit(
+                    _generate_chunk, item["title"], item["prompt"], idx, len(chunks), chunk_text
+                )
+        print(f"[DEBUG][gemini] dispatched {len(chunk_results)} chunk calls (max_workers={max_workers})")
+
+    for plan_idx, item in enumerate(plan):
+        sec_title = item["title"]
+
+        if "fixed_slides" in item:
+            slides = item["fixed_slides"]
+            for i, sl in enumerate(slides, start=order_cursor):
+                sl["order"] = i
+            order_cursor += len(slides)
+            section_decks[sec_title] = {
+                "section": sec_title,
+                "deck_title": deck_title or "발표자료",
+                "slides": slides,
+            }
+            continue
 
-            raw = (getattr(resp, "text", None) or "").strip()
-            print("[DEBUG][gemini] raw_len:", len(raw), "section:", repr(sec_title), "chunk:", idx)
+        section_slides: List[Dict[str, Any]] = []
+        for idx in range(1, len(item["chunks"]) + 1):
+            raw, slides = chunk_results[(plan_idx, idx)].result()
             if not raw:
                 continue
 
             if not deck_title:
                 deck_title = _parse_deck_title(raw).strip()
 
-            slides = _parse_slides_from_text(raw, default_section=sec_title, start_order=order_cursor + len(section_slides))
-            slides = _repair_slides(
-                slides,
-                client=client,
-                model=state.get("gemini_model") or "gemini-2.5-flash",
-            )
-            if not slides:
-                slides = _fallback_slide_from_raw(raw, default_section=sec_title, order=order_cursor + len(section_slides))
-                slides = _repair_slides(
-                    slides,
-                    client=client,
-                    model=state.get("gemini_model") or "gemini-2.5-flash",
-                )
             if slides:
                 section_slides.extend(slides)
 
@@ -7,6 +7,12 @@ import json
 import os
 import re
 
+from utils.llm_cache import cache_setting, generate_text, is_json_response
+
+# 섹션 분류는 JSON 분류기 호출이라 응답 캐시 기본값 on
+# (LLM_CACHE_PPT_SECTION_SPLIT로 변경, 요청별로는 state["gemini_use_cache"]가 우선)
+PPT_SECTION_SPLIT_USE_CACHE = cache_setting("PPT_SECTION_SPLIT", True)
+
 
 SECTION_ORDER = [
     "기관 소개",
@@ -263,8 +269,16 @@ def _gemini_reclassify_ambiguous(
     )
 
     try:
-        resp = client.models.generate_content(model=model, contents=prompt)
-        raw = getattr(resp, "text", "") or ""
+        raw = generate_text(
+            client,
+            model=model,
+            contents=prompt,
+            use_cache=(
+                PPT_SECTION_SPLIT_USE_CACHE if state.get("gemini_use_cache") is None
+                else bool(state["gemini_use_cache"])
+            ),
+            validate=lambda t: is_json_response(_extract_json_block(t)),
+        )
         data = json.loads(_extract_json_block(raw))
         out: Dict[int, str] = {}
 
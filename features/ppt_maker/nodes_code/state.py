@@ -37,6 +37,8 @@ class GraphState(TypedDict, total=False):
     gemini_temperature: float
     gemini_max_output_tokens: int
     gemini_max_retries: int
+    gemini_max_concurrency: int
+    gemini_use_cache: bool
     gemini_image_model: str
 
     # Gamma options/results
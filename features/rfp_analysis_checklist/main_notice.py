@@ -10,11 +10,14 @@ import os
 import json
 import re
 import platform
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
 from dotenv import load_dotenv
 from google import genai
 import mysql.connector
-import chromadb
-from sentence_transformers import SentenceTransformer
+from utils.chroma_client import get_collection, run_with_collection
+from utils.embedding import encode, get_embed_model
+from utils.llm_cache import cache_setting, generate_text, is_json_response
 
 # .env 파일 로드
 load_dotenv()
@@ -23,35 +26,40 @@ load_dotenv()
 # ChromaDB 설정
 # =========================================================
 CHROMA_DB_DIR = os.environ.get("LAW_CHROMA_DB_DIR", r"C:/chroma_law")
+LAW_CHROMA_HOST = os.environ.get("LAW_CHROMA_HOST", "chroma_law")
+LAW_CHROMA_PORT = int(os.environ.get("LAW_CHROMA_PORT", "8000"))
 COLLECTION_NAME = os.environ.get("LAW_COLLECTION_NAME", "law_regulations")
 EMBED_MODEL_NAME = os.environ.get("LAW_EMBED_MODEL_NAME", "intfloat/multilingual-e5-base")
 
+# Step 1 분기(사업보고서/법령 검색/LLM 호출)별 최대 대기 시간
+STEP1_BRANCH_TIMEOUT_SEC = float(os.environ.get("STEP1_BRANCH_TIMEOUT_SEC", "180"))
+
+# 호출부별 LLM 응답 캐시 사용 여부 (LLM_CACHE_ELIGIBILITY / LLM_CACHE_DEEP_ANALYSIS로 변경)
+# 심층 분석은 temperature 0.5 생성형 리포트라 기본값 off
+ELIGIBILITY_USE_CACHE = cache_setting("ELIGIBILITY", True)
+DEEP_ANALYSIS_USE_CACHE = cache_setting("DEEP_ANALYSIS", False)
+
 # 전역 캐시
-_chroma_client = None
-_chroma_collection = None
 _embed_model = None
 # =========================================================
 # ChromaDB 초기화
 # =========================================================
 def init_law_search():
-    """ChromaDB 및 임베딩 모델 초기화 (전역 캐싱)"""
-    global _chroma_client, _chroma_collection, _embed_model
-    
-    if _chroma_collection is not None and _embed_model is not None:
-        return _chroma_collection, _embed_model
-    
-    print("ChromaDB 초기화 중...")
+    """ChromaDB collection(공용 커넥션 풀) 및 임베딩 모델 반환"""
+    global _embed_model
     
-    # ChromaDB 클라이언트
-    _chroma_client = chromadb.HttpClient(host=os.environ.get("LAW_CHROMA_HOST","chroma_law"), port=int(os.environ.get("LAW_CHROMA_PORT","8000")))
-    _chroma_collection = _chroma_client.get_collection(name=COLLECTION_NAME)
+    # ChromaDB collection (utils.chroma_client가 endpoint별로 재사용/재연결)
+    collection = get_collection(LAW_CHROMA_HOST, LAW_CHROMA_PORT, COLLECTION_NAME)
     
-    # 임베딩 모델
-    _embed_model = SentenceTransformer(EMBED_MODEL_NAME)
-    
-    print(f"✓ ChromaDB 로드 완료 (문서 수: {_chroma_collection.count()}개)")
+    if _embed_model is None:
+        print("ChromaDB 초기화 중...")
+        
+        # 임베딩 모델 (프로세스 공용 레지스트리)
+        _embed_model = get_embed_model(EMBED_MODEL_NAME)
+        
+        print(f"✓ ChromaDB 로드 완료 (문서 수: {collection.count()}개)")
     
-    return _chroma_collection, _embed_model
+    return collection, _embed_model
 
 # =========================================================
 # 텍스트에서 법령명 추출
@@ -104,16 +112,21 @@ def search_law_regulations(
             }
         ]
     """
-    collection, model = init_law_search()
-    
-    # 쿼리 임베딩 생성
-    query_embedding = model.encode([f"query: {query_text}"]).tolist()
-    
-    # ChromaDB 검색
-    results = collection.query(
-        query_embeddings=query_embedding,
-        n_results=top_k,
-        include=["metadatas", "documents", "distances"]
+    init_law_search()
+    
+    # 쿼리 임베딩 생성 (같은 법령명은 캐시에서 재사용)
+    query_embedding = encode([query_text], prefix="query: ", model_name=EMBED_MODEL_NAME).tolist()
+    
+    # ChromaDB 검색 (연결 실패 시 재연결 후 1회 재시도)
+    results = run_with_collection(
+        LAW_CHROMA_HOST,
+        LAW_CHROMA_PORT,
+        COLLECTION_NAME,
+        lambda collection: collection.query(
+            query_embeddings=query_embedding,
+            n_results=top_k,
+            include=["metadatas", "documents", "distances"]
+        ),
     )
     
     # 결과 정리
@@ -550,12 +563,38 @@ def analysis_prompt(
 # =========================================================
 # Gemini 호출 - 자격요건 자동 판정
 # =========================================================
+def retrieve_law_articles(announcement_chunks: list[dict]) -> list[dict]:
+    """공고문 전체에서 법령명을 추출해 관련 법령 조항 검색"""
+    print("관련 법령 조항 검색 중...")
+    
+    # 모든 공고문 청크를 합쳐서 법령 검색
+    full_announcement_text = "\n".join([chunk['text'] for chunk in announcement_chunks])
+    
+    # 법령명 추출
+    law_names = extract_law_names(full_announcement_text)
+    print(f"✓ 추출된 법령명: {law_names}")
+    
+    # 법령 조항 검색
+    law_articles = []
+    if law_names:
+        for law_name in law_names[:5]:  # 최대 5개 법령
+            results = search_law_regulations(law_name, top_k=2, score_threshold=0.6)
+            law_articles.extend(results)
+        print(f"✓ 검색된 법령 조항: {len(law_articles)}개")
+    else:
+        print("  법령명을 찾을 수 없어 법령 검색을 건너뜁니다.")
+    
+    return law_articles
+
+
 def eligibility_judgment(
     announcement_chunks: list[dict],
     source: str | None = None,
     model: str = "gemini-2.5-flash",
     temperature: float = 0.2,
     company_id: int | None = None,
+    business_report_sections: list[dict] | None = None,
+    law_articles: list[dict] | None = None,
 ) -> dict:
     """
     공고문 자격요건을 분석하여 자동 판정 결과 반환
@@ -566,6 +605,8 @@ def eligibility_judgment(
         model: Gemini 모델명
         temperature: 생성 온도
         company_id: 기업 ID
+        business_report_sections: 미리 조회한 사업보고서 섹션 (없으면 DB 조회)
+        law_articles: 미리 검색한 법령 조항 (없으면 ChromaDB 검색)
     
     Returns:
         dict: JSON 형식의 자격요건 자동 판정 결과
@@ -574,36 +615,21 @@ def eligibility_judgment(
     if not api_key:
         raise RuntimeError("환경변수 GEMINI_API_KEY가 설정되어 있지 않습니다.")
 
-    # company_id 설정
-    if company_id is None:
-        company_id = get_default_company_id()
+    if business_report_sections is None:
+        # company_id 설정
         if company_id is None:
-            raise RuntimeError("company_id를 찾을 수 없습니다.")
+            company_id = get_default_company_id()
+            if company_id is None:
+                raise RuntimeError("company_id를 찾을 수 없습니다.")
 
-    # DB에서 사업보고서 섹션 JSON 조회
-    print(f"DB에서 사업보고서 조회 중... (company_id: {company_id})")
-    business_report_sections = load_business_report_from_db(company_id)
-    print(f"✓ 사업보고서 로드 완료 (섹션 수: {len(business_report_sections)}개)")
+        # DB에서 사업보고서 섹션 JSON 조회
+        print(f"DB에서 사업보고서 조회 중... (company_id: {company_id})")
+        business_report_sections = load_business_report_from_db(company_id)
+        print(f"✓ 사업보고서 로드 완료 (섹션 수: {len(business_report_sections)}개)")
 
     # ChromaDB에서 관련 법령 조항 검색
-    print("관련 법령 조항 검색 중...")
-    
-    # 모든 공고문 청크를 합쳐서 법령 검색
-    full_announcement_text = "\n".join([chunk['text'] for chunk in announcement_chunks])
-    
-    # 법령명 추출
-    law_names = extract_law_names(full_announcement_text)
-    print(f"✓ 추출된 법령명: {law_names}")
-    
-    # 법령 조항 검색
-    law_articles = []
-    if law_names:
-        for law_name in law_names[:5]:  # 최대 5개 법령
-            results = search_law_regulations(law_name, top_k=2, score_threshold=0.6)
-            law_articles.extend(results)
-        print(f"✓ 검색된 법령 조항: {len(law_articles)}개")
-    else:
-        print("  법령명을 찾을 수 없어 법령 검색을 건너뜁니다.")
+    if law_articles is None:
+        law_articles = retrieve_law_articles(announcement_chunks)
 
     # 프롬프트 생성
     client = genai.Client(api_key=api_key)
@@ -615,16 +641,18 @@ def eligibility_judgment(
     )
 
     print("\n자격요건 자동 판정 중...")
-    response = client.models.generate_content(
+    text = generate_text(
+        client,
         model=model,
         contents=prompt,
         config=genai.types.GenerateContentConfig(
             system_instruction=SYSTEM_INSTRUCTION_ELIGIBILITY,
             temperature=temperature,
         ),
+        use_cache=ELIGIBILITY_USE_CACHE,
+        validate=is_json_response,
     )
 
-    text = response.text
     if not text:
         raise RuntimeError("모델 응답이 비어 있습니다.")
 
@@ -653,8 +681,9 @@ def run_notice_step1(notice_id: int, company_id: int = 1) -> dict:
     Runs Step 1 for a notice:
     - Load notice content from DB
     - Build announcement chunks
-    - Generate eligibility checklist + deep analysis via LLM
+    - Generate eligibility checklist + deep analysis via LLM (concurrently, per-branch timeout)
     - Persist results back to DB (project_notices.checklist_json/analysis_json + checklists table)
+    - If one branch fails, return the other result with an "errors" map and skip the DB write
     """
     from utils.notice_storage import build_announcement_chunks, load_notice_from_db, save_step1_results
 
@@ -671,24 +700,76 @@ def run_notice_step1(notice_id: int, company_id: int = 1) -> dict:
     elif title:
         source = title
 
-    checklist_json = eligibility_judgment(
-        announcement_chunks=announcement_chunks,
-        source=source,
-        company_id=company_id,
-    )
-    analysis_json = deep_analysis(
-        announcement_chunks=announcement_chunks,
-        rfp_chunks=None,
-        source=source,
-    )
+    timeout_sec = STEP1_BRANCH_TIMEOUT_SEC
+    errors: dict[str, str] = {}
 
-    saved = save_step1_results(
-        notice_id=notice_id,
-        checklist_json=checklist_json,
-        analysis_json=analysis_json,
-    )
+    def _submit(fn, *args, **kwargs) -> tuple[Future, float]:
+        # 분기별 deadline은 대기 시작이 아니라 제출 시점 기준
+        return executor.submit(fn, *args, **kwargs), time.monotonic() + timeout_sec
+
+    def _result(name: str, branch: tuple[Future, float], default=None):
+        future, deadline = branch
+        try:
+            return future.result(timeout=max(0.0, deadline - time.monotonic()))
+        except FutureTimeoutError:
+            errors[name] = f"timeout after {timeout_sec:.0f}s"
+        except Exception as e:
+            errors[name] = str(e)
+        print(f"  [Step 1] {name} 실패: {errors[name]}")
+        return default
+
+    # 사업보고서 조회 / 법령 검색 / 심층 분석은 서로 독립 → 동시에 실행,
+    # 자격요건 판정은 앞의 두 결과가 준비되면 바로 시작한다.
+    executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="step1")
+    try:
+        report_branch = _submit(load_business_report_from_db, company_id)
+        law_branch = _submit(retrieve_law_articles, announcement_chunks)
+        analysis_branch = _submit(
+            deep_analysis,
+            announcement_chunks=announcement_chunks,
+            rfp_chunks=None,
+            source=source,
+        )
+
+        business_report_sections = _result("business_report", report_branch)
+        # 법령 검색이 실패해도 법령 없이 판정은 진행
+        law_articles = _result("law_articles", law_branch, default=[])
+
+        checklist_json = None
+        if business_report_sections is not None:
+            eligibility_branch = _submit(
+                eligibility_judgment,
+                announcement_chunks=announcement_chunks,
+                source=source,
+                company_id=company_id,
+                business_report_sections=business_report_sections,
+                law_articles=law_articles,
+            )
+            checklist_json = _result("eligibility", eligibility_branch)
+        else:
+            errors["eligibility"] = "skipped: business report unavailable"
+
+        analysis_json = _result("analysis", analysis_branch)
+    finally:
+        # 시간 초과된 분기를 기다리지 않고 반환한다 (해당 스레드는 백그라운드에서 종료됨)
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    if checklist_json is None and analysis_json is None:
+        raise RuntimeError(f"Step 1 failed: {errors}")
+
+    # 한쪽만 성공하면 기존 DB 결과를 null로 덮어쓰지 않도록 저장은 건너뛴다.
+    saved = None
+    if checklist_json is not None and analysis_json is not None:
+        saved = save_step1_results(
+            notice_id=notice_id,
+            checklist_json=checklist_json,
+            analysis_json=analysis_json,
+        )
 
-    return {"checklist": checklist_json, "analysis": analysis_json, "saved": saved}
+    result = {"checklist": checklist_json, "analysis": analysis_json, "saved": saved}
+    if errors:
+        result["errors"] = errors
+    return result
 
 # =========================================================
 # Gemini 호출 - 심층 분석
@@ -721,16 +802,18 @@ def deep_analysis(
     prompt = analysis_prompt(announcement_chunks, rfp_chunks, source)
     
     print("공고문 심층 분석 중...")
-    response = client.models.generate_content(
+    text = generate_text(
+        client,
         model=model,
         contents=prompt,
         config=genai.types.GenerateContentConfig(
             system_instruction=SYSTEM_INSTRUCTION_ANALYSIS,
             temperature=temperature,
         ),
+        use_cache=DEEP_ANALYSIS_USE_CACHE,
+        validate=is_json_response,
     )
     
-    text = response.text
     if not text:
         raise RuntimeError("모델 응답이 비어 있습니다.")
     
@@ -15,7 +15,8 @@ from dotenv import load_dotenv
 from google import genai
 import mysql.connector
 import chromadb
-from sentence_transformers import SentenceTransformer
+from utils.embedding import encode, get_embed_model
+from utils.llm_cache import cache_setting, generate_text, is_json_response
 
 # .env 파일 로드
 load_dotenv()
@@ -27,6 +28,12 @@ CHROMA_DB_DIR = os.environ.get("LAW_CHROMA_DB_DIR", r"C:/chroma_law")
 COLLECTION_NAME = os.environ.get("LAW_COLLECTION_NAME", "law_regulations")
 EMBED_MODEL_NAME = os.environ.get("LAW_EMBED_MODEL_NAME", "intfloat/multilingual-e5-base")
 
+# 호출부별 LLM 응답 캐시 사용 여부 (LLM_CACHE_ELIGIBILITY / LLM_CACHE_DEEP_ANALYSIS / LLM_CACHE_ORG_PROFILE로 변경)
+# 심층 분석은 temperature 0.5 생성형 리포트라 기본값 off
+ELIGIBILITY_USE_CACHE = cache_setting("ELIGIBILITY", True)
+DEEP_ANALYSIS_USE_CACHE = cache_setting("DEEP_ANALYSIS", False)
+ORG_PROFILE_USE_CACHE = cache_setting("ORG_PROFILE", True)
+
 # 전역 캐시
 _chroma_client = None
 _chroma_collection = None
@@ -47,8 +54,8 @@ def init_law_search():
     _chroma_client = chromadb.PersistentClient(path=CHROMA_DB_DIR)
     _chroma_collection = _chroma_client.get_collection(name=COLLECTION_NAME)
     
-    # 임베딩 모델
-    _embed_model = SentenceTransformer(EMBED_MODEL_NAME)
+    # 임베딩 모델 (프로세스 공용 레지스트리)
+    _embed_model = get_embed_model(EMBED_MODEL_NAME)
     
     print(f"✓ ChromaDB 로드 완료 (문서 수: {_chroma_collection.count()}개)")
     
@@ -105,10 +112,10 @@ def search_law_regulations(
             }
         ]
     """
-    collection, model = init_law_search()
+    collection, _ = init_law_search()
     
-    # 쿼리 임베딩 생성
-    query_embedding = model.encode([f"query: {query_text}"]).tolist()
+    # 쿼리 임베딩 생성 (같은 법령명은 캐시에서 재사용)
+    query_embedding = encode([query_text], prefix="query: ", model_name=EMBED_MODEL_NAME).tolist()
     
     # ChromaDB 검색
     results = collection.query(
@@ -633,16 +640,18 @@ def eligibility_judgment(
     )
 
     print("\n자격요건 자동 판정 중...")
-    response = client.models.generate_content(
+    text = generate_text(
+        client,
         model=model,
         contents=prompt,
         config=genai.types.GenerateContentConfig(
             system_instruction=SYSTEM_INSTRUCTION_ELIGIBILITY,
             temperature=temperature,
         ),
+        use_cache=ELIGIBILITY_USE_CACHE,
+        validate=is_json_response,
     )
 
-    text = response.text
     if not text:
         raise RuntimeError("모델 응답이 비어 있습니다.")
 
@@ -693,16 +702,18 @@ def deep_analysis(
     prompt = analysis_prompt(announcement_chunks, rfp_chunks, source)
     
     print("공고문 심층 분석 중...")
-    response = client.models.generate_content(
+    text = generate_text(
+        client,
         model=model,
         contents=prompt,
         config=genai.types.GenerateContentConfig(
             system_instruction=SYSTEM_INSTRUCTION_ANALYSIS,
             temperature=temperature,
         ),
+        use_cache=DEEP_ANALYSIS_USE_CACHE,
+        validate=is_json_response,
     )
     
-    text = response.text
     if not text:
         raise RuntimeError("모델 응답이 비어 있습니다.")
     
@@ -824,16 +835,20 @@ def extract_org_profile(company_id: int, model: str = "gemini-2.5-flash", temper
     prompt = org_profile_prompt(company_profile)
 
     client = genai.Client(api_key=api_key)
-    response = client.models.generate_content(
+    text = generate_text(
+        client,
         model=model,
         contents=prompt,
         config=genai.types.GenerateContentConfig(
             system_instruction=SYSTEM_INSTRUCTION_ORG_PROFILE,
             temperature=temperature,
         ),
+        use_cache=ORG_PROFILE_USE_CACHE,
+        validate=is_json_response,
     )
 
-    text = (response.text or "").strip()
+    raw_text = text
+    text = (text or "").strip()
     if not text:
         raise RuntimeError("기관소개 추출 응답이 비어있습니다.")
 
@@ -847,4 +862,4 @@ def extract_org_profile(company_id: int, model: str = "gemini-2.5-flash", temper
     try:
         return json.loads(text.strip())
     except json.JSONDecodeError as e:
-        raise RuntimeError(f"기관소개 JSON 파싱 실패: {e}\n응답 내용:\n{response.text}")
+        raise RuntimeError(f"기관소개 JSON 파싱 실패: {e}\n응답 내용:\n{raw_text}")
@@ -9,6 +9,6 @@ R&D 과제 유사도 검색 및 분석 기능을 제공합니다.
 """
 
 from .search_llm import summarize_report
-from .main_search import main
+from .main_search import main, main_batch
 
-__all__ = ['summarize_report', 'main']
+__all__ = ['summarize_report', 'main', 'main_batch']
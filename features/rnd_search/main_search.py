@@ -2,6 +2,7 @@
 import os
 import json
 import sys
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 # 경로 설정
 current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -11,7 +12,8 @@ if root_dir not in sys.path:
     sys.path.append(root_dir)
 
 from utils.db_lookup import get_notice_info_by_id
-from utils.vector_db import search_two_tracks
+from utils.embedding import encode
+from utils.vector_db import EMBED_MODEL_NAME, QUERY_MAX_CHARS, search_two_tracks
 from .search_llm import summarize_report
 
 # 저장 경로
@@ -20,18 +22,14 @@ REPORT_FILE = os.path.join(DATA_DIR, "report", "combined_report.json")
 os.makedirs(os.path.dirname(REPORT_FILE), exist_ok=True)
 
 
-def main(notice_id=None, notice_text=None, ministry_name=None):
+def _build_query(notice_id=None, notice_text=None, ministry_name=None):
     """
-    유관 RFP 검색 메인 함수
+    검색 쿼리 구성
 
-    Args:
-        notice_id: 공고 ID (부처명/제목 보정용, 선택적)
-        notice_text: 파싱된 공고문 텍스트 (선택적이지만 있으면 우선)
-        ministry_name: Spring이 이미 알고 있는 소관 부처명(선택적)
+    Returns:
+        (notice_title, notice_ministry, query_text, error)
+        error가 None이 아니면 검색을 진행하지 않고 그대로 반환한다.
     """
-    print("=" * 60)
-    print(f"[Step 2] 유관 RFP 검색 (ID: {notice_id})")
-
     # 1) 기본값
     notice_title = "업로드된 공고문"
     notice_ministry = (ministry_name or "").strip()
@@ -40,7 +38,7 @@ def main(notice_id=None, notice_text=None, ministry_name=None):
     # 2) notice_text 우선으로 검색 쿼리 구성 (ministry_name 여부랑 무관하게)
     if notice_text and str(notice_text).strip():
         print("  📄 파일에서 파싱한 텍스트 사용")
-        query_text = str(notice_text).strip()[:2000]
+        query_text = str(notice_text).strip()[:QUERY_MAX_CHARS]
 
         # notice_id 있으면 제목만이라도 보정 (있으면 더 좋음)
         if notice_id:
@@ -58,27 +56,34 @@ def main(notice_id=None, notice_text=None, ministry_name=None):
         print("  📋 MySQL에서 공고 정보 조회(텍스트 없음 fallback)")
         if not notice_id:
             print("  ❌ notice_id 없음")
-            return {"error": "notice_id 또는 notice_text가 필요합니다."}
+            return notice_title, notice_ministry, query_text, {"error": "notice_id 또는 notice_text가 필요합니다."}
 
         info = get_notice_info_by_id(notice_id)
         if not info:
             print("  ❌ 공고 정보 조회 실패")
-            return {"error": "공고 정보를 찾을 수 없습니다."}
+            return notice_title, notice_ministry, query_text, {"error": "공고 정보를 찾을 수 없습니다."}
 
         notice_title = info.get("title", notice_title)
         if not notice_ministry:
             notice_ministry = info.get("author", "") or ""
 
         notice_summary = info.get("title", "")
-        query_text = f"{notice_title} {notice_summary}".strip()[:2000]
+        query_text = f"{notice_title} {notice_summary}".strip()[:QUERY_MAX_CHARS]
 
         print(f"  ✅ 제목: {notice_title[:40]}...")
         print(f"  ✅ 부처: {notice_ministry}")
 
     if not query_text.strip():
         # 이 케이스가 나오면 upstream에서 notice_text를 못 만들었다는 뜻
-        return {"error": "검색용 query_text가 비어있습니다. notice_text 생성/파싱을 확인하세요."}
+        return notice_title, notice_ministry, query_text, {
+            "error": "검색용 query_text가 비어있습니다. notice_text 생성/파싱을 확인하세요."
+        }
 
+    return notice_title, notice_ministry, query_text, None
+
+
+def _search_and_summarize(notice_title, notice_ministry, query_text, query_embedding=None):
+    """벡터 DB 2-Track 검색 + LLM 분석 (query_embedding이 있으면 재인코딩하지 않음)"""
     print(f"  🔍 검색 쿼리: {query_text[:50]}...")
     print(f"  🏛️ 소관 부처: {notice_ministry if notice_ministry else '없음 (전체 검색)'}")
 
@@ -89,7 +94,8 @@ def main(notice_id=None, notice_text=None, ministry_name=None):
             ministry_name=notice_ministry,
             top_k_a=10,
             top_k_b=10,
-            score_threshold=72.9
+            score_threshold=72.9,
+            query_embedding=query_embedding,
         )
 
         track_a = search_results.get("track_a", [])
@@ -104,7 +110,7 @@ def main(notice_id=None, notice_text=None, ministry_name=None):
 
     # 5) LLM 분석
     print("  🤖 [AI] 전략계획서 본문 기반 심층 분석 중...")
-    report_json = summarize_report(
+    return summarize_report(
         new_project_info={
             "project_name": notice_title,
             "summary": query_text[:500]
@@ -113,6 +119,25 @@ def main(notice_id=None, notice_text=None, ministry_name=None):
         track_b=track_b
     )
 
+
+def main(notice_id=None, notice_text=None, ministry_name=None):
+    """
+    유관 RFP 검색 메인 함수
+
+    Args:
+        notice_id: 공고 ID (부처명/제목 보정용, 선택적)
+        notice_text: 파싱된 공고문 텍스트 (선택적이지만 있으면 우선)
+        ministry_name: Spring이 이미 알고 있는 소관 부처명(선택적)
+    """
+    print("=" * 60)
+    print(f"[Step 2] 유관 RFP 검색 (ID: {notice_id})")
+
+    notice_title, notice_ministry, query_text, error = _build_query(notice_id, notice_text, ministry_name)
+    if error:
+        return error
+
+    report_json = _search_and_summarize(notice_title, notice_ministry, query_text)
+
     # 6) 저장
     try:
         with open(REPORT_FILE, "w", encoding="utf-8") as f:
@@ -124,5 +149,59 @@ def main(notice_id=None, notice_text=None, ministry_name=None):
     return report_json
 
 
+def main_batch(notices, max_workers=None):
+    """
+    여러 공고를 한 번에 검색하는 제너레이터 (야간 재채점 등)
+
+    - 모든 검색 쿼리를 model.encode 한 번으로 임베딩
+    - 공고별 Chroma 검색 + LLM 분석은 스레드 풀에서 동시에 실행
+    - 끝나는 순서대로 {"index", "notice_id", "status", "data"|"message"}를 yield
+
+    Args:
+        notices: [{"notice_id": ..., "notice_text": ..., "ministry_name": ...}, ...]
+        max_workers: 동시 실행 수 (기본값이자 상한: STEP2_BATCH_WORKERS 환경변수, 4)
+    """
+    # 요청 값은 STEP2_BATCH_WORKERS 이하로만 줄일 수 있다 (스레드마다 Chroma + Gemini 호출)
+    limit = max(1, int(os.getenv("STEP2_BATCH_WORKERS", "4")))
+    max_workers = max(1, min(int(max_workers or limit), limit))
+    print("=" * 60)
+    print(f"[Step 2] 유관 RFP 일괄 검색 ({len(notices)}건, workers={max_workers})")
+
+    prepared = []
+    for index, notice in enumerate(notices):
+        notice_id = notice.get("notice_id")
+        try:
+            notice_title, notice_ministry, query_text, error = _build_query(
+                notice_id, notice.get("notice_text"), notice.get("ministry_name")
+            )
+        except Exception as e:
+            error = {"error": str(e)}
+        if error:
+            yield {"index": index, "notice_id": notice_id, "status": "error", "message": error["error"]}
+            continue
+        prepared.append((index, notice_id, notice_title, notice_ministry, query_text))
+
+    if not prepared:
+        return
+
+    # 검색 쿼리 임베딩은 한 번의 배치로
+    embeddings = encode(
+        [query_text for *_, query_text in prepared], prefix="query: ", model_name=EMBED_MODEL_NAME
+    ).tolist()
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            executor.submit(_search_and_summarize, title, ministry, query_text, embedding): (index, notice_id)
+            for (index, notice_id, title, ministry, query_text), embedding in zip(prepared, embeddings)
+        }
+        for future in as_completed(futures):
+            index, notice_id = futures[future]
+            try:
+                yield {"index": index, "notice_id": notice_id, "status": "success", "data": future.result()}
+            except Exception as e:
+                print(f"  ❌ [오류] notice_id={notice_id} 분석 실패: {e}")
+                yield {"index": index, "notice_id": notice_id, "status": "error", "message": str(e)}
+
+
 if __name__ == "__main__":
     main(notice_id=1)
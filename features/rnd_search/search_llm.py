@@ -5,10 +5,14 @@ from dotenv import load_dotenv
 from google import genai
 from google.genai import types
 
+from utils.llm_cache import cache_setting, generate_text, is_json_response
+
 load_dotenv()
 
 # [설정] 2.0-flash 모델 사용 (가장 안정적)
 GEMINI_MODEL_NAME = "gemini-2.5-flash" 
+# 유사 과제 비교 요약 응답 캐시 사용 여부 (LLM_CACHE_SEARCH_SUMMARY로 변경)
+SEARCH_SUMMARY_USE_CACHE = cache_setting("SEARCH_SUMMARY", True)
 
 SYSTEM_INSTRUCTION_SEARCH = """
 당신은 국가 R&D 전략기획 전문가입니다.
@@ -105,16 +109,19 @@ def summarize_report(new_project_info: dict, track_a: list, track_b: list) -> di
     """
 
     try:
-        response = client.models.generate_content(
+        text = generate_text(
+            client,
             model=GEMINI_MODEL_NAME,
             contents=prompt,
             config=types.GenerateContentConfig(
                 system_instruction=SYSTEM_INSTRUCTION_SEARCH,
                 response_mime_type="application/json",
                 temperature=0.3
-            )
+            ),
+            use_cache=SEARCH_SUMMARY_USE_CACHE,
+            validate=is_json_response,
         )
-        return json.loads(response.text)
+        return json.loads(text)
 
     except Exception as e:
         print(f"[LLM Error] {str(e)}")
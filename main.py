@@ -1,20 +1,27 @@
 # main.py (정리된 버전)
 import os
+import json
 import uuid
+import asyncio
+import threading
 import requests
-import chromadb
 from fastapi import FastAPI, UploadFile, File, Form, HTTPException
-from fastapi.responses import JSONResponse, FileResponse
+from fastapi.responses import JSONResponse, FileResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel
 from dotenv import load_dotenv
 
-from features.rnd_search.main_search import main as run_search
+from features.rnd_search.main_search import main as run_search, main_batch as run_search_batch
 from features.ppt_script.main_script import main as run_script_gen
 
 load_dotenv()
 
-from utils.document_parsing import parse_docx_to_blocks, extract_text_from_pdf
+from utils.document_parsing import parse_docx_to_blocks, shutdown_pdf_pool
+from utils.parser_engine import available_backends, iter_pages, parse_document
+from utils.chroma_client import get_client as get_chroma_client, run_with_collection
+from utils.jobs import job_manager
+from utils.bounded_executor import ExecutorSaturated, parse_executor, pipeline_executor
 
 app = FastAPI()
 
@@ -24,10 +31,25 @@ app = FastAPI()
 CHROMA_HOST = os.getenv('CHROMA_HOST', 'localhost')
 CHROMA_PORT = int(os.getenv('CHROMA_PORT', 8001))
 
-chroma_client = chromadb.HttpClient(
-    host=CHROMA_HOST,
-    port=CHROMA_PORT
-)
+def chroma_client():
+    """공용 커넥션 풀에서 HttpClient 반환 (keep-alive 재사용, 실패 시 재연결)"""
+    return get_chroma_client(CHROMA_HOST, CHROMA_PORT)
+
+# ============================================
+# 임베딩 모델 warm-up (워커 프로세스당 1회)
+# ============================================
+@app.on_event("startup")
+def warmup_embed_models():
+    if os.getenv("EMBED_WARMUP", "true").lower() not in {"1", "true", "yes", "y"}:
+        return
+    from utils.embedding import warmup
+    from utils.vector_db import EMBED_MODEL_NAME
+
+    law_model_name = os.getenv("LAW_EMBED_MODEL_NAME", "intfloat/multilingual-e5-base")
+    try:
+        warmup(*dict.fromkeys([EMBED_MODEL_NAME, law_model_name]))
+    except Exception as e:
+        print(f"[Warmup] embed model warm-up failed: {e}")
 
 # ============================================
 # CORS 설정
@@ -40,13 +62,81 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# ============================================
+# 업로드 파일 저장 (메모리에 통째로 올리지 않고 청크 단위 복사)
+# ============================================
+# /parse/formats 에 안내하는 업로드 최대 크기
+MAX_UPLOAD_MB = int(os.getenv("MAX_UPLOAD_MB", "50"))
+MAX_UPLOAD_BYTES = MAX_UPLOAD_MB * 1024 * 1024
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+
+class UploadTooLarge(Exception):
+    def __init__(self, max_bytes: int):
+        super().__init__(f"File too large: max {max_bytes // (1024 * 1024)}MB")
+
+
+def _copy_upload(src, dest_path: str, max_bytes: int) -> int:
+    """UploadFile.file(SpooledTemporaryFile) → dest_path 청크 복사. 한도를 넘는 순간 중단하고 파일을 지운다."""
+    size = 0
+    src.seek(0)
+    try:
+        with open(dest_path, "wb") as out:
+            while True:
+                chunk = src.read(UPLOAD_CHUNK_SIZE)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if max_bytes and size > max_bytes:
+                    raise UploadTooLarge(max_bytes)
+                out.write(chunk)
+    except BaseException:
+        if os.path.exists(dest_path):
+            os.remove(dest_path)
+        raise
+    return size
+
+
+async def save_upload(file: UploadFile, dest_path: str, max_bytes: int = MAX_UPLOAD_BYTES) -> int:
+    """업로드를 dest_path에 저장하고 byte 수를 반환 (파일 I/O는 스레드풀에서 실행)."""
+    size = getattr(file, "size", None)
+    if max_bytes and size is not None and size > max_bytes:
+        raise UploadTooLarge(max_bytes)
+    return await run_in_threadpool(_copy_upload, file.file, dest_path, max_bytes)
+
+
+def _busy_response(e: ExecutorSaturated, content: dict) -> JSONResponse:
+    # 작업 풀이 꽉 찼을 때: 클라이언트가 Retry-After 후 재시도하도록 429
+    return JSONResponse(status_code=429, content=content, headers={"Retry-After": str(e.retry_after)})
+
+
+class _StreamingWithCleanup(StreamingResponse):
+    """응답이 어떻게 끝나든(정상 종료/클라이언트 끊김/취소) on_close를 호출하는 StreamingResponse. on_close는 막히지 않아야 한다."""
+
+    def __init__(self, content, *, on_close, **kwargs):
+        super().__init__(content, **kwargs)
+        self._on_close = on_close
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            self._on_close()
+
+
+@app.on_event("shutdown")
+def stop_executors():
+    parse_executor.shutdown()
+    pipeline_executor.shutdown()
+    shutdown_pdf_pool(wait=False)
+
 # ============================================
 # ChromaDB 관련 엔드포인트
 # ============================================
 @app.post("/api/chroma/collection/create")
 def create_collection(name: str):
     try:
-        chroma_client.create_collection(name=name)
+        chroma_client().create_collection(name=name)
         return {"status": "success", "collection": name}
     except Exception as e:
         return {"status": "error", "message": str(e)}
@@ -54,7 +144,7 @@ def create_collection(name: str):
 @app.get("/api/chroma/collections")
 def list_collections():
     try:
-        collections = chroma_client.list_collections()
+        collections = chroma_client().list_collections()
         return {"collections": [col.name for col in collections]}
     except Exception as e:
         return {"status": "error", "message": str(e)}
@@ -62,8 +152,10 @@ def list_collections():
 @app.post("/api/chroma/search")
 def search_documents(collection_name: str, query: str, n_results: int = 5):
     try:
-        collection = chroma_client.get_collection(name=collection_name)
-        results = collection.query(query_texts=[query], n_results=n_results)
+        results = run_with_collection(
+            CHROMA_HOST, CHROMA_PORT, collection_name,
+            lambda collection: collection.query(query_texts=[query], n_results=n_results),
+        )
         return {"status": "success", "results": results}
     except Exception as e:
         return {"status": "error", "message": str(e)}
@@ -76,8 +168,11 @@ def add_documents(
     ids: list[str] = None
 ):
     try:
-        collection = chroma_client.get_collection(name=collection_name)
-        collection.add(documents=documents, metadatas=metadatas, ids=ids)
+        run_with_collection(
+            CHROMA_HOST, CHROMA_PORT, collection_name,
+            lambda collection: collection.add(documents=documents, metadatas=metadatas, ids=ids),
+            retry=False,  # add는 멱등이 아님 (timeout 후 재시도하면 중복 id 오류/이중 적재)
+        )
         return {"status": "success", "added": len(documents)}
     except Exception as e:
         return {"status": "error", "message": str(e)}
@@ -85,35 +180,46 @@ def add_documents(
 # ============================================
 # 파일 파싱 (DB 저장은 Spring에서)
 # ============================================
+# 이 크기 이상의 PDF는 페이지 구간을 프로세스 풀에 나눠 파싱
+PARSE_PARALLEL_MIN_BYTES = int(os.getenv("PARSE_PARALLEL_MIN_BYTES", str(2 * 1024 * 1024)))
+PARSE_PDF_WORKERS = int(os.getenv("PARSE_PDF_WORKERS", str(min(4, os.cpu_count() or 1))))
+
 @app.post("/parse")
-async def parse_notice(file: UploadFile = File(...)):
-    print(f"PARSE CALLED: {file.filename}")
+async def parse_notice(file: UploadFile = File(...), backend: str | None = None, max_chars: int | None = None):
+    """
+    backend: 생략 시 pdfplumber(표/이미지 포함), "fast"면 text-only backend (GET /parse/formats 참고)
+    max_chars: 누적 글자 수가 이만큼 되면 나머지 페이지는 읽지 않음
+               (Step 2 검색 쿼리용 notice_text는 backend=fast&max_chars=2000 이면 충분)
+    """
+    print(f"PARSE CALLED: {file.filename} (backend={backend or 'default'})")
 
     os.makedirs("tmp", exist_ok=True)
     ext = os.path.splitext(file.filename)[1].lower()
     tmp_path = os.path.join("tmp", f"{uuid.uuid4().hex}{ext}")
 
     try:
-        content = await file.read()
-        with open(tmp_path, "wb") as f:
-            f.write(content)
-
-        if ext == ".pdf":
-            result = {
-                "file_type": "pdf",
-                "pages": extract_text_from_pdf(tmp_path)
-            }
-        elif ext == ".docx":
-            result = {
-                "file_type": "docx",
-                "content": parse_docx_to_blocks(tmp_path, "tmp")
-            }
-        else:
+        if ext not in (".pdf", ".docx"):
             return JSONResponse(status_code=400, content={"error": f"Unsupported extension: {ext}"})
 
+        size = await save_upload(file, tmp_path)
+        workers = PARSE_PDF_WORKERS if size >= PARSE_PARALLEL_MIN_BYTES else None
+        try:
+            # 파싱은 CPU 작업이라 이벤트 루프 밖(parse 전용 bounded 풀)에서 실행
+            result = await parse_executor.run(
+                parse_document, tmp_path, backend=backend, out_dir="tmp", workers=workers, max_chars=max_chars
+            )
+        except ValueError as e:
+            return JSONResponse(status_code=400, content={"error": str(e)})
+
         print(f"PARSE SUCCESS: {file.filename}")
         return JSONResponse(content=result, status_code=200)
 
+    except UploadTooLarge as e:
+        return JSONResponse(status_code=413, content={"error": str(e)})
+
+    except ExecutorSaturated as e:
+        return _busy_response(e, {"error": str(e)})
+
     except Exception as e:
         print(f"❌ PARSE FAILED: {file.filename} - {str(e)}")
         return JSONResponse(status_code=500, content={"error": str(e)})
@@ -122,6 +228,91 @@ async def parse_notice(file: UploadFile = File(...)):
         if os.path.exists(tmp_path):
             os.remove(tmp_path)
 
+@app.post("/parse/stream")
+async def parse_notice_stream(file: UploadFile = File(...), backend: str | None = None):
+    """
+    PDF를 페이지 단위로 파싱하면서 NDJSON 한 줄씩 바로 내려준다.
+    {"type": "meta"} → {"type": "page", ...} × N → {"type": "done"} (실패 시 {"type": "error"})
+    DOCX는 페이지 개념이 없으므로 {"type": "content"} 한 줄로 보낸다.
+    """
+    print(f"PARSE STREAM CALLED: {file.filename}")
+
+    os.makedirs("tmp", exist_ok=True)
+    ext = os.path.splitext(file.filename)[1].lower()
+    if ext not in (".pdf", ".docx"):
+        return JSONResponse(status_code=400, content={"error": f"Unsupported extension: {ext}"})
+
+    # 스트리밍 동안 parse 풀의 slot 1개를 차지 (응답이 끝나거나 끊기면 _cleanup에서 반납)
+    try:
+        parse_executor.reserve()
+    except ExecutorSaturated as e:
+        return _busy_response(e, {"error": str(e)})
+
+    tmp_path = os.path.join("tmp", f"{uuid.uuid4().hex}{ext}")
+    try:
+        await save_upload(file, tmp_path)
+    except BaseException as e:
+        parse_executor.release()
+        if isinstance(e, UploadTooLarge):
+            return JSONResponse(status_code=413, content={"error": str(e)})
+        raise
+
+    # 페이지 파싱 단계와 정리가 겹치지 않도록 같은 잠금을 쓴다 (정리는 진행 중인 단계가 끝난 뒤 실행)
+    lock = threading.Lock()
+    state = {"pages": None, "closed": False}
+
+    def _step(fn):
+        # parse 풀 스레드에서 실행. 이미 정리됐으면 None
+        with lock:
+            return None if state["closed"] else fn()
+
+    def _next_page():
+        if state["pages"] is None:
+            state["pages"] = iter_pages(tmp_path, backend=backend)
+        return next(state["pages"], None)
+
+    def _cleanup():
+        with lock:
+            if state["closed"]:
+                return
+            state["closed"] = True
+            if state["pages"] is not None:
+                state["pages"].close()
+            parse_executor.release()
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    async def _run_step(fn):
+        return await asyncio.wrap_future(parse_executor.submit_reserved(_step, fn))
+
+    def _line(obj):
+        return json.dumps(obj, ensure_ascii=False) + "\n"
+
+    async def _stream():
+        try:
+            yield _line({"type": "meta", "file_type": ext.lstrip("."), "source": file.filename})
+            if ext == ".pdf":
+                pages = 0
+                while (page := await _run_step(_next_page)) is not None:
+                    pages += 1
+                    yield _line({"type": "page", **page})
+                yield _line({"type": "done", "pages": pages})
+            else:
+                # 이미지는 파일로 저장하지 않고 위치(path_in_docx)만 남김 (tmp/media_* 디렉터리가 쌓이지 않도록)
+                content = await _run_step(lambda: parse_docx_to_blocks(tmp_path, "tmp", images="lazy"))
+                yield _line({"type": "content", "content": content})
+                yield _line({"type": "done"})
+            print(f"PARSE STREAM SUCCESS: {file.filename}")
+        except Exception as e:
+            print(f"❌ PARSE STREAM FAILED: {file.filename} - {str(e)}")
+            yield _line({"type": "error", "error": str(e)})
+
+    # 페이지 파싱은 parse 풀에서 한 장씩 실행. slot/임시 파일 정리는 generator 시작 여부와 무관하게
+    # 응답 종료(정상/끊김/취소) 시 parse 풀에 넘긴다 (진행 중인 단계가 끝난 뒤 실행되므로 기다리지 않음)
+    return _StreamingWithCleanup(
+        _stream(), media_type="application/x-ndjson", on_close=lambda: parse_executor.submit_reserved(_cleanup)
+    )
+
 # ============================================
 # 헬스체크
 # ============================================
@@ -129,12 +320,31 @@ async def parse_notice(file: UploadFile = File(...)):
 def health_check():
     return {"status": "ok", "message": "FastAPI is running"}
 
+@app.get("/health/embedding")
+def embedding_status():
+    from utils.embedding import get_embed_cache, loaded_models
+    return {"models": loaded_models(), "cache": get_embed_cache().stats()}
+
+@app.get("/health/llm-cache")
+def llm_cache_status():
+    from utils.llm_cache import get_llm_cache
+    return get_llm_cache().stats()
+
+@app.get("/health/executors")
+def executors_status():
+    return {"parse": parse_executor.stats(), "pipeline": pipeline_executor.stats()}
+
+@app.get("/health/parse-cache")
+def parse_cache_status():
+    from utils.parse_cache import get_parse_cache
+    return get_parse_cache().stats()
+
 # ============================================
 # 파싱 지원 형식 조회
 # ============================================
 @app.get("/parse/formats")
 def supported_formats():
-    return {"supported_formats": [".pdf", ".docx"], "max_file_size_mb": 50}
+    return {"supported_formats": [".pdf", ".docx"], "max_file_size_mb": MAX_UPLOAD_MB, "backends": available_backends()}
 
 # ============================================
 # Step 1: RFP 분석 체크리스트
@@ -178,6 +388,33 @@ def api_run_step2(req: Step2Request):
         print(traceback.format_exc())
         return JSONResponse(status_code=500, content={"status": "error", "message": str(e)})
 
+class Step2BatchRequest(BaseModel):
+    notices: list[Step2Request]
+    # 동시 실행 수 (STEP2_BATCH_WORKERS를 넘는 값은 STEP2_BATCH_WORKERS로 제한됨)
+    max_workers: int | None = None
+
+@app.post("/api/analyze/step2/batch")
+def api_run_step2_batch(req: Step2BatchRequest):
+    """공고 N건 일괄 검색. 공고별 결과를 끝나는 순서대로 NDJSON 한 줄씩 스트리밍."""
+    print(f"[Step 2] 유관 RFP 일괄 검색 요청: {len(req.notices)}건")
+
+    notices = [
+        {"notice_id": n.notice_id, "notice_text": n.notice_text, "ministry_name": n.ministry_name}
+        for n in req.notices
+    ]
+
+    def _stream():
+        try:
+            for item in run_search_batch(notices, max_workers=req.max_workers):
+                yield json.dumps(item, ensure_ascii=False) + "\n"
+        except Exception as e:
+            import traceback
+            print(traceback.format_exc())
+            yield json.dumps({"status": "error", "message": str(e)}, ensure_ascii=False) + "\n"
+
+    # sync generator라 Starlette가 스레드풀에서 돌리므로 공고별 검색/LLM 결과 대기가 이벤트 루프를 막지 않는다
+    return StreamingResponse(_stream(), media_type="application/x-ndjson")
+
 # ============================================
 # ✅ 다운로드: output 폴더의 pptx 직접 내려주기
 # ============================================
@@ -206,6 +443,66 @@ def download_pptx(filename: str):
 # ============================================
 # Step 3: PPT 생성 (전체 워크플로우)
 # ============================================
+def _run_step3_pipeline(tmp_path: str, notice_id, on_progress=None) -> dict:
+    """run_ppt_generation 실행 후 API 응답용 결과(dict) 구성"""
+    from features.ppt_maker.main_ppt import run_ppt_generation
+
+    render_mode = (os.getenv("PPT_RENDER_MODE", "gamma") or "gamma").strip().lower()
+    gamma_timeout_sec = int(os.getenv("PPT_GAMMA_TIMEOUT_SEC", "900"))
+
+    final_state = run_ppt_generation(
+        source_path=tmp_path,
+        notice_id=str(notice_id or ""),
+        output_dir="output",
+        render_mode=render_mode,
+        gamma_timeout_sec=gamma_timeout_sec,
+        on_progress=on_progress,
+    )
+    if not isinstance(final_state, dict) or not final_state:
+        raise RuntimeError("run_ppt_generation returned empty result")
+
+    deck_json = final_state.get("deck_json") or {}
+    slides = deck_json.get("slides") if isinstance(deck_json, dict) else []
+    total_slides = len(slides) if isinstance(slides, list) else 0
+    if total_slides == 0:
+        try:
+            total_slides = int(final_state.get("total_slides") or 0)
+        except Exception:
+            total_slides = 0
+
+    deck_title = ""
+    if isinstance(deck_json, dict):
+        deck_title = str(deck_json.get("deck_title") or "").strip()
+    if not deck_title:
+        deck_title = str(final_state.get("deck_title") or "").strip()
+
+    def _pick_first_non_empty(*values):
+        for value in values:
+            if isinstance(value, str) and value.strip():
+                return value.strip()
+        return ""
+
+    pptx_path = _pick_first_non_empty(
+        final_state.get("final_ppt_path"),
+        final_state.get("gamma_ppt_path"),
+        final_state.get("pptx_path"),
+    )
+    if not pptx_path:
+        raise RuntimeError("PPT generation failed: final pptx_path is empty")
+    print(f"  pptx_path={pptx_path}")
+
+    pptx_filename = os.path.basename(pptx_path)
+    download_url = f"/download/pptx/{pptx_filename}"
+
+    return {
+        "deck_title": deck_title,
+        "total_slides": total_slides,
+        "pptx_path": pptx_path,
+        "pptx_filename": pptx_filename,
+        "download_url": download_url,
+    }
+
+
 @app.post("/api/analyze/step3")
 async def api_run_step3(
     file: UploadFile = File(...),
@@ -217,8 +514,6 @@ async def api_run_step3(
     - Stores output under local output directory.
     - Does not write DB in this step.
     """
-    from features.ppt_maker.main_ppt import run_ppt_generation
-
     print(f"[Step 3] PPT generation request: {file.filename}, notice_id={notice_id}")
 
     os.makedirs("tmp", exist_ok=True)
@@ -226,67 +521,19 @@ async def api_run_step3(
     tmp_path = os.path.join("tmp", f"{uuid.uuid4().hex}{ext}")
 
     try:
-        content = await file.read()
-        with open(tmp_path, "wb") as f:
-            f.write(content)
+        await save_upload(file, tmp_path)
         print(f"  file saved: {tmp_path}")
 
-        render_mode = (os.getenv("PPT_RENDER_MODE", "gamma") or "gamma").strip().lower()
-        gamma_timeout_sec = int(os.getenv("PPT_GAMMA_TIMEOUT_SEC", "900"))
-
-        final_state = run_ppt_generation(
-            source_path=tmp_path,
-            notice_id=str(notice_id or ""),
-            output_dir="output",
-            render_mode=render_mode,
-            gamma_timeout_sec=gamma_timeout_sec,
-        )
-        if not isinstance(final_state, dict) or not final_state:
-            raise RuntimeError("run_ppt_generation returned empty result")
-
-        deck_json = final_state.get("deck_json") or {}
-        slides = deck_json.get("slides") if isinstance(deck_json, dict) else []
-        total_slides = len(slides) if isinstance(slides, list) else 0
-        if total_slides == 0:
-            try:
-                total_slides = int(final_state.get("total_slides") or 0)
-            except Exception:
-                total_slides = 0
-
-        deck_title = ""
-        if isinstance(deck_json, dict):
-            deck_title = str(deck_json.get("deck_title") or "").strip()
-        if not deck_title:
-            deck_title = str(final_state.get("deck_title") or "").strip()
-
-        def _pick_first_non_empty(*values):
-            for value in values:
-                if isinstance(value, str) and value.strip():
-                    return value.strip()
-            return ""
-
-        pptx_path = _pick_first_non_empty(
-            final_state.get("final_ppt_path"),
-            final_state.get("gamma_ppt_path"),
-            final_state.get("pptx_path"),
-        )
-        if not pptx_path:
-            raise RuntimeError("PPT generation failed: final pptx_path is empty")
-        print(f"  pptx_path={pptx_path}")
-
-        pptx_filename = os.path.basename(pptx_path)
-        download_url = f"/download/pptx/{pptx_filename}"
-
-        result = {
-            "deck_title": deck_title,
-            "total_slides": total_slides,
-            "pptx_path": pptx_path,
-            "pptx_filename": pptx_filename,
-            "download_url": download_url,
-        }
+        result = await pipeline_executor.run(_run_step3_pipeline, tmp_path, notice_id)
 
         return JSONResponse({"status": "success", "data": result})
 
+    except UploadTooLarge as e:
+        return JSONResponse(status_code=413, content={"status": "error", "message": str(e)})
+
+    except ExecutorSaturated as e:
+        return _busy_response(e, {"status": "error", "message": str(e)})
+
     except Exception as e:
         import traceback
         print(traceback.format_exc())
@@ -296,9 +543,121 @@ async def api_run_step3(
         if os.path.exists(tmp_path):
             os.remove(tmp_path)
 
+# ============================================
+# Step 3 (비동기): 작업 등록 후 /api/jobs/{job_id} 폴링
+# ============================================
+STEP3_JOB_KIND = "ppt_generation"
+JOB_INPUT_DIR = os.path.join("tmp", "jobs")
+
+
+def _step3_job_handler(params: dict, progress) -> dict:
+    """job_manager 워커에서 실행. 입력 파일은 작업이 끝나야 지운다 (재시작 시 재실행용)."""
+    tmp_path = params["source_path"]
+    if not os.path.exists(tmp_path):
+        raise FileNotFoundError(f"job input file is missing: {tmp_path}")
+    try:
+        return _run_step3_pipeline(tmp_path, params.get("notice_id"), on_progress=progress)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+job_manager.register(STEP3_JOB_KIND, _step3_job_handler)
+
+
+@app.on_event("startup")
+def start_job_manager():
+    # 이전 프로세스에서 끝나지 못한 작업도 여기서 다시 실행된다.
+    job_manager.start()
+
+
+@app.on_event("shutdown")
+def stop_job_manager():
+    job_manager.shutdown()
+
+
+@app.post("/api/analyze/step3/jobs")
+async def api_submit_step3_job(
+    file: UploadFile = File(...),
+    notice_id: int = Form(None),
+    token: str = Form(None),
+):
+    """PPT 생성 작업을 등록하고 job_id를 즉시 반환"""
+    print(f"[Step 3] PPT generation job submit: {file.filename}, notice_id={notice_id}")
+
+    os.makedirs(JOB_INPUT_DIR, exist_ok=True)
+    ext = os.path.splitext(file.filename)[1].lower()
+    tmp_path = os.path.join(JOB_INPUT_DIR, f"{uuid.uuid4().hex}{ext}")
+
+    try:
+        await save_upload(file, tmp_path)
+
+        job_id = job_manager.submit(
+            STEP3_JOB_KIND,
+            {"source_path": tmp_path, "notice_id": notice_id, "filename": file.filename},
+        )
+        return JSONResponse(
+            status_code=202,
+            content={"status": "queued", "job_id": job_id, "status_url": f"/api/jobs/{job_id}"},
+        )
+    except UploadTooLarge as e:
+        return JSONResponse(status_code=413, content={"status": "error", "message": str(e)})
+    except Exception as e:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        return JSONResponse(status_code=500, content={"status": "error", "message": str(e)})
+
+
+@app.get("/api/jobs/{job_id}")
+def api_get_job(job_id: str):
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job not found: {job_id}")
+
+    result = job.get("result") or {}
+    return {
+        "job_id": job["job_id"],
+        "kind": job["kind"],
+        "status": job["status"],
+        "current_node": job.get("current_node"),
+        "progress": job.get("progress") or [],
+        "attempts": job.get("attempts"),
+        "created_at": job.get("created_at"),
+        "started_at": job.get("started_at"),
+        "finished_at": job.get("finished_at"),
+        "download_url": result.get("download_url"),
+        "data": job.get("result"),
+        "error": job.get("error"),
+    }
+
 # ============================================
 # Step 4: PPT 스크립트 생성
 # ============================================
+def _save_script_to_spring(notice_id, token, result: dict) -> None:
+    try:
+        spring_url = "http://localhost:8080/api/scripts/save"
+        headers = {"Authorization": f"Bearer {token}"}
+        payload = {
+            "noticeId": notice_id,
+            "slides": result.get("slides", []),
+            "qna": result.get("qna", [])
+        }
+
+        spring_response = requests.post(
+            spring_url,
+            json=payload,
+            headers=headers,
+            timeout=10
+        )
+
+        if spring_response.status_code == 200:
+            print("[Step 4] DB 저장 성공")
+        else:
+            print(f"[Step 4] DB 저장 실패: {spring_response.status_code}")
+    except Exception as e:
+        print(f"[Step 4] Spring Boot 연동 오류: {str(e)}")
+
+
 @app.post("/api/analyze/step4")
 async def api_run_step4(
     file: UploadFile = File(...),
@@ -311,42 +670,25 @@ async def api_run_step4(
     tmp_path = os.path.join("tmp", f"{uuid.uuid4().hex}.pptx")
 
     try:
-        content = await file.read()
-        with open(tmp_path, "wb") as f:
-            f.write(content)
+        await save_upload(file, tmp_path)
 
-        result = run_script_gen(pptx_path=tmp_path)
+        result = await pipeline_executor.run(run_script_gen, pptx_path=tmp_path)
 
         if result:
             # Spring Boot로 저장 요청(너가 원하면 여기만 남겨도 됨)
             if notice_id and token:
-                try:
-                    spring_url = "http://localhost:8080/api/scripts/save"
-                    headers = {"Authorization": f"Bearer {token}"}
-                    payload = {
-                        "noticeId": notice_id,
-                        "slides": result.get("slides", []),
-                        "qna": result.get("qna", [])
-                    }
-
-                    spring_response = requests.post(
-                        spring_url,
-                        json=payload,
-                        headers=headers,
-                        timeout=10
-                    )
-
-                    if spring_response.status_code == 200:
-                        print("[Step 4] DB 저장 성공")
-                    else:
-                        print(f"[Step 4] DB 저장 실패: {spring_response.status_code}")
-                except Exception as e:
-                    print(f"[Step 4] Spring Boot 연동 오류: {str(e)}")
+                await run_in_threadpool(_save_script_to_spring, notice_id, token, result)
 
             return JSONResponse(content={"status": "success", "data": result}, status_code=200)
 
         return JSONResponse(status_code=500, content={"status": "error", "message": "스크립트 생성 실패"})
 
+    except UploadTooLarge as e:
+        return JSONResponse(status_code=413, content={"status": "error", "message": str(e)})
+
+    except ExecutorSaturated as e:
+        return _busy_response(e, {"status": "error", "message": str(e)})
+
     except Exception as e:
         print(f"[Step 4] 오류: {str(e)}")
         return JSONResponse(status_code=500, content={"status": "error", "message": str(e)})
@@ -0,0 +1,7 @@
+import os
+import sys
+
+# tests 폴더에서 실행해도 프로젝트 루트 기준 import가 되도록
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
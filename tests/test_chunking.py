@@ -0,0 +1,60 @@
+from utils.chunking import passage_budget, sentence_spans, split_by_tokens, split_long_records
+
+
+def count_words(texts):
+    # 테스트용 토큰 수: 공백 기준 어절 수
+    return [len(t.split()) for t in texts]
+
+
+def test_sentence_spans_split_on_boundaries():
+    text = "첫 문장입니다. 둘째 문장?\n셋째 줄 ① 항목"
+    assert [text[a:b] for a, b in sentence_spans(text)] == ["첫 문장입니다.", "둘째 문장?", "셋째 줄", "① 항목"]
+
+
+def test_split_by_tokens_respects_limit_and_sentence_boundaries():
+    sentences = [f"문장 {i} 내용입니다." for i in range(10)]
+    chunks = split_by_tokens(" ".join(sentences), count_words, max_tokens=7, overlap_tokens=0)
+    assert all(n <= 7 for n in count_words(chunks))
+    assert " ".join(chunks) == " ".join(sentences)
+    assert all(c.endswith("내용입니다.") for c in chunks)
+
+
+def test_split_by_tokens_overlap_repeats_previous_sentence():
+    sentences = [f"문장 {i} 끝." for i in range(6)]
+    chunks = split_by_tokens(" ".join(sentences), count_words, max_tokens=9, overlap_tokens=3)
+    assert all(n <= 9 for n in count_words(chunks))
+    for prev, cur in zip(chunks, chunks[1:]):
+        assert cur.startswith(prev.split(". ")[-1].rstrip(".") + ".")
+
+
+def test_split_by_tokens_breaks_long_sentence_by_words():
+    text = " ".join(f"w{i}" for i in range(25))
+    chunks = split_by_tokens(text, count_words, max_tokens=10, overlap_tokens=0)
+    assert count_words(chunks) == [10, 10, 5]
+    assert split_by_tokens("   ", count_words, max_tokens=10) == []
+
+
+def test_split_long_records_keeps_short_ids():
+    records = [("a", "짧은 문장.", {"k": 1}), ("b", "하나 둘 셋. 넷 다섯 여섯.", {"k": 2})]
+    out = split_long_records(records, count_words, max_tokens=3)
+    assert out[0] == records[0]
+    assert [uid for uid, _, _ in out[1:]] == ["b", "b#p2"]
+    assert all(meta == {"k": 2} for _, _, meta in out[1:])
+
+
+def test_passage_budget_subtracts_header():
+    assert passage_budget(count_words, "passage: 법령") == passage_budget(count_words, "") - 2
+
+
+def count_dense_digits(texts):
+    # 숫자는 글자마다 1토큰, 그 밖의 글자는 4글자에 1토큰 (글자 수 비율 분할이 한도를 넘기는 경우)
+    def count(t):
+        return sum(sum(c.isdigit() for c in w) + -(-sum(not c.isdigit() for c in w) // 4) for w in t.split())
+    return [count(t) for t in texts]
+
+
+def test_split_by_tokens_recounts_uneven_long_word():
+    word = "a" * 40 + "1" * 40
+    chunks = split_by_tokens(word, count_dense_digits, max_tokens=10, overlap_tokens=0)
+    assert all(n <= 10 for n in count_dense_digits(chunks))
+    assert "".join(chunks) == word
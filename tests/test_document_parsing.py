@@ -0,0 +1,32 @@
+from utils.document_parsing import group_words_into_lines, is_inside_bbox, words_outside_bboxes
+
+
+def word(text, x0, top, width=10, height=8):
+    return {"text": text, "x0": x0, "x1": x0 + width, "top": top, "bottom": top + height}
+
+
+def test_words_outside_bboxes_matches_is_inside_bbox():
+    words = [word("a", 10, 10), word("b", 100, 10), word("c", 10, 100), word("d", 195, 195)]
+    bboxes = [(90, 0, 200, 50), (180, 180, 220, 220)]
+    expected = [w for w in words if not is_inside_bbox(w, bboxes)]
+    assert words_outside_bboxes(words, bboxes) == expected
+    assert [w["text"] for w in expected] == ["a", "c"]
+
+
+def test_words_outside_bboxes_without_tables():
+    words = [word("a", 10, 10)]
+    assert words_outside_bboxes(words, []) == words
+    assert words_outside_bboxes([], [(0, 0, 1, 1)]) == []
+
+
+def test_group_words_into_lines_breaks_on_top_jump():
+    words = [word("a", 10, 10), word("b", 30, 12), word("c", 10, 30), word("d", 30, 31)]
+    lines = group_words_into_lines(words)
+    assert [[w["text"] for w in line] for line in lines] == [["a", "b"], ["c", "d"]]
+    assert group_words_into_lines([]) == []
+
+
+def test_group_words_into_lines_sort_orders_by_top_then_x0():
+    words = [word("d", 30, 30), word("b", 30, 10), word("c", 10, 30), word("a", 10, 10)]
+    lines = group_words_into_lines(words, sort=True)
+    assert [[w["text"] for w in line] for line in lines] == [["a", "b"], ["c", "d"]]
@@ -0,0 +1,68 @@
+from utils.ingest_manifest import (
+    IngestManifest,
+    content_hash,
+    delete_all,
+    delete_stale,
+    new_run_id,
+    reset_if_collection_lost,
+)
+
+
+class FakeCollection:
+    def __init__(self, ids=()):
+        self.ids = set(ids)
+
+    def count(self):
+        return len(self.ids)
+
+    def delete(self, ids):
+        self.ids.difference_update(ids)
+
+
+def make_manifest(tmp_path, ids, run_id):
+    manifest = IngestManifest("test|col", db_path=str(tmp_path / "manifest.sqlite3"))
+    manifest.record(ids, [content_hash(i) for i in ids], run_id)
+    return manifest
+
+
+def test_filter_changed_only_new_or_modified(tmp_path):
+    manifest = make_manifest(tmp_path, ["a", "b"], new_run_id())
+    changed = manifest.filter_changed(["a", "b", "c"], [content_hash("a"), "other", content_hash("c")], new_run_id())
+    assert changed == [False, True, True]
+
+
+def test_stale_ids_are_ids_not_seen_in_run(tmp_path):
+    manifest = make_manifest(tmp_path, ["a", "b", "c"], new_run_id())
+    run_id = new_run_id()
+    manifest.filter_changed(["a", "c"], [content_hash("a"), content_hash("c")], run_id)
+    assert manifest.stale_ids(run_id) == ["b"]
+
+    collection = FakeCollection(["a", "b", "c"])
+    assert delete_stale(collection, manifest, run_id) == 1
+    assert collection.ids == {"a", "c"}
+    assert manifest.count() == 2
+
+
+def test_delete_stale_keeps_everything_when_all_ids_missing(tmp_path):
+    manifest = make_manifest(tmp_path, ["a", "b"], new_run_id())
+    collection = FakeCollection(["a", "b"])
+    assert delete_stale(collection, manifest, new_run_id()) == 0
+    assert collection.count() == 2
+
+
+def test_reset_when_collection_lost(tmp_path):
+    manifest = make_manifest(tmp_path, ["a", "b"], new_run_id())
+    assert not reset_if_collection_lost(FakeCollection(["a", "b"]), manifest)
+    assert manifest.count() == 2
+
+    assert reset_if_collection_lost(FakeCollection(), manifest)
+    assert manifest.count() == 0
+    assert manifest.filter_changed(["a"], [content_hash("a")], new_run_id()) == [True]
+
+
+def test_delete_all_removes_scope_ids_from_collection(tmp_path):
+    manifest = make_manifest(tmp_path, ["old1", "old2"], new_run_id())
+    collection = FakeCollection(["old1", "old2", "new1"])
+    assert delete_all(collection, manifest) == 2
+    assert collection.ids == {"new1"}
+    assert manifest.count() == 0
@@ -0,0 +1,47 @@
+from utils.ingest_pipeline import Checkpoint
+
+
+def write_source(tmp_path, lines):
+    path = tmp_path / "source.jsonl"
+    path.write_bytes(b"".join(lines))
+    return path
+
+
+def test_checkpoint_roundtrip(tmp_path):
+    source = write_source(tmp_path, [b'{"id": 1}\n', b'{"id": 2}\n'])
+    ckpt = Checkpoint(str(tmp_path / "ckpt.json"), str(source), scope="db|col")
+    assert ckpt.load() is None
+    ckpt.save(10, run_id="r1")
+    assert ckpt.load()["run_id"] == "r1"
+    assert ckpt.resume_offset() == 10
+
+
+def test_checkpoint_rejects_offset_not_on_line_boundary(tmp_path):
+    source = write_source(tmp_path, [b'{"id": 1}\n', b'{"id": 2}\n'])
+    ckpt = Checkpoint(str(tmp_path / "ckpt.json"), str(source))
+    ckpt.save(5)
+    assert ckpt.load() is None
+
+
+def test_checkpoint_accepts_end_of_file_without_newline(tmp_path):
+    source = write_source(tmp_path, [b'{"id": 1}\n', b'{"id": 2}'])
+    ckpt = Checkpoint(str(tmp_path / "ckpt.json"), str(source))
+    ckpt.save(source.stat().st_size)
+    assert ckpt.resume_offset() == source.stat().st_size
+
+
+def test_checkpoint_rejects_other_scope_or_changed_source(tmp_path):
+    source = write_source(tmp_path, [b'{"id": 1}\n', b'{"id": 2}\n'])
+    path = str(tmp_path / "ckpt.json")
+    Checkpoint(path, str(source), scope="db|a").save(10)
+    assert Checkpoint(path, str(source), scope="db|b").load() is None
+
+    source.write_bytes(b'{"id": 9}\n{"id": 2}\n')
+    assert Checkpoint(path, str(source), scope="db|a").load() is None
+
+
+def test_checkpoint_ignores_corrupt_file(tmp_path):
+    source = write_source(tmp_path, [b'{"id": 1}\n'])
+    path = tmp_path / "ckpt.json"
+    path.write_text("{not json", encoding="utf-8")
+    assert Checkpoint(str(path), str(source)).load() is None
@@ -0,0 +1,29 @@
+import pandas as pd
+import pytest
+
+pytest.importorskip("chromadb")
+pytest.importorskip("sentence_transformers")
+
+from utils.law_ingest_parquet import iter_law_chunks  # noqa: E402
+
+COLMAP = {"text": "chunk_text", "law_name": "law_name", "source_file": "source_file", "article_number": "article_number"}
+
+
+def chunk_ids(tmp_path, rows):
+    path = tmp_path / "law.parquet"
+    pd.DataFrame(rows, columns=["chunk_text", "law_name", "source_file", "article_number"]).to_parquet(path)
+    return [uid for frame in iter_law_chunks(str(path), COLMAP, read_rows=2) for uid in frame["id"]]
+
+
+def test_chunk_ids_do_not_depend_on_row_position(tmp_path):
+    rows = [(f"제{k}조(목적) 본문 {k}", "연구개발법", "law.pdf", str(k)) for k in range(1, 6)]
+    before = chunk_ids(tmp_path, rows)
+    after = chunk_ids(tmp_path, rows[:2] + [("제9조(신설) 새 조문", "연구개발법", "law.pdf", "9")] + rows[2:])
+    assert set(before) < set(after)
+    assert len(set(after)) == len(after)
+
+
+def test_duplicate_chunks_in_article_get_distinct_ids(tmp_path):
+    rows = [("같은 본문", "연구개발법", "law.pdf", "1")] * 3
+    ids = chunk_ids(tmp_path, rows)
+    assert len(set(ids)) == 3
@@ -0,0 +1,95 @@
+import asyncio
+import functools
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# =========================================================
+# 요청 처리용 bounded executor (CPU/장시간 작업을 이벤트 루프 밖에서 실행)
+# =========================================================
+# 실행 중(max_workers) + 대기(max_queue)가 꽉 차면 ExecutorSaturated → API에서 HTTP 429
+PARSE_EXECUTOR_WORKERS = int(os.getenv("PARSE_EXECUTOR_WORKERS", "2"))
+PARSE_EXECUTOR_QUEUE = int(os.getenv("PARSE_EXECUTOR_QUEUE", "8"))
+PIPELINE_EXECUTOR_WORKERS = int(os.getenv("PIPELINE_EXECUTOR_WORKERS", "2"))
+PIPELINE_EXECUTOR_QUEUE = int(os.getenv("PIPELINE_EXECUTOR_QUEUE", "4"))
+# 429 응답의 Retry-After (초)
+EXECUTOR_RETRY_AFTER_SEC = int(os.getenv("EXECUTOR_RETRY_AFTER_SEC", "10"))
+
+
+class ExecutorSaturated(Exception):
+    def __init__(self, name: str, retry_after: int = EXECUTOR_RETRY_AFTER_SEC):
+        super().__init__(f"{name} executor is busy, retry later")
+        self.retry_after = retry_after
+
+
+class BoundedExecutor:
+    """
+    고정 크기 스레드 풀 + 대기열 깊이 제한.
+    slot(실행 중 + 대기 중 작업 수)은 작업이 실제로 끝나거나 시작 전에 취소될 때 반납된다.
+    (요청이 끊겨 await가 취소돼도 이미 실행 중인 작업은 끝날 때까지 slot을 잡고 있음)
+    """
+
+    def __init__(self, name: str, max_workers: int, max_queue: int):
+        self.name = name
+        self.max_workers = max(1, max_workers)
+        self.max_queue = max(0, max_queue)
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix=name)
+        self._lock = threading.Lock()
+        self._inflight = 0
+        self.rejected = 0
+
+    def try_reserve(self) -> bool:
+        with self._lock:
+            if self._inflight >= self.max_workers + self.max_queue:
+                self.rejected += 1
+                return False
+            self._inflight += 1
+            return True
+
+    def release(self, *_: Any) -> None:
+        with self._lock:
+            self._inflight = max(0, self._inflight - 1)
+
+    def reserve(self) -> None:
+        if not self.try_reserve():
+            raise ExecutorSaturated(self.name)
+
+    def submit_reserved(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Future:
+        """reserve()로 이미 slot을 잡은 호출자가 같은 풀에서 fn을 실행 (slot 반납은 호출자가 release()로)."""
+        return self._executor.submit(functools.partial(fn, *args, **kwargs))
+
+    async def run(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """fn(*args, **kwargs)를 풀에서 실행하고 결과를 기다린다. 꽉 차 있으면 ExecutorSaturated."""
+        self.reserve()
+        try:
+            future = self._executor.submit(functools.partial(fn, *args, **kwargs))
+        except BaseException:
+            self.release()
+            raise
+        future.add_done_callback(self.release)
+        return await asyncio.wrap_future(future)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            inflight = self._inflight
+        return {
+            "max_workers": self.max_workers,
+            "max_queue": self.max_queue,
+            "inflight": inflight,
+            "queued": max(0, inflight - self.max_workers),
+            "rejected": self.rejected,
+        }
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+# 파일 파싱 (/parse, /parse/stream)
+parse_executor = BoundedExecutor("parse", PARSE_EXECUTOR_WORKERS, PARSE_EXECUTOR_QUEUE)
+# PPT 생성 / 스크립트 생성 (step3, step4)
+pipeline_executor = BoundedExecutor("pipeline", PIPELINE_EXECUTOR_WORKERS, PIPELINE_EXECUTOR_QUEUE)
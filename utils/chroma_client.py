@@ -0,0 +1,152 @@
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple, TypeVar
+
+import chromadb
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# =========================================================
+# ChromaDB HttpClient 풀 ((host, port)당 1개, collection 핸들 캐시)
+# =========================================================
+# 마지막 성공 후 이 시간이 지나야 heartbeat로 연결 상태를 다시 확인한다.
+CHROMA_HEALTH_CHECK_SEC = float(os.getenv("CHROMA_HEALTH_CHECK_SEC", "30"))
+
+T = TypeVar("T")
+
+
+def _connection_error_types() -> Tuple[type, ...]:
+    # 재연결로 풀릴 수 있는 전송 계층 오류만 (검증 오류/잘못된 where/차원 불일치 등은 재시도해도 같음)
+    types: list = [ConnectionError, TimeoutError]
+    try:
+        import httpx
+
+        types.append(httpx.TransportError)
+    except ImportError:
+        pass
+    try:
+        import requests
+
+        types += [requests.exceptions.ConnectionError, requests.exceptions.Timeout]
+    except ImportError:
+        pass
+    return tuple(types)
+
+
+CONNECTION_ERRORS = _connection_error_types()
+
+
+def is_connection_error(e: BaseException) -> bool:
+    return isinstance(e, CONNECTION_ERRORS)
+
+
+class ChromaConnectionManager:
+    """
+    chromadb.HttpClient는 내부 requests.Session(keep-alive)을 가지므로 endpoint당 하나만 만들어 재사용한다.
+    get_collection 결과도 (host, port, collection) 단위로 캐시하고, 실패 시 해당 endpoint를 버리고 재연결한다.
+    """
+
+    def __init__(self, health_check_sec: float = CHROMA_HEALTH_CHECK_SEC):
+        self.health_check_sec = health_check_sec
+        self._clients: Dict[Tuple[str, int], Any] = {}
+        self._collections: Dict[Tuple[str, int, str], Any] = {}
+        self._last_ok: Dict[Tuple[str, int], float] = {}
+        self._lock = threading.RLock()
+
+    def get_client(self, host: str, port: int):
+        # heartbeat / HttpClient 생성(네트워크 I/O)은 lock 밖에서 한다 (Chroma 하나가 멈춰도 다른 요청 스레드는 안 막힘)
+        key = (host, int(port))
+        with self._lock:
+            client = self._clients.get(key)
+            fresh = client is not None and time.monotonic() - self._last_ok.get(key, 0.0) < self.health_check_sec
+        if fresh:
+            return client
+        if client is not None and self._heartbeat(key, client):
+            return client
+
+        print(f"[*] ChromaDB connect: {host}:{port}")
+        new_client = chromadb.HttpClient(host=host, port=int(port))
+        with self._lock:
+            current = self._clients.get(key)
+            if current is not None and current is not client:
+                # 그 사이 다른 스레드가 먼저 재연결함
+                return current
+            self._drop_endpoint(key)
+            self._clients[key] = new_client
+            self._last_ok[key] = time.monotonic()
+            return new_client
+
+    def get_collection(self, host: str, port: int, name: str, create: bool = False):
+        client = self.get_client(host, port)
+        key = (host, int(port), name)
+        with self._lock:
+            collection = self._collections.get(key)
+        if collection is not None:
+            return collection
+        if create:
+            collection = client.get_or_create_collection(name=name)
+        else:
+            collection = client.get_collection(name=name)
+        with self._lock:
+            return self._collections.setdefault(key, collection)
+
+    def run(self, host: str, port: int, name: str, fn: Callable[[Any], T], retry: bool = True) -> T:
+        """
+        collection에 대해 fn을 실행한다. 연결 오류면 endpoint를 버리고, retry=True일 때만 재연결 후 한 번 더 시도한다.
+        (add처럼 멱등이 아닌 호출은 retry=False: 서버에 이미 반영된 뒤 timeout이 났을 수 있음)
+        연결 오류가 아닌 예외는 그대로 던진다.
+        """
+        try:
+            return fn(self.get_collection(host, port, name))
+        except CONNECTION_ERRORS as e:
+            self.invalidate(host, port)
+            if not retry:
+                raise
+            print(f"[Chroma] {host}:{port}/{name} connection failed ({e}), reconnecting...")
+            return fn(self.get_collection(host, port, name))
+
+    def invalidate(self, host: str, port: int, name: Optional[str] = None) -> None:
+        """name이 있으면 collection 핸들만, 없으면 endpoint 전체(client 포함)를 버린다."""
+        with self._lock:
+            if name is not None:
+                self._collections.pop((host, int(port), name), None)
+            else:
+                self._drop_endpoint((host, int(port)))
+
+    def _heartbeat(self, key: Tuple[str, int], client) -> bool:
+        try:
+            client.heartbeat()
+        except Exception as e:
+            print(f"[Chroma] heartbeat failed for {key[0]}:{key[1]}: {e}")
+            return False
+        with self._lock:
+            if self._clients.get(key) is client:
+                self._last_ok[key] = time.monotonic()
+        return True
+
+    def _drop_endpoint(self, key: Tuple[str, int]) -> None:
+        self._clients.pop(key, None)
+        self._last_ok.pop(key, None)
+        for ckey in [k for k in self._collections if k[:2] == key]:
+            del self._collections[ckey]
+
+
+_manager = ChromaConnectionManager()
+
+
+def get_client(host: str, port: int):
+    return _manager.get_client(host, port)
+
+
+def get_collection(host: str, port: int, name: str, create: bool = False):
+    return _manager.get_collection(host, port, name, create=create)
+
+
+def run_with_collection(host: str, port: int, name: str, fn: Callable[[Any], T], retry: bool = True) -> T:
+    return _manager.run(host, port, name, fn, retry=retry)
+
+
+def invalidate(host: str, port: int, name: Optional[str] = None) -> None:
+    _manager.invalidate(host, port, name)
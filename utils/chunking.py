@@ -0,0 +1,155 @@
+import os
+import re
+from typing import Any, Callable, Dict, List, Sequence, Tuple
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# =========================================================
+# 토큰 기준 chunk 분할 (e5 512 토큰 제한 + 한국어 문장 경계)
+# =========================================================
+# e5(XLM-R) 입력 최대 길이. [CLS]/[SEP] 2개와 "passage: ..." 머리말도 이 안에 들어가야 잘리지 않는다
+E5_MAX_TOKENS = 512
+_SPECIAL_TOKENS = 2
+# 문장을 따로 세어 더한 값과 이어 붙인 뒤 센 값이 경계 공백 때문에 약간 다를 수 있어 남겨 두는 여유
+_JOIN_SLACK = 8
+# 적재 스크립트에서 토큰 기준 분할 사용 여부 (false면 예전처럼 글자 수 분할 / 원본 chunk 그대로)
+INGEST_TOKEN_CHUNKS = os.getenv("INGEST_TOKEN_CHUNKS", "true").lower() in {"1", "true", "yes", "y"}
+# chunk 사이에 겹쳐 넣는 앞 chunk 끝부분 (문장 단위로, 이 토큰 수 이내)
+CHUNK_OVERLAP_TOKENS = int(os.getenv("CHUNK_OVERLAP_TOKENS", "64"))
+
+# 문장 경계: 마침표/물음표 뒤 공백, 줄바꿈, 항 번호(①②…) 앞
+_BOUNDARY = re.compile(r"(?<=[.!?。])\s+|\s*\n\s*|\s+(?=[①-⑳])")
+_WORD = re.compile(r"\S+")
+
+# 텍스트 목록 → 각 텍스트의 토큰 수 (special token 제외)
+CountTokens = Callable[[Sequence[str]], List[int]]
+
+
+def tokenizer_counter(tokenizer) -> CountTokens:
+    """HF tokenizer(SentenceTransformer.tokenizer)로 토큰 수를 세는 함수."""
+    def count(texts: Sequence[str]) -> List[int]:
+        if not texts:
+            return []
+        encoded = tokenizer(list(texts), add_special_tokens=False, verbose=False)["input_ids"]
+        return [len(ids) for ids in encoded]
+    return count
+
+
+def passage_budget(count_tokens: CountTokens, header: str = "passage: ") -> int:
+    """header(접두어/법령명 등) 뒤에 붙일 본문 chunk가 쓸 수 있는 최대 토큰 수."""
+    return max(1, E5_MAX_TOKENS - _SPECIAL_TOKENS - _JOIN_SLACK - count_tokens([header])[0])
+
+
+def sentence_spans(text: str) -> List[Tuple[int, int]]:
+    """text 안 문장들의 (start, end) 위치. 경계의 공백/줄바꿈은 어느 문장에도 포함하지 않는다."""
+    spans = []
+    start = 0
+    for m in _BOUNDARY.finditer(text):
+        if m.start() > start:
+            spans.append((start, m.start()))
+        start = max(start, m.end())
+    if start < len(text):
+        spans.append((start, len(text)))
+    return spans
+
+
+def _split_long(text: str, start: int, end: int, count_tokens: CountTokens, max_tokens: int):
+    # max_tokens보다 긴 문장은 어절 단위로 채우고, 어절 하나가 넘치면 글자 수 비율로 자른다
+    words = [(start + m.start(), start + m.end()) for m in _WORD.finditer(text[start:end])]
+    sizes = count_tokens([text[a:b] for a, b in words])
+    units = []
+    for (a, b), n in zip(words, sizes):
+        if n <= max_tokens:
+            units.append((a, b, n))
+            continue
+        step = max(1, (b - a) * max_tokens // n)
+        units.extend(_fit_pieces(text, [(s, min(s + step, b)) for s in range(a, b, step)], count_tokens, max_tokens))
+    return _pack(units, max_tokens, 0)
+
+
+def _fit_pieces(text: str, pieces, count_tokens: CountTokens, max_tokens: int):
+    # 글자 수 비율로 자른 조각은 토큰 밀도(URL, 숫자열, 한글/영문 혼용)에 따라 한도를 넘을 수 있어
+    # 다시 세고, 아직 넘는 조각은 반으로 나눠 다시 센다 (한 글자짜리는 그대로 둠)
+    out = []
+    while pieces:
+        sizes = count_tokens([text[a:b] for a, b in pieces])
+        over = []
+        for (a, b), n in zip(pieces, sizes):
+            if n <= max_tokens or b - a <= 1:
+                out.append((a, b, n))
+            else:
+                mid = (a + b) // 2
+                over.extend([(a, mid), (mid, b)])
+        pieces = over
+    return sorted(out)
+
+
+def _pack(units, max_tokens: int, overlap_tokens: int):
+    # (start, end, tokens) 목록을 순서대로 max_tokens 이내로 묶어 (start, end, tokens)로 돌려준다
+    out = []
+    i = 0
+    while i < len(units):
+        j, total = i, 0
+        while j < len(units) and total + units[j][2] <= max_tokens:
+            total += units[j][2]
+            j += 1
+        if j == i:
+            total, j = units[i][2], i + 1
+        out.append((units[i][0], units[j - 1][1], total))
+        if j >= len(units):
+            break
+        # 다음 chunk는 이번 chunk 끝의 문장 몇 개(overlap_tokens 이내)부터 시작
+        # (겹친 부분만으로 chunk가 채워지지 않도록 다음 새 문장이 들어갈 자리는 남긴다)
+        k, carried = j, 0
+        room = max_tokens - units[j][2]
+        while k - 1 > i and carried + units[k - 1][2] <= min(overlap_tokens, room):
+            carried += units[k - 1][2]
+            k -= 1
+        i = k
+    return out
+
+
+def split_by_tokens(
+    text: str,
+    count_tokens: CountTokens,
+    max_tokens: int,
+    overlap_tokens: int = CHUNK_OVERLAP_TOKENS,
+) -> List[str]:
+    """
+    text를 문장 경계에서 max_tokens 이하 chunk로 나눈다. 원문의 공백/줄바꿈은 chunk 안에서 그대로 유지.
+    (글자 수로 자르면 한국어 문장 중간이 잘리고, 긴 chunk는 512 토큰을 넘겨 임베딩 시 뒤가 잘려 나간다)
+    """
+    text = (text or "").strip()
+    if not text:
+        return []
+    spans = sentence_spans(text)
+    sizes = count_tokens([text[a:b] for a, b in spans])
+    units = []
+    for (a, b), n in zip(spans, sizes):
+        if n <= max_tokens:
+            units.append((a, b, n))
+        else:
+            units.extend(_split_long(text, a, b, count_tokens, max_tokens))
+    return [text[a:b] for a, b, _ in _pack(units, max_tokens, overlap_tokens)]
+
+
+def split_long_records(
+    records: Sequence[Tuple[str, str, Dict[str, Any]]],
+    count_tokens: CountTokens,
+    max_tokens: int,
+) -> List[Tuple[str, str, Dict[str, Any]]]:
+    """
+    (id, text, meta) 중 max_tokens를 넘는 text만 split_by_tokens로 나눈다.
+    첫 조각은 원래 id, 나머지는 "{id}#p2", "{id}#p3" ... 넘지 않는 record는 id/text 그대로라 manifest 해시도 유지된다.
+    """
+    sizes = count_tokens([text for _, text, _ in records])
+    out = []
+    for (uid, text, meta), n in zip(records, sizes):
+        if n <= max_tokens:
+            out.append((uid, text, meta))
+            continue
+        for k, piece in enumerate(split_by_tokens(text, count_tokens, max_tokens), 1):
+            out.append((uid if k == 1 else f"{uid}#p{k}", piece, meta))
+    return out
@@ -2,12 +2,106 @@
 
 import os
 import json
+import sys
+import time
 import chromadb
-from sentence_transformers import SentenceTransformer
 from dotenv import load_dotenv
 
+# utils 폴더에서 직접 실행해도 프로젝트 루트 기준 import가 되도록
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from utils.chunking import INGEST_TOKEN_CHUNKS, passage_budget, split_long_records, tokenizer_counter
+from utils.embedding import BulkEncoder
+from utils.ingest_manifest import (
+    INGEST_INCREMENTAL,
+    IngestManifest,
+    content_hash,
+    delete_stale,
+    new_run_id,
+    reset_if_collection_lost,
+)
+from utils.ingest_pipeline import Checkpoint, iter_jsonl_lines, run_pipeline
+
 load_dotenv()
 
+# 모델 설정 (Main과 동일하게 유지)
+EMBED_MODEL_NAME = "intfloat/multilingual-e5-base"
+# 읽기/upsert/checkpoint 단위 배치 크기 (인코딩은 BulkEncoder가 이 안에서 길이순 EMBED_INGEST_BATCH_SIZE씩)
+# 중단 후 이어서 적재 여부
+BATCH_SIZE = int(os.environ.get("STRATEGY_INGEST_BATCH_SIZE", "512"))
+INGEST_RESUME = os.environ.get("INGEST_RESUME", "true").lower() in {"1", "true", "yes", "y"}
+
+
+def record_from_item(item):
+    """JSONL 한 줄(dict) → (id, 원본 텍스트, 메타데이터). 적재 대상이 아니면 None"""
+    # 텍스트 확인
+    text = (item.get("chunk_text") or "").strip()
+    if not text: return None
+
+    # ID 생성 (doc_id + chunk_id 조합)
+    chunk_id = item.get("chunk_id")
+    doc_id = item.get("doc_id") or ""
+    if not chunk_id: return None
+
+    unique_id = f"{doc_id}_{chunk_id}" if doc_id else chunk_id
+
+    # 메타데이터 구성 (검색에 필요한 필드 위주)
+    meta = {
+        "doc_id": doc_id,
+        "title": item.get("title_raw", "")[:100], # 너무 길면 자름
+        "year": str(item.get("year", "")),
+        "agency_norm": item.get("agency_norm", ""),
+        "agency_raw": item.get("agency_raw", ""),
+    }
+    return unique_id, text, meta
+
+
+def _empty_batch(offset):
+    return {"ids": [], "docs": [], "metas": [], "hashes": [], "offset": offset}
+
+
+def iter_batches(jsonl_path, batch_size=BATCH_SIZE, start_offset=0, manifest=None, run_id=None, count_tokens=None, max_tokens=None):
+    """
+    {"ids", "docs", "metas", "hashes", "offset"} 배치를 yield. offset은 이 배치까지 반영하면 건너뛰어도 되는 byte 위치.
+    manifest가 있으면 batch_size줄씩 내용 해시를 비교해서 새로 생겼거나 바뀐 chunk만 담는다.
+    count_tokens가 있으면 max_tokens(e5 입력 한도)를 넘는 chunk는 문장 경계에서 나눠 담는다 (넘는 부분이 잘려서 임베딩되지 않도록).
+    """
+    batch = _empty_batch(start_offset)
+    scanned = []
+
+    def take(records, offset):
+        if count_tokens is not None and records:
+            records = split_long_records(records, count_tokens, max_tokens)
+        records = [(*r, content_hash(*r, EMBED_MODEL_NAME)) for r in records]
+        if manifest is not None and records:
+            changed = manifest.filter_changed([r[0] for r in records], [r[3] for r in records], run_id)
+            records = [r for r, c in zip(records, changed) if c]
+        for unique_id, text, meta, h in records:
+            batch["ids"].append(unique_id)
+            batch["docs"].append(text)
+            batch["metas"].append(meta)
+            batch["hashes"].append(h)
+        batch["offset"] = offset
+
+    last_offset = start_offset
+    for offset, item in iter_jsonl_lines(jsonl_path, start_offset):
+        last_offset = offset
+        record = record_from_item(item)
+        if record is None: continue
+        scanned.append(record)
+        if len(scanned) >= batch_size:
+            take(scanned, offset)
+            scanned = []
+            if len(batch["ids"]) >= batch_size:
+                yield batch
+                batch = _empty_batch(offset)
+    take(scanned, last_offset)
+    if batch["ids"]:
+        yield batch
+
+
 def main():
     print("="*60)
     print("[DB 생성] JSONL 데이터 적재 시스템")
@@ -16,9 +110,6 @@ def main():
     jsonl_path = os.environ.get("STRATEGY_JSONL_PATH")
     chroma_dir = os.environ.get("CHROMA_DB_DIR")
     collection_name = os.environ.get("CHROMA_COLLECTION", "strategy_chunks_norm")
-    
-    # 모델 설정 (Main과 동일하게 유지)
-    EMBED_MODEL_NAME = "intfloat/multilingual-e5-base"
 
     # 경로 검증
     if not chroma_dir:
@@ -36,86 +127,85 @@ def main():
     client = chromadb.PersistentClient(path=chroma_dir)
     collection = client.get_or_create_collection(name=collection_name)
     
-    # 3. 모델 로딩
+    # 3. 모델 로딩 (EMBED_INGEST_WORKERS > 1 이면 멀티 프로세스 인코딩 풀)
     print("[*] 모델 로딩 중...")
-    model = SentenceTransformer(EMBED_MODEL_NAME)
-
-    # 4. 데이터 로딩 (JSONL 읽기)
-    docs = []
-    ids = []
-    metas = []
-
-    print("[*] 파일 읽는 중...")
-    with open(jsonl_path, "r", encoding="utf-8") as f:
-        for line in f:
-            line = line.strip()
-            if not line: continue
-            
-            try:
-                item = json.loads(line)
-            except json.JSONDecodeError:
-                continue
-
-            # 텍스트 확인
-            text = (item.get("chunk_text") or "").strip()
-            if not text: continue
-            
-            # ID 생성 (doc_id + chunk_id 조합)
-            chunk_id = item.get("chunk_id")
-            doc_id = item.get("doc_id") or ""
-            if not chunk_id: continue
-            
-            unique_id = f"{doc_id}_{chunk_id}" if doc_id else chunk_id
-            
-            ids.append(unique_id)
-            docs.append(text)
-            
-            # 메타데이터 구성 (검색에 필요한 필드 위주)
-            metas.append({
-                "doc_id": doc_id,
-                "title": item.get("title_raw", "")[:100], # 너무 길면 자름
-                "year": str(item.get("year", "")),
-                "agency_norm": item.get("agency_norm", ""),
-                "agency_raw": item.get("agency_raw", ""),
-            })
-
-    if not docs:
-        print("[!] 적재할 데이터가 없습니다.")
-        return
+    encoder = BulkEncoder(EMBED_MODEL_NAME)
 
-    print(f"[*] 총 {len(docs)}개 데이터 적재 시작 (Batch Size: 64)")
+    # 4. 이어서 적재할 위치 확인 (checkpoint: 마지막으로 upsert가 끝난 줄의 byte offset)
+    scope = f"{os.path.abspath(chroma_dir)}|{collection_name}"
+    checkpoint_path = os.environ.get("STRATEGY_INGEST_CHECKPOINT") or f"{jsonl_path}.ingest_ckpt.json"
+    checkpoint = Checkpoint(checkpoint_path, jsonl_path, scope=scope)
+    # 증분 적재: manifest에 chunk id별 내용 해시를 두고 바뀐 chunk만 임베딩, 사라진 id는 삭제
+    manifest = IngestManifest(scope) if INGEST_INCREMENTAL else None
+    state = checkpoint.load() if INGEST_RESUME else None
+    if manifest is not None and state and not state.get("run_id"):
+        state = None  # run_id 없이 중단된 적재는 사라진 id 판별이 불가능하므로 처음부터
+    if manifest is not None and reset_if_collection_lost(collection, manifest):
+        state = None  # 컬렉션이 비었으면 checkpoint 이전 줄도 다시 적재해야 하므로 처음부터
+    start_offset = int(state["offset"]) if state else 0
+    run_id = (state or {}).get("run_id") or new_run_id()
+    file_size = os.path.getsize(jsonl_path)
+    if start_offset:
+        print(f"[*] checkpoint 발견: {start_offset}/{file_size} bytes 지점부터 이어서 적재")
+    if manifest is not None:
+        print(f"[*] 증분 적재: manifest {manifest.count()}개 id 기준으로 바뀐 chunk만 임베딩")
 
-    # 5. 배치 단위로 임베딩 및 적재
-    batch_size = 64
-    total = len(docs)
-    
-    for i in range(0, total, batch_size):
-        batch_docs = docs[i : i + batch_size]
-        batch_ids = ids[i : i + batch_size]
-        batch_metas = metas[i : i + batch_size]
-        
+    print(f"[*] 스트리밍 적재 시작 (Batch Size: {BATCH_SIZE})")
+
+    # 5. 읽기 → 임베딩 → upsert 를 단계별 스레드로 겹쳐서 실행
+    def embed(batch):
         # [중요] E5 모델은 문서 임베딩 시 'passage: ' 접두어를 권장함
         # DB에는 원본 텍스트를 저장하고, 임베딩 벡터 만들 때만 접두어 사용
-        batch_docs_for_embed = ["passage: " + d for d in batch_docs]
-        
-        # 임베딩 생성
-        embeddings = model.encode(batch_docs_for_embed, normalize_embeddings=True).tolist()
-        
+        batch_docs_for_embed = ["passage: " + d for d in batch["docs"]]
+        return encoder.encode(batch_docs_for_embed).tolist()
+
+    def upsert(batch, embeddings):
         # ChromaDB에 저장 (Upsert)
         collection.upsert(
-            ids=batch_ids,
-            documents=batch_docs, # 원본 텍스트
-            metadatas=batch_metas,
+            ids=batch["ids"],
+            documents=batch["docs"], # 원본 텍스트
+            metadatas=batch["metas"],
             embeddings=embeddings,
         )
-        
-        # 진행률 표시
-        if (i // batch_size) % 10 == 0:
-             progress = (i + len(batch_docs)) / total * 100
-             print(f"  - 진행률: {i + len(batch_docs)}/{total} ({progress:.1f}%)")
+
+    total = 0
+    batches_done = 0
+
+    def committed(batch):
+        nonlocal total, batches_done
+        total += len(batch["ids"])
+        batches_done += 1
+        if manifest is not None:
+            manifest.record(batch["ids"], batch["hashes"], run_id)
+        checkpoint.save(batch["offset"], upserted=total, run_id=run_id)
+        # 진행률 표시 (파일 byte 기준)
+        if batches_done % 10 == 1:
+            progress = batch["offset"] / file_size * 100 if file_size else 100.0
+            print(f"  - 진행률: {total}건 적재, {batch['offset']}/{file_size} bytes ({progress:.1f}%)")
+
+    count_tokens = tokenizer_counter(encoder.model.tokenizer) if INGEST_TOKEN_CHUNKS else None
+    max_tokens = passage_budget(count_tokens) if count_tokens is not None else None
+    batches = iter_batches(
+        jsonl_path, BATCH_SIZE, start_offset, manifest=manifest, run_id=run_id,
+        count_tokens=count_tokens, max_tokens=max_tokens,
+    )
+    started = time.perf_counter()
+    with encoder:
+        run_pipeline(batches, embed, upsert, on_committed=committed)
+    elapsed = time.perf_counter() - started
+
+    # 6. 원본을 끝까지 읽었으므로 이번 run에 안 나온 id는 컬렉션에서 삭제
+    removed = delete_stale(collection, manifest, run_id) if manifest is not None else 0
+    checkpoint.clear()
+
+    if not total and not removed and not start_offset:
+        print("[!] 새로 적재하거나 삭제할 데이터가 없습니다.")
+        return
 
     print("="*60)
-    print(f"[완료] '{chroma_dir}' 경로에 {total}개 데이터 적재가 끝났습니다.")
+    print(f"[완료] '{chroma_dir}' 경로에 {total}개 데이터 적재(신규/변경), {removed}개 삭제가 끝났습니다.")
+    print(f"[*] 처리량: 전체 {total / elapsed if elapsed else 0:.1f} chunks/sec ({elapsed:.1f}s), "
+          f"임베딩 {encoder.throughput():.1f} chunks/sec")
     print("이제 main_1.py를 실행하여 검색할 수 있습니다.")
 
 if __name__ == "__main__":
@@ -1,13 +1,29 @@
 #document_parsing.py
 import json
+import multiprocessing
 import os
 import re
+import threading
 import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import numpy as np
 import pdfplumber
 from operator import itemgetter
 from lxml import etree
+import sys
 from typing import Dict, List, Any, Optional
 
+# 이 파일을 직접 실행해도 utils 패키지를 찾도록 프로젝트 루트를 경로에 추가
+_project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if _project_root not in sys.path: sys.path.append(_project_root)
+from utils.parse_cache import cached_parse
+
+try:
+    import pypdfium2 as pdfium
+except ImportError:
+    pdfium = None
+
 # ==========================================================
 # 1. 기존 WORD 파싱 로직 (수정 없이 그대로 유지)
 # ==========================================================
@@ -24,9 +40,9 @@ NS = {
 def read_xml(z: zipfile.ZipFile, path: str) -> etree._Element:
     return etree.fromstring(z.read(path))
 
-def parse_document_rels(z: zipfile.ZipFile) -> Dict[str, str]:
+def parse_document_rels(z: zipfile.ZipFile, members=None) -> Dict[str, str]:
     rels_path = "word/_rels/document.xml.rels"
-    if rels_path not in z.namelist(): return {}
+    if rels_path not in (members if members is not None else z.namelist()): return {}
     root = read_xml(z, rels_path)
     rid_to_target = {}
     for rel in root.findall("rel:Relationship", namespaces=NS):
@@ -34,9 +50,14 @@ def parse_document_rels(z: zipfile.ZipFile) -> Dict[str, str]:
         if rid and target: rid_to_target[rid] = target
     return rid_to_target
 
+# 문단마다 findall 경로를 다시 해석하지 않도록 미리 컴파일
+_XP_RUN_TEXT = etree.XPath(".//w:t/text()", namespaces=NS)
+_XP_VML_TEXT = etree.XPath(".//w:pict//v:textbox//w:t/text()", namespaces=NS)
+_XP_DRAWING_TEXT = etree.XPath(".//w:drawing//a:t/text()", namespaces=NS)
+_XP_WPS_TEXT = etree.XPath(".//wps:txbx//w:t/text()", namespaces=NS)
+
 def get_text_from_runs(p_elm: etree._Element) -> str:
-    texts = [t.text for t in p_elm.findall(".//w:t", namespaces=NS) if t.text]
-    return "".join(texts).strip()
+    return "".join(_XP_RUN_TEXT(p_elm)).strip()
 
 def extract_image_rids_from_paragraph(p_elm: etree._Element) -> List[str]:
     rids = []
@@ -48,11 +69,16 @@ def extract_image_rids_from_paragraph(p_elm: etree._Element) -> List[str]:
         if rid not in seen: uniq.append(rid); seen.add(rid)
     return uniq
 
-def save_image_by_rid(z, rid, rid_to_target, media_out_dir, index):
+def resolve_image_path(rid, rid_to_target, members):
+    # rid → zip 내부 경로 (members: z.namelist()로 만든 set, 없는 파일이면 None)
     target = rid_to_target.get(rid)
     if not target: return None
     zip_img_path = target if target.startswith("word/") else f"word/{target}"
-    if zip_img_path not in z.namelist(): return None
+    return zip_img_path if zip_img_path in members else None
+
+def save_image_by_rid(z, rid, rid_to_target, media_out_dir, index, members=None):
+    zip_img_path = resolve_image_path(rid, rid_to_target, members if members is not None else set(z.namelist()))
+    if not zip_img_path: return None
     img_bytes = z.read(zip_img_path)
     base_name = os.path.basename(zip_img_path)
     safe_base = re.sub(r"[^a-zA-Z0-9._-]+", "_", base_name)
@@ -63,12 +89,9 @@ def save_image_by_rid(z, rid, rid_to_target, media_out_dir, index):
 
 def extract_textboxes_from_paragraph(p_elm: etree._Element) -> List[str]:
     results = []
-    vml = [t.text for t in p_elm.findall(".//w:pict//v:textbox//w:t", namespaces=NS) if t.text]
-    if vml: results.append("".join(vml).strip())
-    draw = [t.text for t in p_elm.findall(".//w:drawing//a:t", namespaces=NS) if t.text]
-    if draw: results.append("".join(draw).strip())
-    wps = [t.text for t in p_elm.findall(".//wps:txbx//w:t", namespaces=NS) if t.text]
-    if wps: results.append("".join(wps).strip())
+    for xp in (_XP_VML_TEXT, _XP_DRAWING_TEXT, _XP_WPS_TEXT):
+        texts = xp(p_elm)
+        if texts: results.append("".join(texts).strip())
     uniq = []; seen = set()
     for s in results:
         s2 = s.strip()
@@ -82,41 +105,75 @@ def parse_table(tbl_elm: etree._Element) -> Dict[str, Any]:
         rows.append(row_cells)
     return {"type": "table", "rows": rows}
 
-def parse_docx_to_blocks(docx_path: str, out_dir: str) -> Dict[str, Any]:
-    # 이미지 저장 폴더는 parsing/media_파일명 형식으로 분리
-    media_out_dir = os.path.join(out_dir, "media_" + os.path.basename(docx_path))
-    os.makedirs(media_out_dir, exist_ok=True)
+# images: "save"(기본, out_dir/media_파일명/ 에 저장) / "lazy"(경로·크기만, 필요 시 load_docx_image) / "skip"(이미지 블록 생략)
+DOCX_IMAGE_MODES = ("save", "lazy", "skip")
+
+def _docx_blocks_from_element(child, images, emit_image):
+    tag = etree.QName(child).localname
+    if tag == "tbl": yield parse_table(child); return
+    text = get_text_from_runs(child)
+    if text: yield {"type": "paragraph", "text": text}
+    for tb in extract_textboxes_from_paragraph(child): yield {"type": "textbox", "text": tb}
+    if images != "skip":
+        for rid in extract_image_rids_from_paragraph(child): yield emit_image(rid)
+
+def iter_docx_blocks(docx_path: str, out_dir: Optional[str] = None, images: str = "save"):
+    """
+    word/document.xml을 iterparse로 읽으며 body 직속 p/tbl 블록을 1개씩 yield.
+    처리한 요소는 바로 clear() 하고 앞 형제도 지워서 문서 전체 트리를 메모리에 올리지 않는다.
+    """
+    if images not in DOCX_IMAGE_MODES: raise ValueError(f"Unknown images mode: {images}")
+    media_out_dir = None
+    if images == "save":
+        # 이미지 저장 폴더는 parsing/media_파일명 형식으로 분리
+        media_out_dir = os.path.join(out_dir or "tmp", "media_" + os.path.basename(docx_path))
+        os.makedirs(media_out_dir, exist_ok=True)
+    body_tag = f"{{{NS['w']}}}body"
     with zipfile.ZipFile(docx_path) as z:
-        doc_root = read_xml(z, "word/document.xml")
-        rid_to_target = parse_document_rels(z)
-        body = doc_root.find(".//w:body", namespaces=NS)
-        blocks = []; img_counter = 0
-        for child in body:
-            tag = etree.QName(child).localname
-            if tag == "p":
-                text = get_text_from_runs(child)
-                if text: blocks.append({"type": "paragraph", "text": text})
-                for tb in extract_textboxes_from_paragraph(child): blocks.append({"type": "textbox", "text": tb})
-                for rid in extract_image_rids_from_paragraph(child):
-                    img_counter += 1
-                    img_block = save_image_by_rid(z, rid, rid_to_target, media_out_dir, img_counter)
-                    blocks.append(img_block if img_block else {"type": "image_ref", "rid": rid, "note": "missing"})
-            elif tag == "tbl": blocks.append(parse_table(child))
-    return {"source": os.path.basename(docx_path), "blocks": blocks}
+        members = set(z.namelist())
+        rid_to_target = parse_document_rels(z, members)
+        img_counter = 0
+
+        def emit_image(rid):
+            nonlocal img_counter
+            img_counter += 1
+            if images == "save":
+                img_block = save_image_by_rid(z, rid, rid_to_target, media_out_dir, img_counter, members)
+            else:
+                path = resolve_image_path(rid, rid_to_target, members)
+                img_block = path and {"type": "image", "rid": rid, "path_in_docx": path, "saved_as": None, "bytes": z.getinfo(path).file_size}
+            return img_block if img_block else {"type": "image_ref", "rid": rid, "note": "missing"}
+
+        with z.open("word/document.xml") as f:
+            for _, elem in etree.iterparse(f, events=("end",), tag=(f"{{{NS['w']}}}p", f"{{{NS['w']}}}tbl"), huge_tree=True):
+                parent = elem.getparent()
+                if parent is None or parent.tag != body_tag: continue
+                yield from _docx_blocks_from_element(elem, images, emit_image)
+                elem.clear()
+                while elem.getprevious() is not None: del parent[0]
+
+def parse_docx_to_blocks(docx_path: str, out_dir: str = "tmp", images: str = "save", use_cache: bool = True) -> Dict[str, Any]:
+    # images="save"는 디스크에 이미지를 쓰는 부수효과가 있어 파싱 캐시를 쓰지 않음
+    run = lambda: {"source": os.path.basename(docx_path), "blocks": list(iter_docx_blocks(docx_path, out_dir, images))}
+    if not use_cache or images == "save": return run()
+    return cached_parse(docx_path, {"kind": "docx", "images": images}, run)
+
+def load_docx_image(docx_path: str, path_in_docx: str) -> bytes:
+    # images="lazy" 블록의 path_in_docx로 실제 이미지 bytes를 읽음
+    with zipfile.ZipFile(docx_path) as z: return z.read(path_in_docx)
 
 # ==========================================================
 # 2. 기존 PDF 파싱 로직 (수정 없이 그대로 유지)
 # ==========================================================
 def filter_overlapping_tables(tables):
+    # 다른 표를 (1pt 오차 내에서) 감싸는 바깥 표는 제거. contains[i, j]: i가 j를 감쌈
     if not tables: return []
-    indices_to_remove = set()
-    for i, outer in enumerate(tables):
-        for j, inner in enumerate(tables):
-            if i == j: continue
-            if (outer.bbox[0] <= inner.bbox[0] + 1 and outer.bbox[1] <= inner.bbox[1] + 1 and
-                outer.bbox[2] >= inner.bbox[2] - 1 and outer.bbox[3] >= inner.bbox[3] - 1):
-                indices_to_remove.add(i); break 
-    return [t for i, t in enumerate(tables) if i not in indices_to_remove]
+    b = np.array([t.bbox for t in tables], dtype=float)
+    contains = ((b[:, None, 0] <= b[None, :, 0] + 1) & (b[:, None, 1] <= b[None, :, 1] + 1) &
+                (b[:, None, 2] >= b[None, :, 2] - 1) & (b[:, None, 3] >= b[None, :, 3] - 1))
+    np.fill_diagonal(contains, False)
+    remove = contains.any(axis=1)
+    return [t for i, t in enumerate(tables) if not remove[i]]
 
 def is_inside_bbox(word, bboxes):
     w_cx, w_cy = (word['x0'] + word['x1']) / 2, (word['top'] + word['bottom']) / 2
@@ -124,43 +181,238 @@ def is_inside_bbox(word, bboxes):
         if (b[0] <= w_cx <= b[2]) and (b[1] <= w_cy <= b[3]): return True
     return False
 
+def words_outside_bboxes(words, bboxes):
+    # is_inside_bbox와 같은 판정(단어 중심점이 bbox 안)을 단어 × 표 배열 연산으로 한 번에 처리
+    if not words or not bboxes: return list(words)
+    w = np.array([(x['x0'], x['x1'], x['top'], x['bottom']) for x in words], dtype=float)
+    cx = ((w[:, 0] + w[:, 1]) / 2)[:, None]; cy = ((w[:, 2] + w[:, 3]) / 2)[:, None]
+    b = np.asarray(bboxes, dtype=float)
+    inside = ((b[:, 0] <= cx) & (cx <= b[:, 2]) & (b[:, 1] <= cy) & (cy <= b[:, 3])).any(axis=1)
+    return [x for x, hit in zip(words, inside) if not hit]
+
 def table_to_markdown(table_data):
     if not table_data: return ""
     return "\n".join(["| " + " | ".join([str(cell).replace('\n', ' ').strip() if cell else "" for cell in row]) + " |" for row in table_data])
 
-def extract_text_from_pdf(pdf_path):
-    all_pages_data = []
+# ----------------------------------------------------------
+# 단어 → 줄 묶기 / 다단 읽기 순서 (parsing.py와 공용)
+# ----------------------------------------------------------
+LINE_Y_TOLERANCE = 5
+# 켜면 페이지 가운데의 빈 세로 띠(gutter)를 찾아 2단 레이아웃을 왼쪽 단 → 오른쪽 단 순서로 읽음.
+# 항목/값이 좌우로 떨어진 서식 문서가 2단으로 오인될 수 있어 기본은 끔.
+PDF_DETECT_COLUMNS = os.getenv("PDF_DETECT_COLUMNS", "0").lower() in ("1", "true", "yes")
+COLUMN_MIN_GAP = 12.0
+
+def group_words_into_lines(words, y_tolerance=LINE_Y_TOLERANCE, sort=False):
+    # 바로 앞 단어와 top 차이가 y_tolerance 이상이면 줄바꿈. sort=True면 (top, x0) stable 정렬 후 묶음
+    if not words: return []
+    tops = np.fromiter(map(itemgetter("top"), words), dtype=float, count=len(words))
+    if sort:
+        x0s = np.fromiter(map(itemgetter("x0"), words), dtype=float, count=len(words))
+        order = np.lexsort((x0s, tops)); tops = tops[order]
+        words = [words[i] for i in order.tolist()]
+    bounds = [0] + (np.flatnonzero(~(np.abs(np.diff(tops)) < y_tolerance)) + 1).tolist() + [len(words)]
+    return [words[a:b] for a, b in zip(bounds[:-1], bounds[1:])]
+
+def find_column_gutter(words, min_gap=COLUMN_MIN_GAP):
+    # 단어 x구간의 합집합에서 가운데(30~70%)에 있는 가장 넓은 빈 띠의 중앙 x. 양쪽 단 모두 단어가 20% 이상이어야 함
+    if len(words) < 20: return None
+    x0 = np.fromiter((w["x0"] for w in words), dtype=float, count=len(words))
+    x1 = np.fromiter((w["x1"] for w in words), dtype=float, count=len(words))
+    left, width = x0.min(), x1.max() - x0.min()
+    if width <= 0: return None
+    order = np.argsort(x0, kind="stable")
+    gap_start = np.maximum.accumulate(x1[order])[:-1]; gap_end = x0[order][1:]
+    gap = gap_end - gap_start; mid = (gap_start + gap_end) / 2
+    ok = (gap >= min_gap) & (mid >= left + 0.3 * width) & (mid <= left + 0.7 * width)
+    if not ok.any(): return None
+    split = float(mid[np.flatnonzero(ok)[np.argmax(gap[ok])]])
+    n_left = int(((x0 + x1) / 2 < split).sum())
+    if min(n_left, len(words) - n_left) < 0.2 * len(words): return None
+    return split
+
+def column_of(x0, x1, gutter):
+    # gutter 오른쪽에 완전히 있으면 1, 아니면 0 (gutter를 가로지르는 표/그림은 왼쪽 단에 붙임)
+    return 1 if gutter is not None and x0 >= gutter else 0
+
+def words_to_line_items(words, sort=False, detect_columns=None):
+    # 단어 → [{"type": "text", "top", "col", "text"}], gutter. 2단이면 단별로 따로 줄을 묶는다
+    detect_columns = PDF_DETECT_COLUMNS if detect_columns is None else detect_columns
+    gutter = find_column_gutter(words) if detect_columns else None
+    if gutter is None: groups = [(0, words)]
+    else:
+        groups = [(0, [w for w in words if (w["x0"] + w["x1"]) / 2 < gutter]),
+                  (1, [w for w in words if (w["x0"] + w["x1"]) / 2 >= gutter])]
+    items = []
+    for col, col_words in groups:
+        for line in group_words_into_lines(col_words, sort=sort):
+            merged_text = " ".join([w["text"] for w in line]).strip()
+            if merged_text: items.append({"type": "text", "top": line[0]["top"], "col": col, "text": merged_text})
+    return items, gutter
+
+def extract_page_contents(page, page_idx, doc_id, detect_columns=None):
+    raw_tables = page.find_tables()
+    tables = filter_overlapping_tables(raw_tables)
+    table_bboxes = [t.bbox for t in tables]
+    words = page.extract_words()
+    words_outside_tables = words_outside_bboxes(words, table_bboxes)
+    line_items, gutter = words_to_line_items(words_outside_tables, detect_columns=detect_columns)
+    page_contents = []
+    for table in tables:
+        extracted_data = table.extract()
+        if not extracted_data: continue
+        col = column_of(table.bbox[0], table.bbox[2], gutter)
+        if len(extracted_data) == 1 and len(extracted_data[0]) == 1:
+            page_contents.append({"type": "text", "top": table.bbox[1], "col": col, "text": str(extracted_data[0][0]).strip().replace('\n', ' ')})
+        else:
+            md_table = table_to_markdown(extracted_data)
+            if md_table: page_contents.append({"type": "table", "top": table.bbox[1], "col": col, "text": f"\n[TABLE START]\n{md_table}\n[TABLE END]"})
+    for img in page.images:
+        if img['height'] > 10 and img['width'] > 10:
+            page_contents.append({"type": "image", "top": img['top'], "col": column_of(img['x0'], img['x1'], gutter), "text": "\n[IMAGE: 그림/도표/이미지 포함됨]\n"})
+    page_contents.extend(line_items)
+    page_contents.sort(key=itemgetter("col", "top"))
+    return {"doc_id": doc_id, "page_index": page_idx, "texts": [item["text"] for item in page_contents]}
+
+def _resolve_page_range(num_pages, page_range):
+    if page_range is None: return 0, num_pages
+    start, end = page_range
+    start = max(0, int(start or 0)); end = num_pages if end is None else min(num_pages, int(end))
+    return start, max(start, end)
+
+def iter_pdf_pages(pdf_path, page_range=None, detect_columns=None):
+    """
+    페이지 dict를 1장씩 yield 하는 generator (순차 처리).
+    처리한 페이지는 바로 close() 해서 pdfplumber 캐시가 문서 전체로 쌓이지 않게 한다.
+    """
+    doc_id = os.path.basename(pdf_path)
+    with pdfplumber.open(pdf_path) as pdf:
+        start, end = _resolve_page_range(len(pdf.pages), page_range)
+        for i in range(start, end):
+            page = pdf.pages[i]
+            page_data = extract_page_contents(page, i, doc_id, detect_columns=detect_columns)
+            page.close()
+            yield page_data
+
+def _extract_page_range(pdf_path, start, end, detect_columns=None):
+    # 프로세스 워커: 파일을 각자 열어서 [start, end) 페이지만 처리
+    return list(iter_pdf_pages(pdf_path, (start, end), detect_columns=detect_columns))
+
+# ----------------------------------------------------------
+# 텍스트 전용 빠른 추출 (검색 쿼리 / 코퍼스 스윕용, 표·이미지 탐지 생략)
+# ----------------------------------------------------------
+def _text_lines(text):
+    # \x02: pdfium이 줄끝 하이픈 분리를 표시하는 문자
+    text = text.replace("\x02", "-").replace("\r\n", "\n").replace("\r", "\n")
+    return [line.strip() for line in text.split("\n") if line.strip()]
+
+def iter_pdf_pages_pdfium(pdf_path, page_range=None):
+    # pypdfium2 텍스트 레이어만 읽음 (pdfplumber 대비 수십 배 빠름)
+    doc_id = os.path.basename(pdf_path)
+    pdf = pdfium.PdfDocument(pdf_path)
+    try:
+        start, end = _resolve_page_range(len(pdf), page_range)
+        for i in range(start, end):
+            page = pdf[i]; textpage = page.get_textpage()
+            try: texts = _text_lines(textpage.get_text_bounded())
+            finally: textpage.close(); page.close()
+            yield {"doc_id": doc_id, "page_index": i, "texts": texts}
+    finally:
+        pdf.close()
+
+def iter_pdf_text_pages(pdf_path, page_range=None):
+    # pypdfium2가 있으면 텍스트 레이어, 없으면 pdfplumber 단어 → 줄 묶기 (find_tables/이미지 생략)
+    if pdfium is not None:
+        yield from iter_pdf_pages_pdfium(pdf_path, page_range); return
     doc_id = os.path.basename(pdf_path)
     with pdfplumber.open(pdf_path) as pdf:
-        for page_idx, page in enumerate(pdf.pages):
-            raw_tables = page.find_tables()
-            tables = filter_overlapping_tables(raw_tables)
-            table_bboxes = [t.bbox for t in tables]
-            page_contents = []
-            for table in tables:
-                extracted_data = table.extract()
-                if not extracted_data: continue
-                if len(extracted_data) == 1 and len(extracted_data[0]) == 1:
-                    page_contents.append({"type": "text", "top": table.bbox[1], "text": str(extracted_data[0][0]).strip().replace('\n', ' ')})
-                else:
-                    md_table = table_to_markdown(extracted_data)
-                    if md_table: page_contents.append({"type": "table", "top": table.bbox[1], "text": f"\n[TABLE START]\n{md_table}\n[TABLE END]"})
-            for img in page.images:
-                if img['height'] > 10 and img['width'] > 10:
-                    page_contents.append({"type": "image", "top": img['top'], "text": "\n[IMAGE: 그림/도표/이미지 포함됨]\n"})
-            words = page.extract_words()
-            words_outside_tables = [w for w in words if not is_inside_bbox(w, table_bboxes)]
-            if words_outside_tables:
-                lines = []; current_line = [words_outside_tables[0]]
-                for i in range(1, len(words_outside_tables)):
-                    if abs(words_outside_tables[i]["top"] - words_outside_tables[i - 1]["top"]) < 5: current_line.append(words_outside_tables[i])
-                    else: lines.append(current_line); current_line = [words_outside_tables[i]]
-                lines.append(current_line)
-                for line in lines:
-                    merged_text = " ".join([w["text"] for w in line]).strip()
-                    if merged_text: page_contents.append({"type": "text", "top": line[0]["top"], "text": merged_text})
-            page_contents.sort(key=itemgetter("top"))
-            all_pages_data.append({"doc_id": doc_id, "page_index": page_idx, "texts": [item["text"] for item in page_contents]})
+        start, end = _resolve_page_range(len(pdf.pages), page_range)
+        for i in range(start, end):
+            page = pdf.pages[i]
+            line_items, _ = words_to_line_items(page.extract_words(), detect_columns=False)
+            page.close()
+            yield {"doc_id": doc_id, "page_index": i, "texts": [item["text"] for item in line_items]}
+
+def take_pages_until(pages, max_chars):
+    # 누적 글자 수가 max_chars 이상이 되면 남은 페이지는 읽지 않고 generator를 닫는다
+    taken, total = [], 0
+    try:
+        for page in pages:
+            taken.append(page); total += sum(len(t) for t in page["texts"])
+            if total >= max_chars: break
+    finally:
+        if hasattr(pages, "close"): pages.close()
+    return taken
+
+# ----------------------------------------------------------
+# 페이지 병렬 처리 (대용량 PDF)
+# ----------------------------------------------------------
+# 이보다 페이지가 적으면 shard 전송/결과 pickle 비용이 더 커서 순차 처리
+PDF_PARALLEL_MIN_PAGES = int(os.getenv("PDF_PARALLEL_MIN_PAGES", "16"))
+# 워커당 shard 수 (페이지 난이도 편차를 흡수하도록 워커 수보다 잘게 나눔)
+PDF_SHARDS_PER_WORKER = 2
+
+# 프로세스 풀은 모듈 전역 1개를 처음 쓸 때 만들어 재사용 (요청마다 spawn하면 워커마다 pdfplumber/numpy를 다시 import)
+_pdf_pool = None
+_pdf_pool_lock = threading.Lock()
+
+def get_pdf_pool(workers):
+    # 처음 호출한 쪽의 workers로 크기를 정한다. fork 대신 spawn: 서버 프로세스의 스레드/모델 상태를 복제하지 않도록
+    global _pdf_pool
+    with _pdf_pool_lock:
+        if _pdf_pool is None:
+            _pdf_pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+        return _pdf_pool
+
+def shutdown_pdf_pool(wait=True):
+    # 앱 종료 시 호출. 워커가 죽어 풀이 깨졌을 때도 버리고 다음 요청에서 새로 만든다
+    global _pdf_pool
+    with _pdf_pool_lock:
+        pool, _pdf_pool = _pdf_pool, None
+    if pool is not None: pool.shutdown(wait=wait, cancel_futures=True)
+
+def pdf_cache_options(backend, page_range=None, max_chars=None, detect_columns=None):
+    # 파싱 캐시 키에 들어가는 PDF 옵션 (detect_columns는 pdfplumber 출력에만 영향)
+    if backend == "pdfplumber": detect_columns = PDF_DETECT_COLUMNS if detect_columns is None else bool(detect_columns)
+    else: detect_columns = None
+    return {"kind": "pdf", "backend": backend, "page_range": list(page_range) if page_range is not None else None,
+            "max_chars": max_chars, "detect_columns": detect_columns}
+
+def extract_text_from_pdf(pdf_path, workers=None, page_range=None, detect_columns=None, mode="full", max_chars=None, use_cache=True):
+    """
+    PDF를 페이지별 {"doc_id", "page_index", "texts"} 리스트로 변환.
+    workers > 1 이면 페이지 구간을 프로세스 풀에 나눠 처리하고 페이지 순서대로 합친다.
+    page_range=(start, end)는 0-based, end 미포함 (end=None이면 마지막 페이지까지).
+    detect_columns=None이면 PDF_DETECT_COLUMNS 설정을 따른다.
+    mode="fast"면 표/이미지 없이 텍스트만 순차 추출 (검색 쿼리용).
+    max_chars가 있으면 누적 글자 수가 그 이상이 된 페이지까지만 읽는다 (순차 처리).
+    같은 내용의 파일 + 같은 옵션이면 파싱 캐시(utils/parse_cache.py) 결과를 돌려준다.
+    """
+    if mode not in ("full", "fast"): raise ValueError(f"Unknown PDF mode: {mode}")
+    run = lambda: _extract_text_from_pdf(pdf_path, workers, page_range, detect_columns, mode, max_chars)
+    if not use_cache: return run()
+    backend = "pdfplumber" if mode == "full" else ("pdfium" if pdfium is not None else "pdfplumber-text")
+    return cached_parse(pdf_path, pdf_cache_options(backend, page_range, max_chars, detect_columns), run)
+
+def _extract_text_from_pdf(pdf_path, workers, page_range, detect_columns, mode, max_chars):
+    if mode == "fast" or max_chars is not None:
+        pages = iter_pdf_text_pages(pdf_path, page_range) if mode == "fast" else iter_pdf_pages(pdf_path, page_range, detect_columns=detect_columns)
+        return take_pages_until(pages, max_chars) if max_chars is not None else list(pages)
+    with pdfplumber.open(pdf_path) as pdf:
+        start, end = _resolve_page_range(len(pdf.pages), page_range)
+    if not workers or workers <= 1 or end - start < PDF_PARALLEL_MIN_PAGES:
+        return list(iter_pdf_pages(pdf_path, (start, end), detect_columns=detect_columns))
+
+    num_shards = min(end - start, workers * PDF_SHARDS_PER_WORKER)
+    step = -(-(end - start) // num_shards)
+    shards = [(i, min(i + step, end)) for i in range(start, end, step)]
+    all_pages_data = []
+    try:
+        futures = [get_pdf_pool(workers).submit(_extract_page_range, pdf_path, a, b, detect_columns) for a, b in shards]
+        for fut in futures: all_pages_data.extend(fut.result())
+    except BrokenProcessPool:
+        shutdown_pdf_pool(wait=False)
+        raise
     return all_pages_data
 
 # ==========================================================
@@ -0,0 +1,426 @@
+import atexit
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from dotenv import load_dotenv
+from sentence_transformers import SentenceTransformer
+
+load_dotenv()
+
+# =========================================================
+# Embedding model registry (프로세스당 1회 로딩)
+# =========================================================
+DEFAULT_EMBED_MODEL_NAME = "intfloat/multilingual-e5-base"
+# cpu / cuda / mps ... (비어 있으면 sentence-transformers 자동 선택)
+EMBED_DEVICE = os.getenv("EMBED_DEVICE") or None
+
+_models: Dict[Tuple[str, Optional[str]], SentenceTransformer] = {}
+_lock = threading.Lock()
+
+
+def get_embed_model(model_name: str = DEFAULT_EMBED_MODEL_NAME, device: Optional[str] = None) -> SentenceTransformer:
+    """
+    (model_name, device) 단위로 SentenceTransformer를 한 번만 로딩해 재사용한다.
+    여러 요청 스레드가 동시에 처음 호출해도 가중치는 한 번만 올라간다.
+    """
+    model_name = model_name or DEFAULT_EMBED_MODEL_NAME
+    device = device or EMBED_DEVICE
+    key = (model_name, device)
+
+    model = _models.get(key)
+    if model is not None:
+        return model
+
+    with _lock:
+        model = _models.get(key)
+        if model is None:
+            print(f"[*] Embed model loading: {model_name} (device={device or 'auto'})")
+            model = SentenceTransformer(model_name, device=device)
+            _models[key] = model
+    return model
+
+
+def warmup(*model_names: str, device: Optional[str] = None) -> None:
+    """서버 기동 시 모델을 미리 올리고 더미 쿼리 1건을 인코딩해 첫 요청 지연을 없앤다."""
+    for name in model_names or (DEFAULT_EMBED_MODEL_NAME,):
+        model = get_embed_model(name, device=device)
+        model.encode(["query: warmup"])
+
+
+def loaded_models() -> List[str]:
+    """현재 프로세스에 로딩된 모델 목록 (디버깅/헬스체크용)."""
+    return [f"{name}@{device or 'auto'}" for name, device in _models.keys()]
+
+
+# =========================================================
+# Embedding cache (query 임베딩 재사용)
+# =========================================================
+EMBED_CACHE_SIZE = int(os.getenv("EMBED_CACHE_SIZE", "2048"))
+EMBED_CACHE_TTL_SEC = float(os.getenv("EMBED_CACHE_TTL_SEC", "86400"))
+# 설정 시 memmap(.npy) 디스크 티어 사용. 파일을 쓰는 프로세스는 하나여야 하므로
+# uvicorn 워커가 여러 개면 워커별로 다른 경로를 주거나 비워둔다.
+EMBED_CACHE_DIR = os.getenv("EMBED_CACHE_DIR") or None
+EMBED_CACHE_DISK_CAPACITY = int(os.getenv("EMBED_CACHE_DISK_CAPACITY", "50000"))
+
+_ws_re = re.compile(r"\s+")
+
+
+def normalize_text(text: str) -> str:
+    """캐시 키/인코딩 입력용 정규화 (NFC + 공백 압축)."""
+    return _ws_re.sub(" ", unicodedata.normalize("NFC", text or "")).strip()
+
+
+def make_cache_key(model_name: str, prefix: str, text: str, normalize_embeddings: bool = False) -> str:
+    digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+    return f"{model_name}|{prefix}|{int(bool(normalize_embeddings))}|{digest}"
+
+
+class _DiskTier:
+    """고정 크기 ring buffer 형태의 memmap 벡터 저장소 (index.json + vectors.npy)."""
+
+    def __init__(self, cache_dir: str, capacity: int):
+        self.cache_dir = cache_dir
+        self.capacity = max(1, capacity)
+        self.index_path = os.path.join(cache_dir, "index.json")
+        self.vectors_path = os.path.join(cache_dir, "vectors.npy")
+        self.dim: Optional[int] = None
+        self.next_slot = 0
+        self.slots: Dict[str, Tuple[int, float]] = {}
+        self._slot_keys: Dict[int, str] = {}
+        self._vectors: Optional[np.memmap] = None
+        self._dirty = 0
+
+        os.makedirs(cache_dir, exist_ok=True)
+        self._load()
+
+    def _load(self) -> None:
+        if not (os.path.exists(self.index_path) and os.path.exists(self.vectors_path)):
+            return
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            vectors = np.load(self.vectors_path, mmap_mode="r+")
+            if vectors.shape[0] != self.capacity or vectors.shape[1] != int(meta["dim"]):
+                print("[EmbedCache] disk tier shape changed, starting empty")
+                return
+            self.dim = int(meta["dim"])
+            self.next_slot = int(meta.get("next_slot", 0))
+            self.slots = {k: (int(v[0]), float(v[1])) for k, v in meta.get("slots", {}).items()}
+            self._slot_keys = {slot: k for k, (slot, _) in self.slots.items()}
+            self._vectors = vectors
+        except Exception as e:
+            print(f"[EmbedCache] disk tier load failed ({e}), starting empty")
+            self.slots, self._slot_keys, self._vectors = {}, {}, None
+
+    def _ensure_vectors(self, dim: int) -> bool:
+        if self._vectors is None:
+            self.dim = dim
+            self._vectors = np.lib.format.open_memmap(
+                self.vectors_path, mode="w+", dtype=np.float32, shape=(self.capacity, dim)
+            )
+        return self.dim == dim
+
+    def get(self, key: str, ttl_sec: float) -> Optional[np.ndarray]:
+        hit = self.slots.get(key)
+        if hit is None or self._vectors is None:
+            return None
+        slot, ts = hit
+        if ttl_sec > 0 and time.time() - ts > ttl_sec:
+            self.slots.pop(key, None)
+            self._slot_keys.pop(slot, None)
+            return None
+        return np.array(self._vectors[slot])
+
+    def put(self, key: str, vec: np.ndarray) -> None:
+        if not self._ensure_vectors(int(vec.shape[-1])):
+            return
+        slot = self.next_slot
+        self.next_slot = (self.next_slot + 1) % self.capacity
+        old_key = self._slot_keys.pop(slot, None)
+        if old_key is not None:
+            self.slots.pop(old_key, None)
+        self._vectors[slot] = vec
+        self.slots[key] = (slot, time.time())
+        self._slot_keys[slot] = key
+        self._dirty += 1
+        if self._dirty >= 64:
+            self.flush()
+
+    def flush(self) -> None:
+        if self._vectors is None or not self._dirty:
+            return
+        self._vectors.flush()
+        tmp_path = self.index_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"dim": self.dim, "next_slot": self.next_slot, "slots": self.slots}, f)
+        os.replace(tmp_path, self.index_path)
+        self._dirty = 0
+
+
+class EmbeddingCache:
+    """
+    thread-safe LRU + TTL 임베딩 캐시.
+    키는 (model, prefix, normalize 여부, 정규화 텍스트 SHA-256)이며 선택적으로 디스크 티어를 둔다.
+    """
+
+    def __init__(
+        self,
+        max_items: int = EMBED_CACHE_SIZE,
+        ttl_sec: float = EMBED_CACHE_TTL_SEC,
+        disk_dir: Optional[str] = EMBED_CACHE_DIR,
+        disk_capacity: int = EMBED_CACHE_DISK_CAPACITY,
+    ):
+        self.max_items = max(0, max_items)
+        self.ttl_sec = ttl_sec
+        self._mem: "OrderedDict[str, Tuple[float, np.ndarray]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk = _DiskTier(disk_dir, disk_capacity) if disk_dir else None
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[np.ndarray]:
+        with self._lock:
+            entry = self._mem.get(key)
+            if entry is not None:
+                ts, vec = entry
+                if self.ttl_sec <= 0 or time.time() - ts <= self.ttl_sec:
+                    self._mem.move_to_end(key)
+                    self.hits += 1
+                    return vec
+                del self._mem[key]
+
+            if self._disk is not None:
+                vec = self._disk.get(key, self.ttl_sec)
+                if vec is not None:
+                    self._put_mem(key, vec)
+                    self.disk_hits += 1
+                    return vec
+
+            self.misses += 1
+            return None
+
+    def put(self, key: str, vec: np.ndarray) -> None:
+        vec = np.asarray(vec, dtype=np.float32).copy()
+        with self._lock:
+            self._put_mem(key, vec)
+            if self._disk is not None:
+                self._disk.put(key, vec)
+
+    def _put_mem(self, key: str, vec: np.ndarray) -> None:
+        if self.max_items == 0:
+            return
+        self._mem[key] = (time.time(), vec)
+        self._mem.move_to_end(key)
+        while len(self._mem) > self.max_items:
+            self._mem.popitem(last=False)
+            self.evictions += 1
+
+    def flush(self) -> None:
+        with self._lock:
+            if self._disk is not None:
+                self._disk.flush()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._mem.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                "size": len(self._mem),
+                "max_items": self.max_items,
+                "ttl_sec": self.ttl_sec,
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round((self.hits + self.disk_hits) / lookups, 4) if lookups else 0.0,
+                "disk_items": len(self._disk.slots) if self._disk is not None else 0,
+            }
+
+
+_cache = EmbeddingCache()
+atexit.register(_cache.flush)
+
+
+def get_embed_cache() -> EmbeddingCache:
+    return _cache
+
+
+def encode(
+    texts: Sequence[str],
+    prefix: str = "query: ",
+    model_name: str = DEFAULT_EMBED_MODEL_NAME,
+    normalize_embeddings: bool = False,
+    use_cache: bool = True,
+) -> np.ndarray:
+    """
+    e5 접두어(query:/passage:)를 붙여 임베딩하되, 캐시에 있는 텍스트는 다시 인코딩하지 않는다.
+    반환값은 model.encode와 같은 (N, dim) ndarray.
+    """
+    model = get_embed_model(model_name)
+    norm_texts = [normalize_text(t) for t in texts]
+    if not use_cache:
+        return model.encode([prefix + t for t in norm_texts], normalize_embeddings=normalize_embeddings)
+
+    keys = [make_cache_key(model_name, prefix, t, normalize_embeddings) for t in norm_texts]
+    found: Dict[str, np.ndarray] = {}
+    for key in dict.fromkeys(keys):
+        vec = _cache.get(key)
+        if vec is not None:
+            found[key] = vec
+
+    # 같은 배치 안의 중복 텍스트도 한 번만 인코딩
+    pending: Dict[str, str] = {}
+    for key, text in zip(keys, norm_texts):
+        if key not in found and key not in pending:
+            pending[key] = text
+
+    if pending:
+        vecs = model.encode([prefix + t for t in pending.values()], normalize_embeddings=normalize_embeddings)
+        for key, vec in zip(pending.keys(), vecs):
+            _cache.put(key, vec)
+            found[key] = vec
+
+    return np.vstack([found[k] for k in keys]) if keys else np.empty((0, 0), dtype=np.float32)
+
+
+# =========================================================
+# 대량 적재용 임베딩 (길이 정렬 배치 + 멀티 프로세스 풀)
+# =========================================================
+# 1이면 현재 프로세스에서 인코딩, 2 이상이면 sentence-transformers multi-process pool (CPU 프로세스 N개)
+EMBED_INGEST_WORKERS = int(os.getenv("EMBED_INGEST_WORKERS", "1"))
+EMBED_INGEST_BATCH_SIZE = int(os.getenv("EMBED_INGEST_BATCH_SIZE", "64"))
+# 배치 하나의 (가장 긴 토큰 수 x 배치 크기) 상한. 0보다 크면 토큰 길이로 정렬해 짧은 chunk일수록 큰 배치로 묶는다
+# (0이면 글자 수로 정렬해 EMBED_INGEST_BATCH_SIZE 고정 배치. 멀티 프로세스 풀은 항상 고정 배치)
+EMBED_INGEST_BATCH_TOKENS = int(os.getenv("EMBED_INGEST_BATCH_TOKENS", "16384"))
+# 워커(프로세스) 1개당 torch intra-op 스레드 수. 0이면 cpu 코어를 워커 수로 나눈 값
+EMBED_TORCH_THREADS = int(os.getenv("EMBED_TORCH_THREADS", "0"))
+
+
+class BulkEncoder:
+    """
+    적재 스크립트용 encoder.
+    한 번에 받은 texts를 길이순으로 정렬해 길이가 비슷한 것끼리 배치로 인코딩하므로 배치 안 padding이 줄어든다.
+    (적재 배치를 인코딩 배치보다 크게 넘길수록 정렬 효과가 커짐) 결과는 원래 순서로 되돌려 반환한다.
+    """
+
+    def __init__(
+        self,
+        model_name: str = DEFAULT_EMBED_MODEL_NAME,
+        workers: int = EMBED_INGEST_WORKERS,
+        batch_size: int = EMBED_INGEST_BATCH_SIZE,
+        batch_tokens: int = EMBED_INGEST_BATCH_TOKENS,
+        torch_threads: int = EMBED_TORCH_THREADS,
+        normalize_embeddings: bool = True,
+    ):
+        self.model_name = model_name
+        self.workers = max(1, workers)
+        self.batch_size = max(1, batch_size)
+        self.batch_tokens = max(0, batch_tokens)
+        self.torch_threads = torch_threads or max(1, (os.cpu_count() or 1) // self.workers)
+        self.normalize_embeddings = normalize_embeddings
+        self.model = get_embed_model(model_name)
+        self._pool = None
+        self.count = 0
+        self.seconds = 0.0
+
+    def start(self) -> "BulkEncoder":
+        if self.workers > 1 and self._pool is None:
+            # 자식 프로세스는 torch import 시점의 OMP_NUM_THREADS를 따르므로 풀 기동 동안만 바꿔 둔다
+            prev = os.environ.get("OMP_NUM_THREADS")
+            os.environ["OMP_NUM_THREADS"] = str(self.torch_threads)
+            try:
+                self._pool = self.model.start_multi_process_pool(target_devices=["cpu"] * self.workers)
+            finally:
+                if prev is None:
+                    os.environ.pop("OMP_NUM_THREADS", None)
+                else:
+                    os.environ["OMP_NUM_THREADS"] = prev
+        elif self.workers == 1 and EMBED_TORCH_THREADS:
+            import torch
+
+            torch.set_num_threads(self.torch_threads)
+        print(f"[*] BulkEncoder: workers={self.workers}, batch_size={self.batch_size}, "
+              f"batch_tokens={self.batch_tokens}, torch_threads={self.torch_threads}")
+        return self
+
+    def stop(self) -> None:
+        if self._pool is not None:
+            self.model.stop_multi_process_pool(self._pool)
+            self._pool = None
+
+    def __enter__(self) -> "BulkEncoder":
+        return self.start()
+
+    def __exit__(self, *exc: Any) -> None:
+        self.stop()
+
+    def _token_lengths(self, texts: Sequence[str]) -> np.ndarray:
+        # special token 포함, max_seq_length에서 잘린 실제 입력 길이
+        encoded = self.model.tokenizer(
+            list(texts), truncation=True, max_length=self.model.max_seq_length, verbose=False,
+        )["input_ids"]
+        return np.fromiter((len(ids) for ids in encoded), dtype=np.int64, count=len(encoded))
+
+    def _buckets(self, sorted_lengths: np.ndarray):
+        # 긴 것부터 정렬돼 있으므로 배치의 첫 항목이 그 배치의 padding 길이
+        start, n = 0, len(sorted_lengths)
+        while start < n:
+            size = max(1, self.batch_tokens // max(1, int(sorted_lengths[start])))
+            yield start, min(n, start + size)
+            start += size
+
+    def encode(self, texts: Sequence[str]) -> np.ndarray:
+        if not texts:
+            return np.empty((0, 0), dtype=np.float32)
+        t0 = time.perf_counter()
+        use_tokens = self._pool is None and self.batch_tokens > 0
+        if use_tokens:
+            lengths = self._token_lengths(texts)
+        else:
+            lengths = np.fromiter((len(t) for t in texts), dtype=np.int64, count=len(texts))
+        # 긴 텍스트부터 (sentence-transformers 내부 정렬과 같은 방향)
+        order = np.argsort(-lengths, kind="stable")
+        sorted_texts = [texts[i] for i in order.tolist()]
+        if self._pool is not None:
+            # 풀은 입력을 chunk_size 단위로 순서대로 나눠 보내므로, 정렬된 순서 그대로 길이가 비슷한 배치가 된다
+            emb = self.model.encode_multi_process(
+                sorted_texts, self._pool, batch_size=self.batch_size,
+                chunk_size=max(self.batch_size, -(-len(sorted_texts) // self.workers)),
+            )
+            if self.normalize_embeddings:
+                emb = emb / np.clip(np.linalg.norm(emb, axis=1, keepdims=True), 1e-12, None)
+        elif use_tokens:
+            emb = np.vstack([
+                self.model.encode(
+                    sorted_texts[a:b], batch_size=b - a,
+                    normalize_embeddings=self.normalize_embeddings, convert_to_numpy=True,
+                )
+                for a, b in self._buckets(lengths[order])
+            ])
+        else:
+            emb = self.model.encode(
+                sorted_texts, batch_size=self.batch_size,
+                normalize_embeddings=self.normalize_embeddings, convert_to_numpy=True,
+            )
+        out = np.empty_like(emb)
+        out[order] = emb
+        self.count += len(texts)
+        self.seconds += time.perf_counter() - t0
+        return out
+
+    def throughput(self) -> float:
+        """지금까지 인코딩한 chunk 수 / 인코딩에 걸린 시간 (chunks/sec)."""
+        return self.count / self.seconds if self.seconds else 0.0
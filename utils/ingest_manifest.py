@@ -0,0 +1,155 @@
+import hashlib
+import json
+import os
+import sqlite3
+import uuid
+from contextlib import closing
+from typing import Any, Dict, List, Sequence
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# =========================================================
+# 적재 manifest (chunk id별 내용 해시 → 바뀐 chunk만 재임베딩)
+# =========================================================
+# scope: 적재 대상 컬렉션 식별자 (예: "chroma_law:8000|law_regulations")
+# run_id: 이번 적재에서 원본에 등장한 id 표시용. 끝까지 읽은 뒤 표시가 없는 id는 원본에서 사라진 것
+INGEST_MANIFEST_PATH = os.getenv("INGEST_MANIFEST_PATH", os.path.join("data", "ingest_manifest.sqlite3"))
+INGEST_INCREMENTAL = os.getenv("INGEST_INCREMENTAL", "true").lower() in {"1", "true", "yes", "y"}
+# SQLite 변수 개수 제한(999)을 넘지 않도록 IN (...) 조회를 나누는 크기
+_SQL_CHUNK = 500
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS ingest_manifest (
+    scope        TEXT NOT NULL,
+    chunk_id     TEXT NOT NULL,
+    content_hash TEXT NOT NULL,
+    seen_run     TEXT,
+    PRIMARY KEY (scope, chunk_id)
+)
+"""
+
+
+def content_hash(*parts: Any) -> str:
+    """문서 텍스트/메타데이터/임베딩 모델명 등 벡터에 영향을 주는 값들의 해시."""
+    material = json.dumps(parts, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha1(material.encode("utf-8")).hexdigest()
+
+
+def new_run_id() -> str:
+    return uuid.uuid4().hex
+
+
+class IngestManifest:
+    """호출마다 짧은 커넥션을 열어 읽기/임베딩/upsert 스레드에서 같이 쓸 수 있게 한다."""
+
+    def __init__(self, scope: str, db_path: str = INGEST_MANIFEST_PATH):
+        self.scope = scope
+        self.db_path = db_path
+        db_dir = os.path.dirname(db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+        with closing(self._connect()) as conn, conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(_SCHEMA)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_ingest_manifest_run ON ingest_manifest(scope, seen_run)")
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    def count(self) -> int:
+        with closing(self._connect()) as conn, conn:
+            return conn.execute("SELECT COUNT(*) FROM ingest_manifest WHERE scope = ?", (self.scope,)).fetchone()[0]
+
+    def filter_changed(self, ids: Sequence[str], hashes: Sequence[str], run_id: str) -> List[bool]:
+        """
+        ids를 이번 run에서 봤다고 표시하고, 새로 생겼거나 해시가 바뀐 id면 True.
+        (해시 갱신은 upsert가 끝난 뒤 record()에서 — 중간에 죽으면 다음 실행에서 다시 임베딩됨)
+        """
+        known: Dict[str, str] = {}
+        with closing(self._connect()) as conn, conn:
+            for i in range(0, len(ids), _SQL_CHUNK):
+                part = list(ids[i:i + _SQL_CHUNK])
+                marks = ",".join("?" for _ in part)
+                known.update(conn.execute(
+                    f"SELECT chunk_id, content_hash FROM ingest_manifest WHERE scope = ? AND chunk_id IN ({marks})",
+                    (self.scope, *part),
+                ).fetchall())
+            conn.executemany(
+                "UPDATE ingest_manifest SET seen_run = ? WHERE scope = ? AND chunk_id = ?",
+                [(run_id, self.scope, cid) for cid in ids if cid in known],
+            )
+        return [known.get(cid) != h for cid, h in zip(ids, hashes)]
+
+    def record(self, ids: Sequence[str], hashes: Sequence[str], run_id: str) -> None:
+        """upsert가 끝난 chunk의 해시를 저장."""
+        with closing(self._connect()) as conn, conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO ingest_manifest (scope, chunk_id, content_hash, seen_run) VALUES (?, ?, ?, ?)",
+                [(self.scope, cid, h, run_id) for cid, h in zip(ids, hashes)],
+            )
+
+    def ids(self) -> List[str]:
+        with closing(self._connect()) as conn, conn:
+            rows = conn.execute("SELECT chunk_id FROM ingest_manifest WHERE scope = ?", (self.scope,)).fetchall()
+        return [r[0] for r in rows]
+
+    def stale_ids(self, run_id: str) -> List[str]:
+        """이번 run에서 한 번도 안 나온 id (원본에서 사라진 chunk). 원본을 끝까지 읽은 뒤에만 호출할 것."""
+        with closing(self._connect()) as conn, conn:
+            rows = conn.execute(
+                "SELECT chunk_id FROM ingest_manifest WHERE scope = ? AND (seen_run IS NULL OR seen_run != ?)",
+                (self.scope, run_id),
+            ).fetchall()
+        return [r[0] for r in rows]
+
+    def remove(self, ids: Sequence[str]) -> None:
+        with closing(self._connect()) as conn, conn:
+            conn.executemany(
+                "DELETE FROM ingest_manifest WHERE scope = ? AND chunk_id = ?",
+                [(self.scope, cid) for cid in ids],
+            )
+
+    def reset(self) -> None:
+        """컬렉션을 새로 만드는 경우(LAW_RECREATE 등) manifest도 비운다."""
+        with closing(self._connect()) as conn, conn:
+            conn.execute("DELETE FROM ingest_manifest WHERE scope = ?", (self.scope,))
+
+
+def reset_if_collection_lost(collection, manifest: IngestManifest) -> bool:
+    """
+    컬렉션 문서 수가 manifest보다 적으면(컬렉션 삭제/초기화, 다른 DB 경로 등) manifest를 비우고 True.
+    manifest만 믿으면 모든 chunk가 '변경 없음'으로 판정돼 비어 있는 컬렉션에 아무것도 적재되지 않는다.
+    """
+    known = manifest.count()
+    stored = collection.count()
+    if stored >= known:
+        return False
+    print(f"[Manifest] 컬렉션 문서 수({stored}) < manifest id 수({known}) → manifest를 비우고 전체 적재합니다.")
+    manifest.reset()
+    return True
+
+
+def delete_stale(collection, manifest: IngestManifest, run_id: str, batch_size: int = 1000) -> int:
+    """원본에서 사라진 id를 컬렉션과 manifest에서 삭제하고 개수를 반환."""
+    stale = manifest.stale_ids(run_id)
+    if stale and len(stale) == manifest.count():
+        # 원본 경로 실수/빈 파일로 컬렉션 전체가 지워지는 것을 막음 (전부 지우려면 recreate 사용)
+        print(f"[Manifest] 모든 id({len(stale)}개)가 원본에서 사라짐 → 삭제를 건너뜁니다.")
+        return 0
+    for i in range(0, len(stale), batch_size):
+        part = stale[i:i + batch_size]
+        collection.delete(ids=part)
+        manifest.remove(part)
+    return len(stale)
+
+
+def delete_all(collection, manifest: IngestManifest, batch_size: int = 1000) -> int:
+    """manifest의 id를 컬렉션과 manifest에서 모두 삭제 (id 체계가 바뀌어 더 이상 안 쓰는 scope 정리용)."""
+    ids = manifest.ids()
+    for i in range(0, len(ids), batch_size):
+        part = ids[i:i + batch_size]
+        collection.delete(ids=part)
+        manifest.remove(part)
+    return len(ids)
@@ -0,0 +1,189 @@
+import hashlib
+import json
+import os
+import queue
+import threading
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional
+
+# =========================================================
+# 적재 파이프라인 (읽기 → 임베딩 → upsert 단계를 겹쳐서 실행)
+# =========================================================
+# 단계 사이는 크기가 제한된 queue로 연결되어, 파일 크기와 무관하게
+# 메모리에는 최대 (queue_depth * 2 + 3)개 배치만 올라간다.
+INGEST_QUEUE_DEPTH = int(os.getenv("INGEST_QUEUE_DEPTH", "4"))
+
+_DONE = object()
+# put/get 대기 중에도 다른 단계의 실패(stop)를 확인하는 주기
+_POLL_SEC = 0.5
+
+
+class _StageError:
+    def __init__(self, exc: BaseException):
+        self.exc = exc
+
+
+def _put(q: "queue.Queue", item: Any, stop: threading.Event) -> bool:
+    while not stop.is_set():
+        try:
+            q.put(item, timeout=_POLL_SEC)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _get(q: "queue.Queue", stop: threading.Event) -> Any:
+    while True:
+        try:
+            return q.get(timeout=_POLL_SEC)
+        except queue.Empty:
+            if stop.is_set():
+                return _DONE
+
+
+def run_pipeline(
+    batches: Iterable[Dict[str, Any]],
+    embed: Callable[[Dict[str, Any]], Any],
+    upsert: Callable[[Dict[str, Any], Any], None],
+    on_committed: Optional[Callable[[Dict[str, Any]], None]] = None,
+    queue_depth: int = INGEST_QUEUE_DEPTH,
+) -> int:
+    """
+    batches(generator)를 읽기 스레드, embed를 임베딩 스레드, upsert를 호출 스레드에서 실행한다.
+    배치 순서는 유지되며, upsert가 끝난 배치마다 on_committed(batch)를 호출한다 (checkpoint 저장용).
+    어느 단계든 예외가 나면 나머지 단계를 멈추고 그 예외를 다시 던진다. 반환값: 처리한 배치 수.
+    """
+    stop = threading.Event()
+    read_q: "queue.Queue" = queue.Queue(maxsize=max(1, queue_depth))
+    embed_q: "queue.Queue" = queue.Queue(maxsize=max(1, queue_depth))
+
+    def reader() -> None:
+        try:
+            for batch in batches:
+                if not _put(read_q, batch, stop):
+                    return
+            _put(read_q, _DONE, stop)
+        except BaseException as e:
+            _put(read_q, _StageError(e), stop)
+
+    def embedder() -> None:
+        while True:
+            batch = _get(read_q, stop)
+            if batch is _DONE or isinstance(batch, _StageError):
+                _put(embed_q, batch, stop)
+                return
+            try:
+                embeddings = embed(batch)
+            except BaseException as e:
+                _put(embed_q, _StageError(e), stop)
+                return
+            if not _put(embed_q, (batch, embeddings), stop):
+                return
+
+    threads = [
+        threading.Thread(target=reader, name="ingest-read", daemon=True),
+        threading.Thread(target=embedder, name="ingest-embed", daemon=True),
+    ]
+    for t in threads:
+        t.start()
+
+    done = 0
+    try:
+        while True:
+            item = _get(embed_q, stop)
+            if item is _DONE:
+                break
+            if isinstance(item, _StageError):
+                raise item.exc
+            batch, embeddings = item
+            upsert(batch, embeddings)
+            done += 1
+            if on_committed is not None:
+                on_committed(batch)
+    finally:
+        stop.set()
+        for t in threads:
+            t.join(timeout=5)
+    return done
+
+
+# =========================================================
+# JSONL 읽기 + byte offset checkpoint
+# =========================================================
+_HEAD_BYTES = 64 * 1024
+
+
+def _file_head(path: str) -> str:
+    # 같은 경로에 다른 파일이 덮어써졌는지 확인하기 위한 앞부분 지문
+    with open(path, "rb") as f:
+        return hashlib.sha1(f.read(_HEAD_BYTES)).hexdigest()
+
+
+def iter_jsonl_lines(path: str, start_offset: int = 0) -> Iterator[tuple]:
+    """(다음 줄 시작 byte offset, dict) 를 yield. 빈 줄/깨진 줄은 건너뛴다."""
+    with open(path, "rb") as f:
+        f.seek(start_offset)
+        offset = start_offset
+        for raw in iter(f.readline, b""):
+            offset += len(raw)
+            line = raw.strip()
+            if not line:
+                continue
+            try:
+                item = json.loads(line)
+            except ValueError:
+                continue
+            if isinstance(item, dict):
+                yield offset, item
+
+
+class Checkpoint:
+    """
+    적재 진행 위치(byte offset)를 JSON 파일에 저장한다. 임시 파일에 쓴 뒤 os.replace로 교체.
+    source 파일의 앞부분 지문이 다르거나 offset이 줄 경계가 아니면 처음부터 다시 읽는다.
+    """
+
+    def __init__(self, path: str, source_path: str, scope: str = ""):
+        self.path = path
+        self.source_path = os.path.abspath(source_path)
+        self.scope = scope
+        self._head = _file_head(source_path)
+
+    def load(self) -> Optional[Dict[str, Any]]:
+        """이어서 적재할 수 있는 checkpoint면 저장된 state(dict), 아니면 None."""
+        if not os.path.exists(self.path):
+            return None
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return None
+        offset = int(state.get("offset") or 0)
+        if (
+            state.get("source") != self.source_path
+            or state.get("scope") != self.scope
+            or state.get("head") != self._head
+            or not 0 < offset <= os.path.getsize(self.source_path)
+        ):
+            return None
+        with open(self.source_path, "rb") as f:
+            f.seek(offset - 1)
+            # 마지막 줄에 개행이 없을 수 있으므로 파일 끝은 그대로 인정
+            if f.read(1) != b"\n" and offset != os.path.getsize(self.source_path):
+                return None
+        return state
+
+    def resume_offset(self) -> int:
+        state = self.load()
+        return int(state["offset"]) if state else 0
+
+    def save(self, offset: int, **extra: Any) -> None:
+        state = {"source": self.source_path, "scope": self.scope, "head": self._head, "offset": offset, **extra}
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(state, f, ensure_ascii=False)
+        os.replace(tmp, self.path)
+
+    def clear(self) -> None:
+        if os.path.exists(self.path):
+            os.remove(self.path)
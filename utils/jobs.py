@@ -0,0 +1,275 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# =========================================================
+# 백그라운드 작업 큐 (SQLite에 상태 저장 → 재시작 후 이어서 실행)
+# =========================================================
+JOB_DB_PATH = os.getenv("JOB_DB_PATH", os.path.join("data", "jobs.sqlite3"))
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+# 실행 중 작업은 주기적으로 updated_at을 갱신하고,
+# 이 시간 이상 갱신이 없으면 죽은 워커의 작업으로 보고 다시 대기열에 넣는다.
+JOB_HEARTBEAT_SEC = float(os.getenv("JOB_HEARTBEAT_SEC", "30"))
+JOB_STALE_SEC = float(os.getenv("JOB_STALE_SEC", "300"))
+# stale로 재실행하는 최대 시도 횟수. 워커 프로세스를 죽이는(크래시/OOM) 작업이 재시작마다 다시 도는 것을 막는다
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+
+STATUS_QUEUED = "queued"
+STATUS_RUNNING = "running"
+STATUS_SUCCEEDED = "succeeded"
+STATUS_FAILED = "failed"
+
+# handler(params, progress) -> result dict
+# progress(node, state): node 단위 진행 상황 보고 (state: "start" / "done")
+ProgressFn = Callable[[str, str], None]
+JobHandler = Callable[[Dict[str, Any], ProgressFn], Dict[str, Any]]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id       TEXT PRIMARY KEY,
+    kind         TEXT NOT NULL,
+    status       TEXT NOT NULL,
+    params       TEXT NOT NULL,
+    current_node TEXT,
+    progress     TEXT NOT NULL DEFAULT '[]',
+    result       TEXT,
+    error        TEXT,
+    attempts     INTEGER NOT NULL DEFAULT 0,
+    created_at   REAL NOT NULL,
+    started_at   REAL,
+    finished_at  REAL,
+    updated_at   REAL NOT NULL
+)
+"""
+
+
+class JobStore:
+    """jobs 테이블 CRUD. 호출마다 짧은 커넥션을 열어 여러 스레드/프로세스에서 안전하게 쓴다."""
+
+    def __init__(self, db_path: str = JOB_DB_PATH):
+        self.db_path = db_path
+        db_dir = os.path.dirname(db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+        with closing(self._connect()) as conn, conn:
+            conn.execute(_SCHEMA)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs(status)")
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def create(self, kind: str, params: Dict[str, Any]) -> str:
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "INSERT INTO jobs (job_id, kind, status, params, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (job_id, kind, STATUS_QUEUED, json.dumps(params, ensure_ascii=False), now, now),
+            )
+        return job_id
+
+    def claim(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """queued → running 전환에 성공한 워커만 작업을 가져간다."""
+        now = time.time()
+        with closing(self._connect()) as conn, conn:
+            cur = conn.execute(
+                "UPDATE jobs SET status = ?, started_at = ?, updated_at = ?, attempts = attempts + 1, "
+                "progress = '[]', current_node = NULL WHERE job_id = ? AND status = ?",
+                (STATUS_RUNNING, now, now, job_id, STATUS_QUEUED),
+            )
+            if cur.rowcount != 1:
+                return None
+        return self.get(job_id)
+
+    def add_progress(self, job_id: str, node: str, state: str) -> None:
+        with closing(self._connect()) as conn, conn:
+            row = conn.execute("SELECT progress FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+            if row is None:
+                return
+            progress = json.loads(row["progress"] or "[]")
+            progress.append({"node": node, "state": state, "at": time.time()})
+            conn.execute(
+                "UPDATE jobs SET progress = ?, current_node = ?, updated_at = ? WHERE job_id = ?",
+                (json.dumps(progress, ensure_ascii=False), node, time.time(), job_id),
+            )
+
+    def heartbeat(self, job_ids: List[str]) -> None:
+        if not job_ids:
+            return
+        now = time.time()
+        with closing(self._connect()) as conn, conn:
+            conn.executemany(
+                "UPDATE jobs SET updated_at = ? WHERE job_id = ? AND status = ?",
+                [(now, job_id, STATUS_RUNNING) for job_id in job_ids],
+            )
+
+    def finish(self, job_id: str, result: Optional[Dict[str, Any]] = None, error: Optional[str] = None) -> None:
+        now = time.time()
+        status = STATUS_FAILED if error is not None else STATUS_SUCCEEDED
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "UPDATE jobs SET status = ?, result = ?, error = ?, finished_at = ?, updated_at = ? WHERE job_id = ?",
+                (
+                    status,
+                    json.dumps(result, ensure_ascii=False) if result is not None else None,
+                    error,
+                    now,
+                    now,
+                    job_id,
+                ),
+            )
+
+    def requeue_stale(self, stale_sec: float, max_attempts: int = JOB_MAX_ATTEMPTS) -> Tuple[int, int]:
+        """
+        heartbeat가 끊긴 running 작업을 다시 queued로 돌린다. attempts가 max_attempts에 도달한 작업은 failed 처리.
+        반환값: (requeued, failed)
+        """
+        now = time.time()
+        with closing(self._connect()) as conn, conn:
+            failed = conn.execute(
+                "UPDATE jobs SET status = ?, error = ?, finished_at = ?, updated_at = ? "
+                "WHERE status = ? AND updated_at < ? AND attempts >= ?",
+                (
+                    STATUS_FAILED,
+                    f"worker died during execution {max_attempts} times (stale heartbeat); not retrying",
+                    now, now, STATUS_RUNNING, now - stale_sec, max_attempts,
+                ),
+            ).rowcount
+            requeued = conn.execute(
+                "UPDATE jobs SET status = ?, updated_at = ? WHERE status = ? AND updated_at < ?",
+                (STATUS_QUEUED, now, STATUS_RUNNING, now - stale_sec),
+            ).rowcount
+        return requeued, failed
+
+    def queued_ids(self, kinds: List[str]) -> List[str]:
+        if not kinds:
+            return []
+        marks = ",".join("?" for _ in kinds)
+        with closing(self._connect()) as conn, conn:
+            rows = conn.execute(
+                f"SELECT job_id FROM jobs WHERE status = ? AND kind IN ({marks}) ORDER BY created_at",
+                (STATUS_QUEUED, *kinds),
+            ).fetchall()
+        return [r["job_id"] for r in rows]
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with closing(self._connect()) as conn, conn:
+            row = conn.execute("SELECT * FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        job["params"] = json.loads(job["params"] or "{}")
+        job["progress"] = json.loads(job["progress"] or "[]")
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        return job
+
+
+class JobManager:
+    """
+    등록된 handler를 bounded 스레드 풀에서 실행한다.
+    상태는 JobStore(SQLite)에 남으므로 서버가 재시작되면 start()에서 대기/중단된 작업을 다시 실행한다.
+    """
+
+    def __init__(self, store: Optional[JobStore] = None, max_workers: int = JOB_WORKERS):
+        self._store = store
+        self.max_workers = max(1, max_workers)
+        self._handlers: Dict[str, JobHandler] = {}
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._running: Dict[str, bool] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+
+    @property
+    def store(self) -> JobStore:
+        if self._store is None:
+            self._store = JobStore()
+        return self._store
+
+    def register(self, kind: str, handler: JobHandler) -> None:
+        self._handlers[kind] = handler
+
+    def start(self) -> None:
+        with self._lock:
+            if self._executor is not None:
+                return
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="job")
+            self._stop.clear()
+            threading.Thread(target=self._heartbeat_loop, name="job-heartbeat", daemon=True).start()
+
+        requeued, failed = self.store.requeue_stale(JOB_STALE_SEC)
+        pending = self.store.queued_ids(list(self._handlers))
+        if requeued or failed or pending:
+            print(f"[Jobs] resume: requeued={requeued}, failed(max attempts)={failed}, pending={len(pending)}")
+        for job_id in pending:
+            self._executor.submit(self._run, job_id)
+
+    def shutdown(self) -> None:
+        self._stop.set()
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            # 실행 중인 작업은 heartbeat가 멈춘 뒤 다음 기동 시 stale 처리되어 재실행된다.
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def submit(self, kind: str, params: Dict[str, Any]) -> str:
+        if kind not in self._handlers:
+            raise ValueError(f"unknown job kind: {kind}")
+        self.start()
+        job_id = self.store.create(kind, params)
+        self._executor.submit(self._run, job_id)
+        return job_id
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        return self.store.get(job_id)
+
+    def _run(self, job_id: str) -> None:
+        job = self.store.claim(job_id)
+        if job is None:
+            return
+        handler = self._handlers[job["kind"]]
+        with self._lock:
+            self._running[job_id] = True
+
+        def progress(node: str, state: str) -> None:
+            try:
+                self.store.add_progress(job_id, node, state)
+            except Exception as e:
+                print(f"[Jobs] progress update failed ({job_id}): {e}")
+
+        print(f"[Jobs] start {job['kind']} job {job_id} (attempt {job['attempts']})")
+        try:
+            result = handler(job["params"], progress)
+            self.store.finish(job_id, result=result or {})
+            print(f"[Jobs] done {job_id}")
+        except Exception as e:
+            import traceback
+
+            print(traceback.format_exc())
+            self.store.finish(job_id, error=str(e))
+        finally:
+            with self._lock:
+                self._running.pop(job_id, None)
+
+    def _heartbeat_loop(self) -> None:
+        while not self._stop.wait(JOB_HEARTBEAT_SEC):
+            with self._lock:
+                job_ids = list(self._running)
+            try:
+                self.store.heartbeat(job_ids)
+            except Exception as e:
+                print(f"[Jobs] heartbeat failed: {e}")
+
+
+job_manager = JobManager()
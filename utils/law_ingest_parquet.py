@@ -1,16 +1,46 @@
 import hashlib
 import os
 import re
-from typing import Dict, Optional
+import sys
+import time
+from typing import Dict, Iterator, Optional, Sequence
 
 import chromadb
 import pandas as pd
+import pyarrow.dataset as ds
 from dotenv import load_dotenv
-from sentence_transformers import SentenceTransformer
 
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from utils.chunking import INGEST_TOKEN_CHUNKS, CountTokens, passage_budget, split_by_tokens, tokenizer_counter
+from utils.embedding import BulkEncoder
+from utils.ingest_manifest import (
+    INGEST_INCREMENTAL,
+    IngestManifest,
+    content_hash,
+    delete_all,
+    delete_stale,
+    new_run_id,
+    reset_if_collection_lost,
+)
+from utils.ingest_pipeline import run_pipeline
 
 load_dotenv()
 
+# parquet을 한 번에 읽는 최대 행 수 (row group 단위로 읽되 이 크기로 잘라서 메모리 상한 유지)
+LAW_READ_BATCH_ROWS = int(os.environ.get("LAW_READ_BATCH_ROWS", "10000"))
+
+META_KEYS = (
+    "law_name", "law_type", "source_file", "regulation_type", "regulation_number",
+    "article_number", "article_title", "full_reference",
+)
+ARTICLE_NUMBER_PATTERN = r"제\s*([0-9]+(?:의[0-9]+)?)\s*조"
+ARTICLE_TITLE_PATTERN = r"제\s*[0-9]+(?:의[0-9]+)?\s*조\s*\(([^)]+)\)"
+# chunk id 체계 버전 (manifest scope에 붙임). 예전 id(행 번호 기반)는 이전 scope manifest로 찾아 한 번 지운다
+LAW_ID_SCHEME = "v2"
+
 
 def s(v) -> str:
     if pd.isna(v):
@@ -18,20 +48,20 @@ def s(v) -> str:
     return str(v).strip()
 
 
-def detect_column(df: pd.DataFrame, candidates) -> Optional[str]:
+def detect_column(columns: Sequence[str], candidates) -> Optional[str]:
     for name in candidates:
-        if name in df.columns:
+        if name in columns:
             return name
     return None
 
 
 def parse_article_number(text: str) -> str:
-    m = re.search(r"제\s*([0-9]+(?:의[0-9]+)?)\s*조", text or "")
+    m = re.search(ARTICLE_NUMBER_PATTERN, text or "")
     return m.group(1) if m else ""
 
 
 def parse_article_title(text: str) -> str:
-    m = re.search(r"제\s*[0-9]+(?:의[0-9]+)?\s*조\s*\(([^)]+)\)", text or "")
+    m = re.search(ARTICLE_TITLE_PATTERN, text or "")
     return m.group(1).strip() if m else ""
 
 
@@ -63,39 +93,104 @@ def build_full_reference(law_name: str, article_number: str, article_title: str)
     return " ".join(parts).strip()
 
 
-def normalize_meta(row, colmap: Dict[str, Optional[str]], text: str) -> Dict[str, str]:
-    def pick(key: str, default: str = "") -> str:
-        c = colmap.get(key)
-        if c is None:
-            return default
-        return s(row[c]) or default
-
-    law_name = pick("law_name")
-    law_type = pick("law_type", "unknown")
-    source_file = pick("source_file")
-    regulation_type = pick("regulation_type")
-    regulation_number = pick("regulation_number")
-    article_number = pick("article_number")
-    article_title = pick("article_title")
-    full_reference = pick("full_reference")
-
-    if not article_number:
-        article_number = parse_article_number(text)
-    if not article_title:
-        article_title = parse_article_title(text)
-    if not full_reference:
-        full_reference = build_full_reference(law_name, article_number, article_title)
-
-    return {
-        "law_name": law_name,
-        "law_type": law_type,
-        "source_file": source_file,
-        "regulation_type": regulation_type,
-        "regulation_number": regulation_number,
-        "article_number": article_number,
-        "article_title": article_title,
-        "full_reference": full_reference,
-    }
+def text_column(df: pd.DataFrame, c: Optional[str]) -> pd.Series:
+    # s()의 컬럼 단위 버전: 결측은 "", 나머지는 str + strip
+    if c is None:
+        return pd.Series("", index=df.index, dtype=object)
+    col = df[c]
+    if pd.api.types.is_string_dtype(col):
+        return col.fillna("").str.strip()
+    return col.astype(object).where(col.notna(), "").astype(str).str.strip()
+
+
+def join_nonempty(left: pd.Series, right: pd.Series) -> pd.Series:
+    # 행마다 " ".join([x for x in (left, right) if x])
+    return left.where(right == "", (left + " " + right).where(left != "", right))
+
+
+def normalize_frame(df: pd.DataFrame, colmap: Dict[str, Optional[str]]) -> pd.DataFrame:
+    """
+    text + META_KEYS 컬럼으로 정규화한 DataFrame.
+    비어 있는 조문 번호/제목은 본문에서 정규식으로 뽑고, full_reference는 법령명/조문 번호/제목으로 만든다.
+    """
+    out = pd.DataFrame({key: text_column(df, colmap.get(key)) for key in ("text",) + META_KEYS}, index=df.index)
+    text = out["text"]
+    out["law_type"] = out["law_type"].mask(out["law_type"] == "", "unknown")
+
+    need = out["article_number"] == ""
+    if need.any():
+        out.loc[need, "article_number"] = text[need].str.extract(ARTICLE_NUMBER_PATTERN, expand=False).fillna("")
+    need = out["article_title"] == ""
+    if need.any():
+        out.loc[need, "article_title"] = text[need].str.extract(ARTICLE_TITLE_PATTERN, expand=False).fillna("").str.strip()
+    need = out["full_reference"] == ""
+    if need.any():
+        number = out["article_number"][need]
+        reference = join_nonempty(out["law_name"][need], ("제" + number + "조").where(number != "", ""))
+        out.loc[need, "full_reference"] = join_nonempty(reference, out["article_title"][need]).str.strip()
+    return out
+
+
+def frame_metas(frame: pd.DataFrame):
+    # frame[META_KEYS].to_dict("records")와 같은 결과 (컬럼 리스트를 zip 하는 쪽이 훨씬 빠름)
+    return [dict(zip(META_KEYS, values)) for values in zip(*(frame[key].tolist() for key in META_KEYS))]
+
+
+def chunk_ids(keys: Sequence[str], chunks: Sequence[str], seen: Dict[str, int]) -> list:
+    """
+    조문 키(법령명|파일|규정 번호|조문 번호) + chunk 본문 해시 + 같은 조문 안에서 같은 본문이 나온 순번으로 만든 id.
+    원본 행 번호를 쓰지 않으므로 새 법령 릴리스에서 행이 추가/삭제돼도 나머지 chunk id는 그대로다.
+    seen은 파일 전체에서 (조문 키, 본문 해시)별 등장 횟수 (read batch를 넘어 유지).
+    """
+    out = []
+    for key, chunk in zip(keys, chunks):
+        base = key + "|" + hashlib.sha1(chunk.encode("utf-8")).hexdigest()
+        n = seen.get(base, 0)
+        seen[base] = n + 1
+        out.append(hashlib.sha1(f"{base}|{n}".encode("utf-8")).hexdigest()[:24])
+    return out
+
+
+def iter_law_chunks(
+    parquet_path: str,
+    colmap: Dict[str, Optional[str]],
+    read_rows: int = LAW_READ_BATCH_ROWS,
+    count_tokens: Optional[CountTokens] = None,
+) -> Iterator[pd.DataFrame]:
+    """
+    parquet을 pyarrow.dataset으로 read_rows행씩(필요한 컬럼만) 읽어 chunk 단위 DataFrame(id, doc, META_KEYS)을 yield.
+    id는 chunk_ids로 조문 키 + 본문 해시에서 만든다 (행 번호 무관).
+    count_tokens가 있으면 "passage: 법령명 종류: " 머리말까지 e5 512 토큰에 들어가도록 문장 경계에서 나누고,
+    없으면 예전처럼 split_chunks(글자 수 800 / overlap 120)로 나눈다.
+    """
+    dataset = ds.dataset(parquet_path, format="parquet")
+    columns = sorted({c for c in colmap.values() if c})
+    row_offset = 0
+    seen: Dict[str, int] = {}
+    for record_batch in dataset.to_batches(columns=columns, batch_size=read_rows):
+        df = record_batch.to_pandas()
+        df.index = pd.RangeIndex(row_offset, row_offset + len(df))
+        row_offset += len(df)
+
+        frame = normalize_frame(df, colmap)
+        frame = frame[frame["text"] != ""]
+        if frame.empty:
+            continue
+        if count_tokens is None:
+            chunks = frame["text"].map(split_chunks)
+        else:
+            headers = ("passage: " + frame["law_name"] + " " + frame["law_type"] + ": ").tolist()
+            budgets = {h: passage_budget(count_tokens, h) for h in set(headers)}
+            chunks = [split_by_tokens(t, count_tokens, budgets[h]) for t, h in zip(frame["text"].tolist(), headers)]
+        frame = frame.assign(chunk=chunks).explode("chunk")
+        chunk = frame["chunk"].astype(str)
+        keys = (
+            frame["law_name"] + "|" + frame["source_file"] + "|" + frame["regulation_number"]
+            + "|" + frame["article_number"]
+        )
+        frame["id"] = chunk_ids(keys.tolist(), chunk.tolist(), seen)
+        frame["doc"] = ("passage: " + frame["law_name"] + " " + frame["law_type"] + ": " + chunk).str.strip()
+        yield frame[["id", "doc", *META_KEYS]]
 
 
 def main():
@@ -105,31 +200,34 @@ def main():
     collection_name = os.environ.get("LAW_COLLECTION_NAME", "law_regulations")
     model_name = os.environ.get("LAW_EMBED_MODEL_NAME", "intfloat/multilingual-e5-base")
     recreate = os.environ.get("LAW_RECREATE", "false").lower() in {"1", "true", "yes", "y"}
-    batch_size = int(os.environ.get("LAW_BATCH_SIZE", "64"))
+    # upsert 단위. 인코딩은 BulkEncoder가 이 안에서 길이순으로 EMBED_INGEST_BATCH_SIZE씩 나눠서 함
+    batch_size = int(os.environ.get("LAW_BATCH_SIZE", "512"))
 
     print("=" * 60)
     print("[LAW INGEST] parquet -> chroma")
     print(f"parquet: {parquet_path}")
     print(f"chroma : {host}:{port}, collection={collection_name}")
     print(f"model  : {model_name}")
-    print(f"recreate={recreate}, batch_size={batch_size}")
+    print(f"recreate={recreate}, batch_size={batch_size}, read_rows={LAW_READ_BATCH_ROWS}")
 
     if not os.path.exists(parquet_path):
         raise FileNotFoundError(parquet_path)
 
-    df = pd.read_parquet(parquet_path)
-    print(f"rows={len(df)}, columns={list(df.columns)}")
+    # 전체를 DataFrame으로 올리지 않고 스키마/행 수(parquet 메타데이터)만 먼저 확인
+    dataset = ds.dataset(parquet_path, format="parquet")
+    columns = dataset.schema.names
+    print(f"rows={dataset.count_rows()}, columns={columns}")
 
     colmap = {
-        "text": detect_column(df, ["chunk_text", "content", "text", "document", "body", "raw_text"]),
-        "law_name": detect_column(df, ["law_name", "law", "law_title"]),
-        "law_type": detect_column(df, ["law_type", "doc_type", "type"]),
-        "source_file": detect_column(df, ["source_file", "file_name", "filename", "pdf_name"]),
-        "regulation_type": detect_column(df, ["regulation_type", "reg_type"]),
-        "regulation_number": detect_column(df, ["regulation_number", "reg_number", "law_number"]),
-        "article_number": detect_column(df, ["article_number", "article_no", "article"]),
-        "article_title": detect_column(df, ["article_title", "article_name", "article_subject"]),
-        "full_reference": detect_column(df, ["full_reference", "reference"]),
+        "text": detect_column(columns, ["chunk_text", "content", "text", "document", "body", "raw_text"]),
+        "law_name": detect_column(columns, ["law_name", "law", "law_title"]),
+        "law_type": detect_column(columns, ["law_type", "doc_type", "type"]),
+        "source_file": detect_column(columns, ["source_file", "file_name", "filename", "pdf_name"]),
+        "regulation_type": detect_column(columns, ["regulation_type", "reg_type"]),
+        "regulation_number": detect_column(columns, ["regulation_number", "reg_number", "law_number"]),
+        "article_number": detect_column(columns, ["article_number", "article_no", "article"]),
+        "article_title": detect_column(columns, ["article_title", "article_name", "article_subject"]),
+        "full_reference": detect_column(columns, ["full_reference", "reference"]),
     }
     if colmap["text"] is None:
         raise RuntimeError("text column missing")
@@ -145,44 +243,84 @@ def main():
             pass
     col = client.get_or_create_collection(name=collection_name)
 
-    model = SentenceTransformer(model_name)
+    # 증분 적재: chunk id별 내용 해시가 같으면 임베딩/upsert 생략, 원본에서 사라진 id는 삭제
+    # scope에 id 체계 버전을 붙여, 예전 체계로 적재된 id는 적재가 끝난 뒤 이전 scope manifest 기준으로 지운다
+    manifest = IngestManifest(f"{host}:{port}|{collection_name}|{LAW_ID_SCHEME}") if INGEST_INCREMENTAL else None
+    legacy_manifest = IngestManifest(f"{host}:{port}|{collection_name}") if INGEST_INCREMENTAL else None
+    run_id = new_run_id()
+    if manifest is not None:
+        if recreate:
+            manifest.reset()
+            legacy_manifest.reset()
+        else:
+            reset_if_collection_lost(col, manifest)
+        print(f"incremental: manifest ids={manifest.count()}")
+
+    encoder = BulkEncoder(model_name)
 
-    ids = []
-    docs = []
-    metas = []
     total_added = 0
-
-    for i, row in df.iterrows():
-        text = s(row[colmap["text"]])  # type: ignore[index]
-        if not text:
-            continue
-
-        meta = normalize_meta(row, colmap, text)
-        chunk_list = split_chunks(text)
-
-        for j, chunk in enumerate(chunk_list):
-            uid_seed = f"{meta['law_name']}|{meta['source_file']}|{meta['article_number']}|{i}|{j}|{chunk[:120]}"
-            uid = hashlib.sha1(uid_seed.encode("utf-8")).hexdigest()[:24]
-            doc = f"passage: {meta['law_name']} {meta['law_type']}: {chunk}".strip()
-
-            ids.append(uid)
-            docs.append(doc)
-            metas.append(meta)
-
-            if len(ids) >= batch_size:
-                emb = model.encode(docs, normalize_embeddings=True).tolist()
-                col.upsert(ids=ids, documents=docs, metadatas=metas, embeddings=emb)
-                total_added += len(ids)
-                print(f"upserted={total_added}")
-                ids, docs, metas = [], [], []
-
-    if ids:
-        emb = model.encode(docs, normalize_embeddings=True).tolist()
-        col.upsert(ids=ids, documents=docs, metadatas=metas, embeddings=emb)
-        total_added += len(ids)
+    total_skipped = 0
+
+    def filtered(ids, docs, metas):
+        # 내용 해시가 manifest와 같은 chunk는 빼고 임베딩할 배치만 돌려준다
+        nonlocal total_skipped
+        hashes = [content_hash(uid, doc, meta, model_name) for uid, doc, meta in zip(ids, docs, metas)]
+        if manifest is not None:
+            changed = manifest.filter_changed(ids, hashes, run_id)
+            total_skipped += len(ids) - sum(changed)
+            ids, docs, metas, hashes = (
+                [v for v, c in zip(values, changed) if c] for values in (ids, docs, metas, hashes)
+            )
+        return {"ids": ids, "docs": docs, "metas": metas, "hashes": hashes}
+
+    # e5 토큰 한도 기준 분할 (INGEST_TOKEN_CHUNKS=false면 글자 수 분할)
+    count_tokens = tokenizer_counter(encoder.model.tokenizer) if INGEST_TOKEN_CHUNKS else None
+
+    def batches():
+        # 읽기 스레드에서 실행: parquet row batch → chunk DataFrame → batch_size 단위 배치
+        ids, docs, metas = [], [], []
+        for frame in iter_law_chunks(parquet_path, colmap, count_tokens=count_tokens):
+            ids.extend(frame["id"].tolist())
+            docs.extend(frame["doc"].tolist())
+            metas.extend(frame_metas(frame))
+            while len(ids) >= batch_size:
+                batch = filtered(ids[:batch_size], docs[:batch_size], metas[:batch_size])
+                del ids[:batch_size], docs[:batch_size], metas[:batch_size]
+                if batch["ids"]:
+                    yield batch
+
+        if ids:
+            batch = filtered(ids, docs, metas)
+            if batch["ids"]:
+                yield batch
+
+    def embed(batch):
+        return encoder.encode(batch["docs"]).tolist()
+
+    def upsert(batch, emb):
+        nonlocal total_added
+        col.upsert(ids=batch["ids"], documents=batch["docs"], metadatas=batch["metas"], embeddings=emb)
+        if manifest is not None:
+            manifest.record(batch["ids"], batch["hashes"], run_id)
+        total_added += len(batch["ids"])
+        print(f"upserted={total_added}, unchanged={total_skipped}")
+
+    started = time.perf_counter()
+    with encoder:
+        run_pipeline(batches(), embed, upsert)
+    elapsed = time.perf_counter() - started
+
+    removed = 0
+    if manifest is not None:
+        removed += delete_stale(col, manifest, run_id)
+        if legacy_manifest.count():
+            print(f"legacy ids: 예전 id 체계로 적재된 {legacy_manifest.count()}개 삭제")
+            removed += delete_all(col, legacy_manifest)
 
     print("=" * 60)
-    print(f"done. added={total_added}, final_count={col.count()}")
+    print(f"done. added={total_added}, unchanged={total_skipped}, removed={removed}, final_count={col.count()}")
+    print(f"throughput: {total_added / elapsed if elapsed else 0:.1f} chunks/sec ({elapsed:.1f}s), "
+          f"embed={encoder.throughput():.1f} chunks/sec, workers={encoder.workers}, encode_batch={encoder.batch_size}")
 
     sample = col.get(limit=100, offset=0, include=["metadatas"]).get("metadatas", [])
     key_counter = {}
@@ -0,0 +1,247 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import closing
+from typing import Any, Callable, Dict, Optional
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# =========================================================
+# LLM 응답 캐시 (같은 입력 재처리 시 Gemini 재호출 방지)
+# =========================================================
+# 키: sha256(model, system_instruction, contents, temperature, 나머지 config 해시)
+# 값: 응답 텍스트 (빈 응답/예외는 저장하지 않음)
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "1").lower() not in ("0", "false", "no")
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", os.path.join("data", "llm_cache.sqlite3"))
+LLM_CACHE_TTL_SEC = float(os.getenv("LLM_CACHE_TTL_SEC", str(7 * 24 * 3600)))
+LLM_CACHE_MAX_BYTES = int(os.getenv("LLM_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+# put 이 횟수마다 만료/용량 초과 항목 정리
+_EVICT_EVERY = 32
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS llm_cache (
+    cache_key   TEXT PRIMARY KEY,
+    model       TEXT NOT NULL,
+    response    TEXT NOT NULL,
+    size        INTEGER NOT NULL,
+    created_at  REAL NOT NULL,
+    accessed_at REAL NOT NULL
+)
+"""
+
+
+def cache_setting(feature: str, default: bool) -> bool:
+    """
+    호출부별 캐시 사용 여부. 환경변수 LLM_CACHE_<FEATURE>(1/0)로 덮어쓸 수 있다.
+    temperature가 높은 생성형 호출은 같은 입력에도 다른 답을 기대하므로 default=False로 둔다.
+    """
+    value = os.getenv(f"LLM_CACHE_{feature.upper()}")
+    if value is None:
+        return default
+    return value.lower() not in ("0", "false", "no")
+
+
+def _to_jsonable(value: Any) -> Any:
+    """genai types(pydantic)/리스트/문자열을 키 계산용 JSON 값으로 변환."""
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    if isinstance(value, (list, tuple)):
+        return [_to_jsonable(v) for v in value]
+    if isinstance(value, dict):
+        return {str(k): _to_jsonable(v) for k, v in value.items()}
+    if hasattr(value, "model_dump"):
+        return _to_jsonable(value.model_dump(mode="json", exclude_none=True))
+    return repr(value)
+
+
+def make_cache_key(model: str, contents: Any, config: Any = None) -> str:
+    cfg = _to_jsonable(config) or {}
+    if not isinstance(cfg, dict):
+        cfg = {"config": cfg}
+    cfg = dict(cfg)
+    system_instruction = cfg.pop("system_instruction", None)
+    temperature = cfg.pop("temperature", None)
+    config_hash = hashlib.sha256(json.dumps(cfg, ensure_ascii=False, sort_keys=True).encode("utf-8")).hexdigest()
+    material = {
+        "model": model,
+        "system_instruction": system_instruction,
+        "contents": _to_jsonable(contents),
+        "temperature": temperature,
+        "config": config_hash,
+    }
+    return hashlib.sha256(json.dumps(material, ensure_ascii=False, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def is_json_response(text: str) -> bool:
+    """```json 코드블록을 벗겨낸 뒤 JSON으로 파싱되는지 (JSON 응답 호출부의 캐시 저장 조건)."""
+    t = (text or "").strip()
+    if t.startswith("```json"):
+        t = t[7:]
+    elif t.startswith("```"):
+        t = t[3:]
+    if t.endswith("```"):
+        t = t[:-3]
+    try:
+        json.loads(t.strip())
+    except ValueError:
+        return False
+    return True
+
+
+class LLMResponseCache:
+    """SQLite 기반 content-addressed 응답 캐시. TTL + 전체 크기(byte) 기준 LRU 정리."""
+
+    def __init__(
+        self,
+        db_path: str = LLM_CACHE_PATH,
+        ttl_sec: float = LLM_CACHE_TTL_SEC,
+        max_bytes: int = LLM_CACHE_MAX_BYTES,
+    ):
+        self.db_path = db_path
+        self.ttl_sec = ttl_sec
+        self.max_bytes = max_bytes
+        self._ready = False
+        self._lock = threading.Lock()
+        self._puts = 0
+        self.hits = 0
+        self.misses = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        if not self._ready:
+            with self._lock:
+                if not self._ready:
+                    conn.execute("PRAGMA journal_mode=WAL")
+                    conn.execute(_SCHEMA)
+                    conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_cache_accessed ON llm_cache(accessed_at)")
+                    conn.commit()
+                    self._ready = True
+        return conn
+
+    def _ensure_dir(self) -> None:
+        db_dir = os.path.dirname(self.db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+
+    def get(self, key: str) -> Optional[str]:
+        self._ensure_dir()
+        now = time.time()
+        with closing(self._connect()) as conn, conn:
+            row = conn.execute(
+                "SELECT response, created_at FROM llm_cache WHERE cache_key = ?", (key,)
+            ).fetchone()
+            if row is not None and self.ttl_sec > 0 and now - row[1] > self.ttl_sec:
+                conn.execute("DELETE FROM llm_cache WHERE cache_key = ?", (key,))
+                row = None
+            if row is not None:
+                conn.execute("UPDATE llm_cache SET accessed_at = ? WHERE cache_key = ?", (now, key))
+        with self._lock:
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return row[0]
+
+    def put(self, key: str, model: str, response: str) -> None:
+        self._ensure_dir()
+        now = time.time()
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (cache_key, model, response, size, created_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, model, response, len(response.encode("utf-8")), now, now),
+            )
+        with self._lock:
+            self._puts += 1
+            should_evict = self._puts % _EVICT_EVERY == 0
+        if should_evict:
+            self.evict()
+
+    def evict(self) -> int:
+        """만료 항목 삭제 후, 총 크기가 max_bytes를 넘으면 오래 안 쓴 항목부터 삭제."""
+        removed = 0
+        with closing(self._connect()) as conn, conn:
+            if self.ttl_sec > 0:
+                removed += conn.execute(
+                    "DELETE FROM llm_cache WHERE created_at < ?", (time.time() - self.ttl_sec,)
+                ).rowcount
+            total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM llm_cache").fetchone()[0]
+            if self.max_bytes > 0 and total > self.max_bytes:
+                victims = []
+                for cache_key, size in conn.execute("SELECT cache_key, size FROM llm_cache ORDER BY accessed_at"):
+                    if total <= self.max_bytes:
+                        break
+                    victims.append((cache_key,))
+                    total -= size
+                conn.executemany("DELETE FROM llm_cache WHERE cache_key = ?", victims)
+                removed += len(victims)
+        return removed
+
+    def stats(self) -> Dict[str, Any]:
+        self._ensure_dir()
+        with closing(self._connect()) as conn, conn:
+            count, total = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM llm_cache").fetchone()
+        with self._lock:
+            hits, misses = self.hits, self.misses
+        lookups = hits + misses
+        return {
+            "enabled": LLM_CACHE_ENABLED,
+            "items": count,
+            "bytes": total,
+            "max_bytes": self.max_bytes,
+            "ttl_sec": self.ttl_sec,
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+_cache = LLMResponseCache()
+
+
+def get_llm_cache() -> LLMResponseCache:
+    return _cache
+
+
+def generate_text(
+    client: Any,
+    *,
+    model: str,
+    contents: Any,
+    config: Any = None,
+    use_cache: bool = False,
+    generate: Optional[Callable[..., Any]] = None,
+    validate: Optional[Callable[[str], bool]] = None,
+) -> str:
+    """
+    Gemini generate_content를 호출하고 response.text를 돌려준다.
+    use_cache=True인 호출부만 캐시를 사용한다 (opt-in, 호출부마다 cache_setting으로 결정). generate로 재시도 래퍼 등을 넘길 수 있고,
+    validate가 있으면 통과한 응답만 저장한다 (파싱 실패 응답이 캐시에 남지 않도록).
+    """
+    generate = generate or client.models.generate_content
+    key = None
+    if use_cache and LLM_CACHE_ENABLED:
+        key = make_cache_key(model, contents, config)
+        try:
+            cached = _cache.get(key)
+        except Exception as e:
+            print(f"[LLMCache] get failed: {e}")
+            cached = None
+        if cached is not None:
+            print(f"[LLMCache] hit ({model})")
+            return cached
+
+    response = generate(model=model, contents=contents, config=config)
+    text = getattr(response, "text", None) or ""
+
+    if key is not None and text.strip() and (validate is None or validate(text)):
+        try:
+            _cache.put(key, model, text)
+        except Exception as e:
+            print(f"[LLMCache] put failed: {e}")
+    return text
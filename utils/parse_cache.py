@@ -0,0 +1,211 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from contextlib import closing
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# =========================================================
+# 파싱 결과 캐시 (같은 파일 재업로드/재처리 시 파싱 생략)
+# =========================================================
+# 키: sha256(파일 bytes) + PARSER_VERSION + 파싱 옵션(backend, page_range, max_chars ...)
+# 값: 파싱 결과 JSON을 zlib 압축한 BLOB
+PARSE_CACHE_ENABLED = os.getenv("PARSE_CACHE_ENABLED", "1").lower() not in ("0", "false", "no")
+PARSE_CACHE_PATH = os.getenv("PARSE_CACHE_PATH", os.path.join("data", "parse_cache.sqlite3"))
+PARSE_CACHE_MAX_BYTES = int(os.getenv("PARSE_CACHE_MAX_BYTES", str(512 * 1024 * 1024)))
+# 파서 출력(스키마/텍스트 처리)이 바뀌면 올려서 예전 캐시를 무효화
+PARSER_VERSION = "1"
+# put 이 횟수마다 용량 초과 항목 정리
+_EVICT_EVERY = 16
+_HASH_CHUNK = 1024 * 1024
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS parse_cache (
+    cache_key   TEXT PRIMARY KEY,
+    file_sha256 TEXT NOT NULL,
+    options     TEXT NOT NULL,
+    data        BLOB NOT NULL,
+    size        INTEGER NOT NULL,
+    created_at  REAL NOT NULL,
+    accessed_at REAL NOT NULL
+)
+"""
+
+
+def file_sha256(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(_HASH_CHUNK), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def make_parse_key(digest: str, options: Dict[str, Any]) -> str:
+    material = json.dumps(
+        {"sha256": digest, "version": PARSER_VERSION, "options": options},
+        ensure_ascii=False, sort_keys=True, default=list,
+    )
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+class ParseCache:
+    """SQLite 기반 content-addressed 파싱 결과 캐시. 전체 크기(압축 후 byte) 기준 LRU 정리."""
+
+    def __init__(self, db_path: str = PARSE_CACHE_PATH, max_bytes: int = PARSE_CACHE_MAX_BYTES):
+        self.db_path = db_path
+        self.max_bytes = max_bytes
+        self._ready = False
+        self._lock = threading.Lock()
+        self._puts = 0
+        self.hits = 0
+        self.misses = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        db_dir = os.path.dirname(self.db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        if not self._ready:
+            with self._lock:
+                if not self._ready:
+                    conn.execute("PRAGMA journal_mode=WAL")
+                    conn.execute(_SCHEMA)
+                    conn.execute("CREATE INDEX IF NOT EXISTS idx_parse_cache_accessed ON parse_cache(accessed_at)")
+                    conn.commit()
+                    self._ready = True
+        return conn
+
+    def get(self, key: str) -> Optional[Any]:
+        with closing(self._connect()) as conn, conn:
+            row = conn.execute("SELECT data FROM parse_cache WHERE cache_key = ?", (key,)).fetchone()
+            if row is not None:
+                conn.execute("UPDATE parse_cache SET accessed_at = ? WHERE cache_key = ?", (time.time(), key))
+        with self._lock:
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return json.loads(zlib.decompress(row[0]).decode("utf-8"))
+
+    def put(self, key: str, digest: str, options: Dict[str, Any], value: Any) -> None:
+        data = zlib.compress(json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8"), 6)
+        now = time.time()
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO parse_cache (cache_key, file_sha256, options, data, size, created_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, digest, json.dumps(options, ensure_ascii=False, sort_keys=True, default=list), data, len(data), now, now),
+            )
+        with self._lock:
+            self._puts += 1
+            should_evict = self._puts % _EVICT_EVERY == 0
+        if should_evict:
+            self.evict()
+
+    def evict(self) -> int:
+        """총 크기가 max_bytes를 넘으면 오래 안 쓴 항목부터 삭제."""
+        with closing(self._connect()) as conn, conn:
+            total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM parse_cache").fetchone()[0]
+            if self.max_bytes <= 0 or total <= self.max_bytes:
+                return 0
+            victims = []
+            for cache_key, size in conn.execute("SELECT cache_key, size FROM parse_cache ORDER BY accessed_at"):
+                if total <= self.max_bytes:
+                    break
+                victims.append((cache_key,))
+                total -= size
+            conn.executemany("DELETE FROM parse_cache WHERE cache_key = ?", victims)
+        return len(victims)
+
+    def stats(self) -> Dict[str, Any]:
+        with closing(self._connect()) as conn, conn:
+            count, total = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM parse_cache").fetchone()
+        with self._lock:
+            hits, misses = self.hits, self.misses
+        lookups = hits + misses
+        return {
+            "enabled": PARSE_CACHE_ENABLED,
+            "parser_version": PARSER_VERSION,
+            "items": count,
+            "bytes": total,
+            "max_bytes": self.max_bytes,
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+_cache = ParseCache()
+
+
+def get_parse_cache() -> ParseCache:
+    return _cache
+
+
+def _lookup(path: str, options: Dict[str, Any]):
+    """(key, digest, cached값) — 캐시를 못 쓰는 상황이면 key=None."""
+    if not PARSE_CACHE_ENABLED:
+        return None, None, None
+    try:
+        digest = file_sha256(path)
+        key = make_parse_key(digest, options)
+        return key, digest, _cache.get(key)
+    except Exception as e:
+        print(f"[ParseCache] get failed: {e}")
+        return None, None, None
+
+
+def _store(key: Optional[str], digest: Optional[str], options: Dict[str, Any], value: Any) -> None:
+    if key is None:
+        return
+    try:
+        _cache.put(key, digest, options, value)
+    except Exception as e:
+        print(f"[ParseCache] put failed: {e}")
+
+
+def _rename(value: Any, name: str) -> Any:
+    # 캐시 값의 파일명(doc_id/source)은 처음 파싱한 파일 기준이라 현재 파일명으로 바꿔서 돌려준다
+    if isinstance(value, dict) and "source" in value:
+        value["source"] = name
+    elif isinstance(value, dict) and "doc_id" in value:
+        value["doc_id"] = name
+    elif isinstance(value, list):
+        for page in value:
+            _rename(page, name)
+    return value
+
+
+def cached_parse(path: str, options: Dict[str, Any], parse: Callable[[], Any]) -> Any:
+    """path 파일 내용 + options 기준으로 캐시를 찾고, 없으면 parse() 결과를 저장해서 돌려준다."""
+    key, digest, cached = _lookup(path, options)
+    if cached is not None:
+        print(f"[ParseCache] hit ({os.path.basename(path)})")
+        return _rename(cached, os.path.basename(path))
+    value = parse()
+    _store(key, digest, options, value)
+    return value
+
+
+def iter_cached_pages(path: str, options: Dict[str, Any], make_iter: Callable[[], Iterable[Dict]]) -> Iterator[Dict]:
+    """
+    페이지 generator용 캐시. hit면 저장된 페이지를 그대로 yield,
+    miss면 make_iter()의 페이지를 yield 하면서 모아 두었다가 끝까지 읽힌 경우에만 저장한다.
+    """
+    key, digest, cached = _lookup(path, options)
+    if cached is not None:
+        print(f"[ParseCache] hit ({os.path.basename(path)})")
+        yield from _rename(cached, os.path.basename(path))
+        return
+    pages = []
+    for page in make_iter():
+        pages.append(page)
+        yield page
+    _store(key, digest, options, pages)
@@ -0,0 +1,152 @@
+#parser_engine.py
+import os
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from utils.document_parsing import (
+    _text_lines,
+    extract_text_from_pdf,
+    iter_pdf_pages,
+    iter_pdf_pages_pdfium,
+    parse_docx_to_blocks,
+    pdf_cache_options,
+    take_pages_until,
+)
+from utils.parse_cache import cached_parse, iter_cached_pages
+
+# ==========================================================
+# 문서 파서 엔진 (backend registry + 단일 출력 스키마)
+# ==========================================================
+# 출력 스키마 (모든 backend 공통)
+#   PDF : {"file_type": "pdf",  "pages": [{"doc_id", "page_index", "texts": [str, ...]}, ...]}
+#   DOCX: {"file_type": "docx", "content": {"source", "blocks": [...]}}
+#
+# backend
+#   pdfplumber : 표(markdown)/이미지 표시/줄 묶기까지 하는 기본 경로
+#   pdfium     : pypdfium2 텍스트 레이어만 (표 구조 없음, 가장 빠름)
+#   pdfminer   : pdfminer.six 텍스트만 (pypdfium2가 없을 때의 text-only 대안)
+#   docx       : lxml OpenXML 파서
+# "fast"는 설치된 text-only backend 중 가장 빠른 것으로 해석된다.
+PageIter = Iterator[Dict[str, Any]]
+
+_BACKENDS: Dict[str, Dict[str, Any]] = {}
+DEFAULT_BACKENDS = {".pdf": "pdfplumber", ".docx": "docx"}
+FAST_PDF_BACKENDS = ("pdfium", "pdfminer")
+
+
+def register_backend(
+    name: str,
+    exts: Tuple[str, ...],
+    fn: Callable[..., Any],
+    available: Optional[Callable[[], bool]] = None,
+) -> None:
+    """
+    PDF backend: fn(path, page_range=None, **options) -> 페이지 dict iterator
+    DOCX backend: fn(path, out_dir, **options) -> {"source", "blocks"}  (options: images="save"/"lazy"/"skip")
+    """
+    _BACKENDS[name] = {"exts": exts, "fn": fn, "available": available or (lambda: True)}
+
+
+def available_backends() -> List[str]:
+    return [name for name, b in _BACKENDS.items() if b["available"]()]
+
+
+def resolve_backend(path: str, backend: Optional[str] = None) -> str:
+    ext = os.path.splitext(path)[1].lower()
+    if backend == "fast" and ext == ".pdf":
+        backend = next((b for b in FAST_PDF_BACKENDS if b in available_backends()), None)
+    name = backend or DEFAULT_BACKENDS.get(ext)
+    if name is None:
+        raise ValueError(f"Unsupported extension: {ext}")
+    spec = _BACKENDS.get(name)
+    if spec is None or ext not in spec["exts"]:
+        raise ValueError(f"backend '{name}' does not support {ext}")
+    if not spec["available"]():
+        raise ValueError(f"backend '{name}' is not installed")
+    return name
+
+
+def _is_importable(module: str) -> Callable[[], bool]:
+    def check() -> bool:
+        try:
+            __import__(module)
+            return True
+        except ImportError:
+            return False
+    return check
+
+
+# ----------------------------------------------------------
+# text-only backends
+# ----------------------------------------------------------
+def iter_pdf_pages_pdfminer(pdf_path, page_range=None, **_) -> PageIter:
+    from pdfminer.high_level import extract_pages
+    from pdfminer.layout import LTTextContainer
+
+    doc_id = os.path.basename(pdf_path)
+    page_numbers = None
+    if page_range is not None:
+        start, end = page_range
+        page_numbers = range(max(0, int(start or 0)), int(end) if end is not None else 10 ** 9)
+    first = page_numbers.start if page_numbers is not None else 0
+    for offset, layout in enumerate(extract_pages(pdf_path, page_numbers=page_numbers)):
+        text = "".join(el.get_text() for el in layout if isinstance(el, LTTextContainer))
+        yield {"doc_id": doc_id, "page_index": first + offset, "texts": _text_lines(text)}
+
+
+def _iter_pdf_pages_pdfium(pdf_path, page_range=None, **_) -> PageIter:
+    return iter_pdf_pages_pdfium(pdf_path, page_range=page_range)
+
+
+def _iter_pdf_pages_pdfplumber(pdf_path, page_range=None, detect_columns=None, **_) -> PageIter:
+    return iter_pdf_pages(pdf_path, page_range=page_range, detect_columns=detect_columns)
+
+
+def _parse_docx(docx_path, out_dir="tmp", images="save", **_) -> Dict[str, Any]:
+    return parse_docx_to_blocks(docx_path, out_dir, images=images)
+
+
+register_backend("pdfplumber", (".pdf",), _iter_pdf_pages_pdfplumber)
+register_backend("pdfium", (".pdf",), _iter_pdf_pages_pdfium, available=_is_importable("pypdfium2"))
+register_backend("pdfminer", (".pdf",), iter_pdf_pages_pdfminer, available=_is_importable("pdfminer"))
+register_backend("docx", (".docx",), _parse_docx)
+
+
+# ==========================================================
+# 진입점
+# ==========================================================
+def iter_pages(path: str, backend: Optional[str] = None, page_range=None, **options) -> PageIter:
+    """PDF 페이지 dict를 1장씩 yield (스트리밍용). 파싱 캐시에 있으면 저장된 페이지를 그대로 yield."""
+    name = resolve_backend(path, backend)
+    if not path.lower().endswith(".pdf"):
+        raise ValueError("iter_pages는 PDF만 지원합니다.")
+    cache_options = pdf_cache_options(name, page_range, None, options.get("detect_columns"))
+    return iter_cached_pages(path, cache_options, lambda: _BACKENDS[name]["fn"](path, page_range=page_range, **options))
+
+
+def parse_document(
+    path: str,
+    backend: Optional[str] = None,
+    out_dir: str = "tmp",
+    workers: Optional[int] = None,
+    page_range=None,
+    max_chars: Optional[int] = None,
+    **options,
+) -> Dict[str, Any]:
+    """
+    파일 경로 → 공통 스키마 dict.
+    workers는 pdfplumber backend의 페이지 병렬 처리에만 쓰인다 (text-only backend는 충분히 빨라 순차 처리).
+    PDF와 images!="save"인 DOCX는 파일 내용 해시 기준 파싱 캐시를 거친다.
+    max_chars가 있으면 누적 글자 수가 그 이상이 된 페이지에서 읽기를 멈춘다 (PDF만).
+    """
+    name = resolve_backend(path, backend)
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".docx":
+        return {"file_type": "docx", "content": _BACKENDS[name]["fn"](path, out_dir, **options)}
+    if name == "pdfplumber":
+        pages = extract_text_from_pdf(path, workers=workers, page_range=page_range, max_chars=max_chars, **options)
+    else:
+        def run() -> List[Dict[str, Any]]:
+            it = _BACKENDS[name]["fn"](path, page_range=page_range, **options)
+            return take_pages_until(it, max_chars) if max_chars is not None else list(it)
+        pages = cached_parse(path, pdf_cache_options(name, page_range, max_chars), run)
+    return {"file_type": "pdf", "pages": pages}
@@ -17,7 +17,7 @@ if project_root not in sys.path:
 # 이제 modeling 폴더가 기준이 되므로 utils 패키지를 찾을 수 있습니다.
 try:
     from utils.document_parsing import extract_text_from_pdf, parse_docx_to_blocks
-    from utils.vector_db import search_two_tracks
+    from utils.vector_db import QUERY_MAX_CHARS, search_two_tracks
 except ImportError as e:
     # 혹시나 해서 예외 처리 추가
     print(f"❌ 모듈 로딩 실패: {e}")
@@ -70,11 +70,12 @@ def get_all_scores(folder_path):
         full_text = ""
         try:
             if file_path.endswith(".pdf"):
-                parsed = extract_text_from_pdf(file_path)
+                # 검색 쿼리는 앞 QUERY_MAX_CHARS자만 쓰므로 표 탐지 없이 그만큼만 읽는다
+                parsed = extract_text_from_pdf(file_path, mode="fast", max_chars=QUERY_MAX_CHARS)
                 for page in parsed:
                     full_text += " ".join(page.get("texts", [])) + "\n"
             elif file_path.endswith(".docx"):
-                parsed = parse_docx_to_blocks(file_path)
+                parsed = parse_docx_to_blocks(file_path, images="skip")
                 full_text = str(parsed)
         except Exception as e:
             print(f"  - 파싱 에러: {e}")
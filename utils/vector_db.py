@@ -1,11 +1,9 @@
 import os
 import re
 import sys
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
 
-import chromadb
 from dotenv import load_dotenv
-from sentence_transformers import SentenceTransformer
 
 load_dotenv()
 
@@ -15,6 +13,9 @@ parent_dir = os.path.dirname(current_dir)
 if parent_dir not in sys.path:
     sys.path.append(parent_dir)
 
+from utils.chroma_client import get_collection, invalidate, is_connection_error
+from utils.embedding import encode
+
 try:
     from agency_utils import get_ministry_variants
 except ImportError:
@@ -34,6 +35,27 @@ EMBED_MODEL_NAME = os.getenv("CHROMA_EMBED_MODEL_NAME", "intfloat/multilingual-e
 CHROMA_DIR_HINT = os.getenv("CHROMA_DB_DIR", r"C:\chroma_strategy")
 
 
+# 한 번의 조회로 Track A/B를 모두 채우는 모드 (부족할 때만 필터 쿼리로 보충)
+SINGLE_ROUND_TRIP = os.getenv("CHROMA_SINGLE_ROUND_TRIP", "true").lower() in {"1", "true", "yes", "y"}
+# 단일 조회 시 (top_k_a + top_k_b) 대비 후보 오버샘플 배수
+OVERSAMPLE = max(1, int(os.getenv("CHROMA_OVERSAMPLE", "4")))
+# 검색 쿼리로 쓰는 공고문 앞부분 글자 수 (PDF도 이만큼만 읽으면 됨: extract_text_from_pdf(max_chars=...))
+QUERY_MAX_CHARS = 2000
+
+_INCLUDE = ["metadatas", "documents", "distances"]
+_RAW_KEYS = ("ids", "metadatas", "documents", "distances")
+
+
+def _get_collection():
+    print(f"[*] ChromaDB server: {CHROMA_HOST}:{CHROMA_PORT} (collection={COLLECTION_NAME})")
+    try:
+        return get_collection(CHROMA_HOST, CHROMA_PORT, COLLECTION_NAME)
+    except Exception as e:
+        print(f"[Error] ChromaDB connect failed: {e}")
+        print(f"[Hint] Run: chroma run --host {CHROMA_HOST} --port {CHROMA_PORT} --path {CHROMA_DIR_HINT}")
+        return None
+
+
 def search_two_tracks(
     notice_text: str,
     ministry_name: str,
@@ -41,56 +63,165 @@ def search_two_tracks(
     top_k_b: int = 5,
     exclude_same_ministry_in_b: bool = True,
     score_threshold: float = 0.0,
+    single_round_trip: bool = SINGLE_ROUND_TRIP,
+    query_embedding: Optional[List[float]] = None,
 ) -> Dict[str, List[Dict[str, Any]]]:
-    print(f"[*] ChromaDB server: {CHROMA_HOST}:{CHROMA_PORT} (collection={COLLECTION_NAME})")
-
-    try:
-        client = chromadb.HttpClient(host=CHROMA_HOST, port=CHROMA_PORT)
-        collection = client.get_collection(name=COLLECTION_NAME)
-    except Exception as e:
-        print(f"[Error] ChromaDB connect failed: {e}")
-        print(f"[Hint] Run: chroma run --host {CHROMA_HOST} --port {CHROMA_PORT} --path {CHROMA_DIR_HINT}")
+    """query_embedding을 넘기면 (배치로 미리 인코딩한 경우) notice_text를 다시 임베딩하지 않는다."""
+    collection = _get_collection()
+    if collection is None:
         return {"track_a": [], "track_b": []}
 
-    print(f"[*] Embed model: {EMBED_MODEL_NAME}")
-    model = SentenceTransformer(EMBED_MODEL_NAME)
+    if query_embedding is None:
+        query_embedding = encode([(notice_text or "")[:QUERY_MAX_CHARS]], prefix="query: ", model_name=EMBED_MODEL_NAME).tolist()
+    else:
+        query_embedding = [list(query_embedding)]
+    target_variants = get_ministry_variants(ministry_name)
 
-    query_text = "query: " + (notice_text or "")[:2000]
-    query_embedding = model.encode([query_text]).tolist()
+    if single_round_trip:
+        raw = _query(collection, query_embedding, _candidate_count(top_k_a, top_k_b), None, "Candidates")
+        if raw is not None:
+            return _resolve_tracks(
+                collection, raw, 0, query_embedding[0], target_variants,
+                top_k_a, top_k_b, exclude_same_ministry_in_b, score_threshold,
+            )
 
-    target_variants = get_ministry_variants(ministry_name)
     track_a: List[Dict[str, Any]] = []
     track_b: List[Dict[str, Any]] = []
 
     # --- Track A (same ministry) ---
     if target_variants:
-        where_a = {"agency_norm": {"$in": target_variants}}
-        try:
-            results_a = collection.query(
-                query_embeddings=query_embedding,
-                n_results=top_k_a,
-                where=where_a,
-                include=["metadatas", "documents", "distances"],
-            )
-            track_a = _pack_results(results_a, score_threshold)
-        except Exception as e:
-            print(f"[Track A Error] {e}")
+        raw_a = _query(collection, query_embedding, top_k_a, _where_a(target_variants), "Track A")
+        track_a = _pack_results(raw_a, score_threshold)
 
     # --- Track B (other ministries) ---
-    where_b = None
-    if exclude_same_ministry_in_b and target_variants:
-        where_b = {"agency_norm": {"$nin": target_variants}}
+    where_b = _where_b(target_variants, exclude_same_ministry_in_b)
+    raw_b = _query(collection, query_embedding, top_k_b, where_b, "Track B")
+    track_b = _pack_results(raw_b, score_threshold)
+
+    return {"track_a": track_a, "track_b": track_b}
 
+
+def search_two_tracks_batch(
+    notice_texts: List[str],
+    ministry_names: List[str],
+    top_k_a: int = 5,
+    top_k_b: int = 5,
+    exclude_same_ministry_in_b: bool = True,
+    score_threshold: float = 0.0,
+) -> List[Dict[str, List[Dict[str, Any]]]]:
+    """
+    여러 공고를 한 번에 검색한다.
+    임베딩은 한 번의 encode 배치로, 후보 조회는 query_embeddings 다건 조회 한 번으로 처리하고
+    Track이 모자란 공고만 개별 필터 쿼리로 보충한다. 결과는 입력 순서와 같다.
+    """
+    if len(notice_texts) != len(ministry_names):
+        raise ValueError("notice_texts and ministry_names must have the same length")
+    if not notice_texts:
+        return []
+
+    empty = [{"track_a": [], "track_b": []} for _ in notice_texts]
+    collection = _get_collection()
+    if collection is None:
+        return empty
+
+    embeddings = encode(
+        [(t or "")[:QUERY_MAX_CHARS] for t in notice_texts], prefix="query: ", model_name=EMBED_MODEL_NAME
+    ).tolist()
+    raw = _query(collection, embeddings, _candidate_count(top_k_a, top_k_b), None, "Batch candidates")
+    if raw is None:
+        return empty
+
+    return [
+        _resolve_tracks(
+            collection, raw, qi, embeddings[qi], get_ministry_variants(ministry_names[qi]),
+            top_k_a, top_k_b, exclude_same_ministry_in_b, score_threshold,
+        )
+        for qi in range(len(notice_texts))
+    ]
+
+
+def _candidate_count(top_k_a: int, top_k_b: int) -> int:
+    return max(1, (max(0, top_k_a) + max(0, top_k_b)) * OVERSAMPLE)
+
+
+def _where_a(target_variants: List[str]) -> Dict[str, Any]:
+    return {"agency_norm": {"$in": target_variants}}
+
+
+def _where_b(target_variants: List[str], exclude_same_ministry: bool):
+    if exclude_same_ministry and target_variants:
+        return {"agency_norm": {"$nin": target_variants}}
+    return None
+
+
+def _query(collection, query_embeddings: List[List[float]], n_results: int, where, label: str):
+    if n_results <= 0:
+        return None
     try:
-        results_b = collection.query(
-            query_embeddings=query_embedding,
-            n_results=top_k_b,
-            where=where_b,
-            include=["metadatas", "documents", "distances"],
+        return collection.query(
+            query_embeddings=query_embeddings,
+            n_results=n_results,
+            where=where,
+            include=_INCLUDE,
         )
-        track_b = _pack_results(results_b, score_threshold)
     except Exception as e:
-        print(f"[Track B Error] {e}")
+        print(f"[{label} Error] {e}")
+        if is_connection_error(e):
+            # 다음 요청에서 client/collection 핸들을 새로 받도록 버린다. (잘못된 where 등 요청 오류는 연결과 무관)
+            invalidate(CHROMA_HOST, CHROMA_PORT)
+        return None
+
+
+def _select(raw: dict, qi: int, indices: List[int]) -> dict:
+    """다건 조회 결과에서 qi번째 쿼리의 일부 후보만 단건 결과 형태로 잘라낸다."""
+    return {k: [[raw[k][qi][i] for i in indices]] for k in _RAW_KEYS}
+
+
+def _resolve_tracks(
+    collection,
+    raw: dict,
+    qi: int,
+    embedding: List[float],
+    target_variants: List[str],
+    top_k_a: int,
+    top_k_b: int,
+    exclude_same_ministry_in_b: bool,
+    score_threshold: float,
+) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    거리순 후보를 agency_norm 기준으로 Track A/B에 나눈다.
+    후보가 n_results만큼 꽉 찼는데도 Track이 모자라면 (= 더 먼 후보가 남아 있을 수 있음)
+    해당 Track만 기존 필터 쿼리로 다시 조회한다.
+    """
+    variants = set(target_variants)
+    exclude_in_b = exclude_same_ministry_in_b and bool(variants)
+    candidates_full = len(raw["ids"][qi]) >= _candidate_count(top_k_a, top_k_b)
+
+    a_idx: List[int] = []
+    b_idx: List[int] = []
+    for i, meta in enumerate(raw["metadatas"][qi]):
+        same = bool(variants) and (meta or {}).get("agency_norm") in variants
+        if same and len(a_idx) < top_k_a:
+            a_idx.append(i)
+        if not (same and exclude_in_b) and len(b_idx) < top_k_b:
+            b_idx.append(i)
+
+    track_a: List[Dict[str, Any]] = []
+    if variants and top_k_a > 0:
+        if len(a_idx) < top_k_a and candidates_full:
+            raw_a = _query(collection, [embedding], top_k_a, _where_a(target_variants), "Track A")
+            track_a = _pack_results(raw_a, score_threshold)
+        else:
+            track_a = _pack_results(_select(raw, qi, a_idx), score_threshold)
+
+    track_b: List[Dict[str, Any]] = []
+    if top_k_b > 0:
+        if len(b_idx) < top_k_b and candidates_full:
+            where_b = _where_b(target_variants, exclude_same_ministry_in_b)
+            raw_b = _query(collection, [embedding], top_k_b, where_b, "Track B")
+            track_b = _pack_results(raw_b, score_threshold)
+        else:
+            track_b = _pack_results(_select(raw, qi, b_idx), score_threshold)
 
     return {"track_a": track_a, "track_b": track_b}
 